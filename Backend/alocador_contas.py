@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from eth_account import Account
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """
+    Trava exclusiva entre processos (workers do gunicorn) usando um arquivo ``.lock``.
+
+    Usa flock no Linux/macOS e msvcrt.locking no Windows.
+    """
+    with open(caminho, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def gravar_json_atomico(caminho, dados):
+    """Grava o JSON num temporário e troca pelo arquivo final (leitores nunca veem meio arquivo)."""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "w") as f:
+            json.dump(dados, f, indent=2)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+@contextmanager
+def estado_json(caminho, padroes):
+    """
+    Estado guardado num arquivo JSON e compartilhado entre processos.
+
+    Lê o arquivo sob a trava ``caminho + ".lock"``, completa as chaves
+    ausentes com ``padroes`` e, se o bloco terminar sem erro, grava o estado
+    de volta de forma atômica antes de soltar a trava.
+    """
+    with trava_arquivo(caminho + ".lock"):
+        estado = {}
+        if os.path.exists(caminho):
+            try:
+                with open(caminho) as f:
+                    estado = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Erro ao carregar {caminho}: {e}")
+        for chave, valor in padroes.items():
+            estado.setdefault(chave, valor)
+        yield estado
+        gravar_json_atomico(caminho, estado)
+
+
+class AlocadorContas:
+    """
+    Distribui as contas do Ganache para novos clientes em O(1).
+
+    O arquivo de controle guarda, além de ``used_accounts``, uma lista ``livres``
+    de contas já validadas (não registradas no contrato e com saldo intacto).
+    Alocar é tirar o último item da lista e regravar o arquivo; a validação no
+    nó só acontece quando a lista ainda não existe (primeiro uso ou após
+    reset_accounts_control). Todo acesso ao arquivo acontece sob uma trava de
+    arquivo, então dois workers nunca entregam a mesma conta.
+    """
+
+    def __init__(self, chaves, arquivo, validar):
+        """
+        Args:
+            chaves (dict[int, str]): Índice da conta no Ganache -> chave privada.
+            arquivo (str): Caminho do arquivo de controle (JSON).
+            validar (callable): ``validar(enderecos) -> list[bool]``; True para cada conta que
+                pode ser entregue (recebe todas de uma vez para consultar o nó em lote).
+        """
+        self.chaves = chaves
+        self.arquivo = arquivo
+        self.validar = validar
+        self._lock = threading.Lock()
+        # Endereço de cada índice vem da própria chave: dispensa o RPC eth_accounts
+        self.enderecos = {indice: Account.from_key(chave).address for indice, chave in chaves.items()}
+
+    @contextmanager
+    def _estado(self):
+        # Lê o estado sob as travas (thread e arquivo) e grava de volta ao sair sem erro
+        with self._lock, estado_json(self.arquivo, {
+            "next_index": min(self.chaves),
+            "used_accounts": []
+        }) as estado:
+            yield estado
+
+    def _reconstruir_livres(self, estado):
+        usadas = set(estado["used_accounts"])
+        candidatos = [indice for indice in sorted(self.chaves) if self.enderecos[indice] not in usadas]
+        print(f"🔍 Validando {len(candidatos)} contas do Ganache para a lista de livres...")
+        try:
+            validas = self.validar([self.enderecos[indice] for indice in candidatos])
+        except Exception as e:
+            print(f"⚠️ Erro ao validar contas: {e}")
+            raise
+
+        livres = []
+        for indice, valida in zip(candidatos, validas):
+            if valida:
+                livres.append(indice)
+            else:
+                estado["used_accounts"].append(self.enderecos[indice])
+        # A próxima conta entregue é a de menor índice: a lista fica em ordem decrescente
+        estado["livres"] = livres[::-1]
+        print(f"   ✅ {len(livres)} contas livres")
+
+    def alocar(self):
+        """
+        Retira uma conta livre e a marca como usada.
+
+        Returns:
+            tuple[str, str] | tuple[None, None]: Endereço e chave privada, ou (None, None) se acabaram.
+        """
+        with self._estado() as estado:
+            if "livres" not in estado:
+                self._reconstruir_livres(estado)
+            if not estado["livres"]:
+                print("❌ NENHUMA CONTA DISPONÍVEL!")
+                return None, None
+
+            indice = estado["livres"].pop()
+            endereco = self.enderecos[indice]
+            estado["used_accounts"].append(endereco)
+            estado["next_index"] = max(estado["next_index"], indice + 1)
+
+        print(f"✅ Conta {indice} alocada: {endereco}")
+        return endereco, self.chaves[indice]
+
+    def liberar(self, endereco):
+        """Devolve à lista de livres uma conta alocada que não chegou a ser usada."""
+        indices = {e: i for i, e in self.enderecos.items()}
+        if endereco not in indices:
+            return
+        with self._estado() as estado:
+            if endereco in estado["used_accounts"]:
+                estado["used_accounts"].remove(endereco)
+            # Sem lista de livres ela será remontada na próxima alocação, já incluindo a conta
+            livres = estado.get("livres")
+            if livres is not None and indices[endereco] not in livres:
+                livres.append(indices[endereco])
+        print(f"↩️ Conta {endereco} devolvida para a lista de livres")
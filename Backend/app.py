@@ -1,5 +1,4 @@
 import hashlib
-import io
 import os
 import secrets
 import traceback
@@ -10,11 +9,30 @@ from dotenv import load_dotenv
 from flask import Flask, jsonify, request, session, Response
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from matplotlib import pyplot as plt
 from sqlalchemy import text
-
-from Backend.my_blockchain import w3, etherFlow, sistema_cliente, PRIVATE_KEY, admWallet, ongWallet
-from Backend.utils import sign_n_send, get_eth_to_brl, getGanacheAccount, calcular_projecao, gerar_qr_comprovante
+from web3.exceptions import TimeExhausted, ContractLogicError
+
+from Backend.cotacao_service import cotacao_cache, estado_fontes
+from Backend.grafico_service import cache_graficos, chave_grafico, renderizar_grafico_linha, GraficoOcupado, \
+    GRAFICO_MAX_AGE
+from Backend.historico_cotacoes import gravador_cotacoes, motor_ohlc, serie_mensal, converter_data_utc, INTERVALOS
+from Backend.bootstrap import garantir_conta_ong, esquecer_conta_ong
+from Backend.comprovante_codec import decodificar_comprovante, ComprovanteInvalido, SegredoNaoConfigurado
+from Backend.comprovante_service import publicar_comprovante, registro_comprovantes, etag_comprovante, \
+    png_comprovante
+from Backend.qr_lote import gerador_lote_qr, LoteOcupado
+from Backend.my_blockchain import w3, etherFlow, sistema_cliente
+from Backend.leitura_blockchain import leitor_blockchain
+from Backend.resolucao_clientes import resolucao_clientes
+from Backend.indexador_eventos import indexador_eventos
+from Backend.parametros_rede import parametros_rede
+from Backend.cache_saldos import cache_saldos
+from Backend.perfil_gas import perfil_gas
+from Backend.geracao_chain import geracao_chain
+from Backend.rastreador_recibos import rastreador_recibos, status_do_recibo, TX_AGUARDAR_CONFIRMACAO, \
+    TX_TIMEOUT_CONFIRMACAO
+from Backend.utils import sign_n_send, enviar_transacao, ReciboNaoConfirmado, get_eth_to_brl, getGanacheAccount, \
+    releaseGanacheAccount, calcular_projecao
 
 load_dotenv()
 
@@ -76,9 +94,39 @@ class Transacao(db.Model):
         return f'<Transacao {self.id}: R${self.valor_pagamento} para {self.beneficiado}>'
 
 
-api_cache = {}
-api_locks = {}
-CACHE_DURATION = 2  # segundos
+# Histórico de cotações: toda cotação obtida das APIs é gravada em lote na tabela cotacoes
+with app.app_context():
+    gravador_cotacoes.configurar(db.engine)
+    motor_ohlc.configurar(db.engine)
+    rastreador_recibos.configurar(db.engine)
+    resolucao_clientes.configurar(db.engine)
+    indexador_eventos.configurar(db.engine)
+cotacao_cache.registrar_ouvinte(gravador_cotacoes.registrar)
+
+
+@app.before_request
+def conferir_geracao_chain():
+    # Reset com snapshot (em outro processo) invalida os caches da chain deste worker
+    geracao_chain.conferir()
+
+
+def dados_do_cliente(leitura_dados, carteira):
+    """
+    Resultado de mostraInfoCliente, ou None se o cliente não existe mais no contrato.
+
+    A carteira pode ter vindo do cache de resolução depois de o cliente ser
+    removido por outro processo: o revert de mostraInfoCliente (ou a carteira
+    zerada) conta como cliente inexistente e a resolução é descartada.
+    """
+    try:
+        dados = leitura_dados.resultado()
+    except ContractLogicError:
+        dados = None
+    if dados is None or dados[0] == "0x0000000000000000000000000000000000000000":
+        resolucao_clientes.invalidar_carteira(carteira)
+        return None
+    return dados
+
 
 @app.route('/')
 def run():
@@ -151,7 +199,7 @@ def registro_cliente():
         if not senha or len(senha) < 6:
             return jsonify({"erro": "Senha deve ter pelo menos 6 caracteres"}), 400
 
-        # Verificar se já existe no blockchain
+        # Verificar se já existe no blockchain (direto no contrato: o cache pode ter um cliente já removido)
         try:
             endereco_existente = sistema_cliente.functions.getEnderecoPorPix(referenciaPix).call()
             if endereco_existente != "0x0000000000000000000000000000000000000000":
@@ -170,30 +218,40 @@ def registro_cliente():
 
         # Obter conta do Ganache
         userAddress, privateKeyUser = getGanacheAccount()
+        if not userAddress:
+            return jsonify({"erro": "Nenhuma conta disponível para novos clientes"}), 503
 
-        # Construir transação com gas otimizado
+        # Construir transação com gas otimizado (nonce atribuído no envio)
         try:
-            transaction = sistema_cliente.functions.registrarCliente(
-                nome, referenciaPix, email, senha
-            ).build_transaction({
-                "from": userAddress,
-                "nonce": w3.eth.get_transaction_count(userAddress),
-                "gasPrice": w3.eth.gas_price,
-                "gas": 800000,  # Gas aumentado para registro
-                "chainId": w3.eth.chain_id,
-            })
+            funcao_registro = sistema_cliente.functions.registrarCliente(nome, referenciaPix, email, senha)
+            parametros_tx = parametros_rede.parametros_tx(
+                userAddress,
+                # Estimativa em cache por forma dos argumentos; 800000 se o nó não conseguir estimar
+                gas=perfil_gas.estimar(funcao_registro, userAddress, padrao=800000),
+            )
+            transaction = lambda nonce: funcao_registro.build_transaction({**parametros_tx, "nonce": nonce})
         except ValueError as e:
+            releaseGanacheAccount(userAddress)
             if "revert" in str(e).lower():
                 return jsonify({"erro": "Dados inválidos para registro no blockchain"}), 400
             else:
                 return jsonify({"erro": f"Erro ao construir transação: {str(e)}"}), 500
         except Exception as e:
+            releaseGanacheAccount(userAddress)
             return jsonify({"erro": f"Erro inesperado: {str(e)}"}), 500
 
         # Enviar transação
         try:
             receipt = sign_n_send(transaction, privateKeyUser)
+            tx_registro, status_registro = receipt["transactionHash"], status_do_recibo(receipt)
+        except ReciboNaoConfirmado as e:
+            # Já está no nó: o cliente é salvo e o registro no contrato é minerado em seguida
+            tx_registro, status_registro = e.tx_hash, "PENDENTE"
         except ValueError as e:
+            # Rejeitada pelo nó (ou revert na montagem): nada foi minerado, a conta volta para a lista de livres
+            releaseGanacheAccount(userAddress)
+            if "revert" in str(e).lower():
+                return jsonify({"erro": "Dados inválidos para registro no blockchain"}), 400
             return jsonify({"erro": f"Transação rejeitada: {str(e)}"}), 400
         except Exception as e:
             return jsonify({"erro": f"Erro ao enviar transação: {str(e)}"}), 500
@@ -213,6 +271,9 @@ def registro_cliente():
             db.session.add(newClient)
             db.session.commit()
 
+            if status_registro == "CONFIRMADA":
+                resolucao_clientes.registrar(referenciaPix, email, userAddress)
+
             # Salva na sessão para já estar logado
             session['email'] = newClient.email
             session['carteira'] = newClient.carteira
@@ -221,7 +282,8 @@ def registro_cliente():
                 "status": "Usuário registrado com sucesso!",
                 "carteira": userAddress,
                 "saldo_inicial_eth": float(w3.from_wei(w3.eth.get_balance(userAddress), 'ether')),
-                "tx_registro": receipt["transactionHash"].hex(),
+                "tx_registro": tx_registro.hex(),
+                "status_registro": status_registro,
                 "referenciaPix": referenciaPix,
                 "nome": nome,
                 "email": email
@@ -299,16 +361,19 @@ def mostraInfoCliente():
         if not referencia_pix:
             return jsonify({"erro": "Parâmetro 'referenciaPix' é obrigatório!"}), 400
 
-        # Buscar o endereço associado à referência Pix
-        endereco = sistema_cliente.functions.getEnderecoPorPix(referencia_pix).call()
+        # Endereço (do cache de resolução, se houver) e informações do cliente numa única ida ao nó
+        lote = leitor_blockchain.lote()
+        leitura_endereco, = resolucao_clientes.ler_pix(lote, referencia_pix)
+        leitura_dados = lote.chamar(sistema_cliente.functions.mostraInfoCliente(referencia_pix))
+        lote.executar()
 
+        endereco = leitura_endereco.resultado()
         if not w3.is_address(endereco) or endereco == "0x0000000000000000000000000000000000000000":
             return jsonify({"erro": "Nenhum cliente encontrado para essa referenciaPix"}), 404
 
-        endereco = w3.to_checksum_address(endereco)
-
-        # Chama o contrato para pegar as informações
-        dados = sistema_cliente.functions.mostraInfoCliente(referencia_pix).call()
+        dados = dados_do_cliente(leitura_dados, endereco)
+        if dados is None:
+            return jsonify({"erro": "Nenhum cliente encontrado para essa referenciaPix"}), 404
         carteiraContrato, nome, saldo_eth_wei, registrado, referenciaPix, email = dados
 
         return jsonify({
@@ -356,11 +421,9 @@ def getName():
                 return jsonify({"erro": "Cliente não encontrado"}), 404
 
             try:
-                endereco = sistema_cliente.functions.getEnderecoPorPix(referencia_pix).call()
-                if endereco != "0x0000000000000000000000000000000000000000":
-                    nome_contrato = sistema_cliente.functions.getNomeCliente(endereco).call()
-                else:
-                    nome_contrato = None
+                # Uma chamada em vez de getEnderecoPorPix + getNomeCliente (revert se o Pix não existir)
+                _, nome, _, registrado, _, _ = sistema_cliente.functions.mostraInfoCliente(referencia_pix).call()
+                nome_contrato = nome if registrado else None
             except Exception as e:
                 nome_contrato = None
                 print(f"Erro ao buscar nome no contrato: {e}")
@@ -426,7 +489,8 @@ def getBalance():
 
         try:
             address = w3.to_checksum_address(cliente.carteira)
-            saldo_wei = w3.eth.get_balance(address)
+            # Mesmo bloco da última consulta: saldo do cache, sem ir ao nó
+            saldo_wei = cache_saldos.saldo(address)
             saldo_eth = w3.from_wei(saldo_wei, "ether")
             cotacao_eth_brl = get_eth_to_brl()
             print(f"🔍 Cotação obtida: R$ {cotacao_eth_brl:,.2f}")
@@ -483,9 +547,15 @@ def transferirEntreUsers():
         if referencia_origem == referencia_destino:
             return jsonify({"erro": "Não é possível transferir para si mesmo"}), 400
 
+        # Endereços (cache de resolução) e saldo da origem numa única ida ao nó:
+        # mostraInfoCliente devolve o saldo real da carteira junto com os dados do cliente
         try:
-            endereco_origem = sistema_cliente.functions.getEnderecoPorPix(referencia_origem).call()
-            endereco_destino = sistema_cliente.functions.getEnderecoPorPix(referencia_destino).call()
+            lote = leitor_blockchain.lote()
+            leitura_origem, leitura_destino = resolucao_clientes.ler_pix(lote, referencia_origem, referencia_destino)
+            leitura_info_origem = lote.chamar(sistema_cliente.functions.mostraInfoCliente(referencia_origem))
+            lote.executar()
+            endereco_origem = leitura_origem.resultado()
+            endereco_destino = leitura_destino.resultado()
         except Exception as e:
             return jsonify({"erro": f"Erro ao buscar endereços: {str(e)}"}), 500
 
@@ -493,15 +563,37 @@ def transferirEntreUsers():
             return jsonify({"erro": "Usuário de origem não registrado"}), 400
         if not w3.is_address(endereco_destino) or endereco_destino == "0x0000000000000000000000000000000000000000":
             return jsonify({"erro": "Usuário de destino não registrado"}), 400
+        try:
+            info_origem = dados_do_cliente(leitura_info_origem, endereco_origem)
+        except Exception as e:
+            return jsonify({"erro": f"Erro ao buscar endereços: {str(e)}"}), 500
+        if info_origem is None:
+            return jsonify({"erro": "Usuário de origem não registrado"}), 400
 
         cliente_origem = Cliente.query.filter_by(referenciaPix=referencia_origem).first()
         if not cliente_origem:
             return jsonify({"erro": "Cliente origem não encontrado no banco de dados"}), 400
 
+        if tipo_transferencia == 'Padrão':
+            funcao_transferencia = etherFlow.functions.transferirETHDireto(
+                referencia_origem,
+                w3.to_checksum_address(endereco_destino)
+            )
+            gas_padrao = 400000
+        elif tipo_transferencia == 'Solidária':
+            funcao_transferencia = etherFlow.functions.transferenciaSemTaxas(
+                referencia_origem,
+                w3.to_checksum_address(endereco_destino)
+            )
+            gas_padrao = 300000
+        else:
+            return jsonify({"erro": "Tipo de transferência inválido. Use: 'Padrão' ou 'Solidária'"}), 400
+
         try:
-            saldo_origem = w3.eth.get_balance(endereco_origem)
-            gas_estimate = 300000
-            gas_cost = gas_estimate * w3.eth.gas_price
+            saldo_origem = info_origem[2]
+            # Gas real da função (cache); o limite fixo só vale se o nó não conseguir estimar
+            gas_transferencia = perfil_gas.estimar(funcao_transferencia, endereco_origem, valor_wei, padrao=gas_padrao)
+            gas_cost = perfil_gas.custo_maximo(gas_transferencia)
             total_necessario = valor_wei + gas_cost
 
             if saldo_origem < total_necessario:
@@ -516,31 +608,13 @@ def transferirEntreUsers():
             return jsonify({"erro": f"Erro ao verificar saldo: {str(e)}"}), 500
 
         try:
-            nonce = w3.eth.get_transaction_count(endereco_origem)
-            if tipo_transferencia == 'Padrão':
-                transaction = etherFlow.functions.transferirETHDireto(
-                    referencia_origem,
-                    w3.to_checksum_address(endereco_destino)
-                ).build_transaction({
-                    "from": endereco_origem,
-                    "nonce": nonce,
-                    "gasPrice": w3.eth.gas_price,
-                    "value": valor_wei,
-                    "gas": 400000
-                })
-            elif tipo_transferencia == 'Solidária':
-                transaction = etherFlow.functions.transferenciaSemTaxas(
-                    referencia_origem,
-                    w3.to_checksum_address(endereco_destino)
-                ).build_transaction({
-                    "from": endereco_origem,
-                    "nonce": nonce,
-                    "gasPrice": w3.eth.gas_price,
-                    "value": valor_wei,
-                    "gas": 300000
-                })
-            else:
-                return jsonify({"erro": "Tipo de transferência inválido. Use: 'Padrão' ou 'Solidária'"}), 400
+            parametros_tx = parametros_rede.parametros_tx(
+                endereco_origem,
+                value=valor_wei,
+                gas=gas_transferencia
+            )
+            # Nonce atribuído no envio pelo GerenciadorNonce
+            transaction = lambda nonce: funcao_transferencia.build_transaction({**parametros_tx, "nonce": nonce})
         except ValueError as e:
             if "revert" in str(e).lower():
                 return jsonify({
@@ -554,21 +628,50 @@ def transferirEntreUsers():
             return jsonify({"erro": f"Erro inesperado: {str(e)}"}), 500
 
         try:
-            receipt = sign_n_send(transaction, cliente_origem.private_key)
+            tx_hash, nonce_usado = enviar_transacao(transaction, cliente_origem.private_key)
+            cache_saldos.invalidar(endereco_origem, endereco_destino)
         except ValueError as e:
+            # A estimativa em cache pode não servir mais: a próxima tentativa estima de novo
+            perfil_gas.esquecer(funcao_transferencia, endereco_origem, valor_wei)
+            # A montagem acontece no envio (com o nonce): revert do contrato aparece aqui
+            if "revert" in str(e).lower():
+                return jsonify({
+                    "erro": "Transação rejeitada pelo contrato",
+                    "detalhes": "Verifique se os usuários estão registrados e os dados estão corretos",
+                    "erro_tecnico": str(e)
+                }), 400
             return jsonify({"erro": f"Transação rejeitada pela blockchain: {str(e)}"}), 400
         except Exception as e:
             return jsonify({"erro": f"Erro ao enviar transação: {str(e)}"}), 500
 
-        try:
-            eth_brl = get_eth_to_brl() if 'get_eth_to_brl' in globals() else 1.0
-            valor_reais = valor_eth * eth_brl
+        eth_brl = get_eth_to_brl() if 'get_eth_to_brl' in globals() else 1.0
+        valor_reais = valor_eth * eth_brl
+
+        # Gravada como PENDENTE; o rastreador de recibos confirma em background
+        rastreador_recibos.registrar(
+            tx_hash, "TRANSFERENCIA", valor_wei, valor_eth, round(valor_reais, 2),
+            cliente_id=cliente_origem.id, referencia_pix=referencia_destino,
+            gas_price_wei=parametros_tx["gasPrice"], nonce=nonce_usado,
+            observacoes=f"Transferência {tipo_transferencia} de {referencia_origem}: {descricao}"
+        )
+        receipt = None
+        if data.get("aguardarConfirmacao", TX_AGUARDAR_CONFIRMACAO):
+            try:
+                receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_TIMEOUT_CONFIRMACAO)
+                rastreador_recibos.confirmar(tx_hash, receipt)
+            except TimeExhausted:
+                print(f"⚠️ Transferência {tx_hash.hex()} ainda pendente após {TX_TIMEOUT_CONFIRMACAO}s")
+        status_transacao = status_do_recibo(receipt) if receipt is not None else "PENDENTE"
+        if status_transacao == "FALHADA":
+            # Falhou com o gas da estimativa (ex.: sem gas): não reaproveita o valor
+            perfil_gas.esquecer(funcao_transferencia, endereco_origem, valor_wei)
 
+        try:
             transacao_saida = Transacao(
                 valor_pagamento=valor_reais,
                 descricao=f"Transferência {tipo_transferencia} para {referencia_destino}: {descricao}",
                 beneficiado=f"Usuário {referencia_destino}",
-                hash_transacao=receipt["transactionHash"].hex(),
+                hash_transacao=tx_hash.hex(),
                 cliente_id=cliente_origem.id,
                 tipo_transacao="SAIDA"
             )
@@ -580,7 +683,7 @@ def transferirEntreUsers():
                     valor_pagamento=valor_reais,
                     descricao=f"Recebido {tipo_transferencia} de {referencia_origem}: {descricao}",
                     beneficiado=f"Usuário {referencia_origem}",
-                    hash_transacao=receipt["transactionHash"].hex(),
+                    hash_transacao=tx_hash.hex(),
                     cliente_id=cliente_destino.id,
                     tipo_transacao="ENTRADA"
                 )
@@ -593,24 +696,28 @@ def transferirEntreUsers():
             print(f"❌ Erro ao registrar no BD: {str(e)}")
 
         receipt_data = {
-            "hash_transacao": receipt["transactionHash"].hex(),
+            "hash_transacao": tx_hash.hex(),
             "valor_eth": valor_eth,
+            "valor_wei": int(valor_wei),
             "valor_reais": round(valor_reais, 2),
             "de": referencia_origem,
             "para": referencia_destino,
             "tipo_transferencia": tipo_transferencia,
             "descricao": descricao
         }
-        qr_base64, qr_path = gerar_qr_comprovante(receipt_data, receipt["transactionHash"].hex())
+        # QR do comprovante na resposta (inline) ou só a URL, gerado depois (ver QR_COMPROVANTE_MODO)
+        comprovante = publicar_comprovante(receipt_data, tx_hash.hex())
 
         return jsonify({
-            "status": "sucesso",
+            "status": "sucesso" if receipt is not None else "pendente",
+            "status_transacao": status_transacao,
+            "status_url": f"/statusTransacao/{tx_hash.to_0x_hex()}",
             "tipo_transferencia": tipo_transferencia,
             "valor_reais": round(valor_reais, 2),
             "valor_eth": valor_eth,
             "valor_wei": int(valor_wei),
-            "transaction_hash": receipt["transactionHash"].hex(),
-            "gas_usado": receipt.get("gasUsed", 0),
+            "transaction_hash": tx_hash.hex(),
+            "gas_usado": receipt.get("gasUsed", 0) if receipt is not None else None,
             "descricao": descricao,
             "beneficiado": f"Usuário {referencia_destino}",
             "origem": {
@@ -621,15 +728,128 @@ def transferirEntreUsers():
                 "referencia": referencia_destino,
                 "endereco": endereco_destino
             },
-            "qr_comprovante": qr_base64,
-            "qr_path": qr_path
-        })
+            **comprovante
+        }), 200 if receipt is not None else 202
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"erro": "Erro interno em /transferirEntreUsers", "detalhes": str(e)}), 500
 
 
+@app.route("/statusTransacao/<tx_hash>", methods=["GET"])
+def statusTransacao(tx_hash):
+    """
+        Retorna o status de uma transação enviada (PENDENTE, CONFIRMADA ou FALHADA).
+
+        Transferências e doações enviadas com ``aguardarConfirmacao: false`` (ou com
+        TX_AGUARDAR_CONFIRMACAO=0), ou que não confirmaram dentro do prazo, respondem 202;
+        o rastreador de recibos atualiza o status em background.
+
+        Args:
+            tx_hash (str): Hash da transação, passado na URL.
+
+        Returns:
+            flask.Response: JSON com status_transacao, block_number e gas_usado.
+            Erros:
+                400: Hash inválido.
+                404: Transação não encontrada.
+                500: Erro interno.
+        """
+    try:
+        try:
+            status = rastreador_recibos.status(tx_hash)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        if status is None:
+            return jsonify({"erro": "Transação não encontrada"}), 404
+        return jsonify(status), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /statusTransacao", "detalhes": str(e)}), 500
+
+
+@app.route("/comprovante/<tx_hash>.png", methods=["GET"])
+def comprovanteQR(tx_hash):
+    """
+        Retorna o QR code do comprovante de uma transferência.
+
+        A imagem vem do cache em disco ou é gerada na hora (nos modos lazy e
+        background de QR_COMPROVANTE_MODO, ainda não foi gerada). Comprovantes não
+        mudam, então a resposta pode ser guardada pelo cliente indefinidamente.
+
+        Args:
+            tx_hash (str): Hash da transação, passado na URL.
+
+        Returns:
+            flask.Response: Imagem PNG do QR code.
+            304: Imagem do cliente ainda é válida (If-None-Match).
+            Erros:
+                400: Hash inválido.
+                404: Comprovante não encontrado.
+                500: Erro interno.
+        """
+    try:
+        try:
+            dados = registro_comprovantes.obter(tx_hash)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        if dados is None:
+            return jsonify({"erro": "Comprovante não encontrado"}), 404
+
+        etag = etag_comprovante(dados)
+        if etag in request.if_none_match:
+            resposta = Response(status=304)
+        else:
+            resposta = Response(png_comprovante(dados), mimetype="image/png")
+        resposta.set_etag(etag)
+        resposta.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return resposta
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /comprovante", "detalhes": str(e)}), 500
+
+
+@app.route("/verificarComprovante", methods=["POST"])
+def verificarComprovante():
+    """
+        Decodifica e verifica o conteúdo lido do QR code de um comprovante.
+
+        Confere a versão e a assinatura do formato compacto ("C2R:...") e, se o
+        backend tiver os dados completos da transferência, devolve-os junto.
+
+        Args:
+            JSON (dict): Body da requisição contendo:
+                - comprovante (str): Texto lido do QR code.
+
+        Returns:
+            flask.Response: JSON contendo:
+                - valido (bool): Sempre True em respostas 200.
+                - comprovante (dict): hash_transacao, tipo_transferencia, valor_wei, valor_eth, valor_reais.
+                - detalhes (dict | None): Dados completos do comprovante (de, para, descrição...).
+            Erros:
+                400: Comprovante inválido ou assinatura que não confere.
+                500: Erro interno.
+                503: COMPROVANTE_SEGREDO não configurado no servidor.
+        """
+    try:
+        dados = request.get_json(silent=True) or {}
+        try:
+            comprovante = decodificar_comprovante(dados.get("comprovante"))
+        except ComprovanteInvalido as e:
+            return jsonify({"valido": False, "erro": str(e)}), 400
+        except SegredoNaoConfigurado as e:
+            return jsonify({"erro": "Verificação de comprovantes indisponível", "detalhes": str(e)}), 503
+
+        return jsonify({
+            "valido": True,
+            "comprovante": comprovante.para_dict(),
+            "detalhes": registro_comprovantes.obter(comprovante.hash_transacao)
+        }), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /verificarComprovante", "detalhes": str(e)}), 500
+
+
 @app.route("/getTransacoesCliente", methods=["GET"])
 def getTransacoesCliente():
     """
@@ -689,22 +909,11 @@ def getTransacoesCliente():
         traceback.print_exc()
         return jsonify({"erro": "Erro interno em /getTransacoesCliente", "detalhes": str(e)}), 500
 
-# === Bloco de configuração inicial do contrato (doação / conta ONG) com proteção ===
-try:
-    tx = etherFlow.functions.setContaOng(ongWallet).build_transaction({
-        "from": admWallet,
-        "nonce": w3.eth.get_transaction_count(admWallet),
-        "gas": 100000,
-        "gasPrice": w3.eth.gas_price
-    })
-
-    signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-    conta_ong = etherFlow.functions.contaOng().call()
-    print("Endereço da ONG configurado:", conta_ong)
-except Exception as e:
-    print("⚠️ Falha ao configurar conta ONG (ignorado):", str(e))
-    traceback.print_exc()
+# === Configuração inicial do contrato (doação / conta ONG) ===
+# Feita uma vez por deploy (gunicorn.conf.py) ou no primeiro uso em /donate.
+# BOOTSTRAP_NA_IMPORTACAO=1 mantém o comportamento antigo de configurar ao importar.
+if os.getenv("BOOTSTRAP_NA_IMPORTACAO") == "1":
+    garantir_conta_ong()
 
 
 @app.route("/donate", methods=["POST"])
@@ -716,10 +925,11 @@ def donate():
             JSON (dict): Body da requisição contendo:
                 - valorReais (float): Valor em BRL.
                 - referenciaPix (str): Chave Pix do cliente.
+                - aguardarConfirmacao (bool, opcional): Espera o recibo antes de responder.
 
         Returns:
             flask.Response: JSON contendo:
-                - status (str).
+                - status (str), status_transacao (str) e status_url (str).
                 - valor_wei (int), valor_eth (str), valor_brl (float).
                 - cotacao (str).
                 - transaction_hash (str).
@@ -750,7 +960,7 @@ def donate():
             return jsonify({"erro": "valorReais deve ser um número"}), 400
 
         try:
-            endereco_cliente = sistema_cliente.functions.getEnderecoPorPix(referencia_pix).call()
+            endereco_cliente = resolucao_clientes.endereco_por_pix(referencia_pix)
             if not w3.is_address(endereco_cliente) or endereco_cliente == "0x0000000000000000000000000000000000000000":
                 return jsonify({"erro": "Cliente não registrado com essa referência Pix"}), 400
 
@@ -760,27 +970,42 @@ def donate():
 
             private_key_cliente = cliente_db.private_key
 
+            if not garantir_conta_ong():
+                return jsonify({"erro": "Conta da ONG não configurada no contrato"}), 500
+
             valor_eth = valor_reais
             valor_wei = w3.to_wei(valor_eth, 'ether')
 
-            nonce = w3.eth.get_transaction_count(endereco_cliente)
-            tx = etherFlow.functions.doacaoDireta().build_transaction({
-                "from": endereco_cliente,
-                "value": int(valor_wei),
-                "nonce": nonce,
-                "gas": 300000,
-                "gasPrice": w3.eth.gas_price,
-                "chainId": w3.eth.chain_id
-            })
-
-            signed_tx = sign_n_send(tx, private_key_cliente)
+            funcao_doacao = etherFlow.functions.doacaoDireta()
+            parametros_tx = parametros_rede.parametros_tx(
+                endereco_cliente,
+                value=int(valor_wei),
+                gas=perfil_gas.estimar(funcao_doacao, endereco_cliente, valor_wei, padrao=300000)
+            )
+            # Nonce atribuído no envio pelo GerenciadorNonce
+            tx = lambda nonce: funcao_doacao.build_transaction({**parametros_tx, "nonce": nonce})
+
+            tx_hash, nonce_usado = enviar_transacao(tx, private_key_cliente)
+            cache_saldos.invalidar(endereco_cliente)
+            rastreador_recibos.registrar(
+                tx_hash, "PAGAMENTO", valor_wei, valor_eth, round(valor_reais, 2),
+                cliente_id=cliente_db.id, referencia_pix=referencia_pix,
+                gas_price_wei=parametros_tx["gasPrice"], nonce=nonce_usado, observacoes="Doação para ONG"
+            )
+            receipt = None
+            if data.get("aguardarConfirmacao", TX_AGUARDAR_CONFIRMACAO):
+                try:
+                    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_TIMEOUT_CONFIRMACAO)
+                    rastreador_recibos.confirmar(tx_hash, receipt)
+                except TimeExhausted:
+                    print(f"⚠️ Doação {tx_hash.hex()} ainda pendente após {TX_TIMEOUT_CONFIRMACAO}s")
 
             try:
                 nova_transacao = Transacao(
                     valor_pagamento=valor_reais,
                     descricao="Doação para ONG",
                     beneficiado="ONG",
-                    hash_transacao=signed_tx["transactionHash"].hex(),
+                    hash_transacao=tx_hash.hex(),
                     cliente_id=cliente_db.id
                 )
                 db.session.add(nova_transacao)
@@ -792,19 +1017,23 @@ def donate():
             endereco_ong = etherFlow.functions.contaOng().call()
 
             return jsonify({
-                "status": "Doação realizada com sucesso!",
+                "status": "Doação realizada com sucesso!" if receipt is not None else "Doação enviada",
+                "status_transacao": status_do_recibo(receipt) if receipt is not None else "PENDENTE",
+                "status_url": f"/statusTransacao/{tx_hash.to_0x_hex()}",
                 "valor_wei": int(valor_wei),
                 "valor_eth": str(valor_eth),
                 "valor_brl": round(valor_reais, 2),
                 "cotacao": "1 ETH = 1 BRL (fixo)",
-                "transaction_hash": signed_tx["transactionHash"].hex(),
-                "gas_usado": signed_tx.get("gasUsed", "N/A"),
+                "transaction_hash": tx_hash.hex(),
+                "gas_usado": receipt.get("gasUsed", "N/A") if receipt is not None else "N/A",
                 "endereco_doador": endereco_cliente,
                 "endereco_ong": endereco_ong
-            })
+            }), 200 if receipt is not None else 202
 
         except Exception as e:
             traceback.print_exc()
+            # Pode ser a ONG desconfigurada (chain reiniciada): a próxima doação confere o contrato
+            esquecer_conta_ong()
             return jsonify({"erro": f"Erro ao processar a doação: {str(e)}"}), 500
 
     except Exception as e:
@@ -816,50 +1045,107 @@ def donate():
 @app.route("/ethereum_brl_mensal", methods=["GET"])
 def ethereum_brl_mensal():
     """
-        Retorna um gráfico da cotação ETH em BRL de Janeiro a Setembro de 2025.
+        Retorna um gráfico mensal da cotação ETH em BRL.
+
+        Usa o fechamento mensal do histórico gravado na tabela cotacoes; enquanto
+        não houver histórico, mostra a série de referência de Janeiro a Setembro de 2025.
+        A imagem fica em cache pelo hash da série e dos parâmetros, e a resposta
+        traz ETag/Cache-Control para o cliente revalidar com If-None-Match (304).
 
         Args:
-            Nenhum.
+            meses (int, opcional): Quantidade de meses exibidos (1 a 120, padrão 9).
+            largura (float, opcional): Largura da figura em polegadas (2 a 20, padrão 9).
+            altura (float, opcional): Altura da figura em polegadas (2 a 20, padrão 5).
 
         Returns:
             flask.Response: Imagem PNG do gráfico.
+            304: Imagem do cliente ainda é válida (If-None-Match).
             Erros:
+                400: Parâmetro inválido.
                 500: Erro interno ao gerar gráfico.
+                503: Fila de renderização cheia (tente novamente).
+                504: Renderização excedeu o tempo limite.
         """
 
     try:
-        meses = [
-            "Jan", "Fev", "Mar", "Abr", "Mai", "Jun",
-            "Jul", "Ago", "Set"
-        ]
-        valores_brl = [
-            3298.26 * 5.5, 2237.90 * 5.5, 1823.48 * 5.5, 1793.78 * 5.5,
-            2529.09 * 5.5, 2486.46 * 5.5, 3696.71 * 5.5, 4497.18 * 5.5,
-            4590.00 * 5.5
-        ]
-
         try:
-            plt.figure(figsize=(9, 5))
-            plt.plot(meses, valores_brl, marker="o", color="blue", linewidth=2)
-            plt.title("Ethereum (ETH) em BRL - Janeiro a Setembro 2025", fontsize=14)
-            plt.xlabel("Mês")
-            plt.ylabel("Preço (R$)")
-            plt.grid(True)
-
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format="png", bbox_inches="tight")
-            buffer.seek(0)
-            plt.close()
-
-            return Response(buffer.getvalue(), mimetype="image/png")
-        except Exception as e:
-            traceback.print_exc()
-            return jsonify({"erro": f"Erro ao gerar gráfico: {str(e)}"}), 500
+            meses_exibidos = int(request.args.get("meses", 9))
+            largura = float(request.args.get("largura", 9))
+            altura = float(request.args.get("altura", 5))
+        except ValueError:
+            return jsonify({"erro": "Parâmetros 'meses', 'largura' e 'altura' devem ser numéricos"}), 400
+        if not 1 <= meses_exibidos <= 120 or not 2 <= largura <= 20 or not 2 <= altura <= 20:
+            return jsonify({"erro": "Parâmetros fora do intervalo permitido"}), 400
+
+        meses, valores_brl, titulo = serie_mensal(meses_exibidos)
+        etag = chave_grafico(meses, valores_brl, titulo, largura, altura)
+        cache_control = f"public, max-age={GRAFICO_MAX_AGE}, must-revalidate"
+
+        if etag in request.if_none_match:
+            resposta = Response(status=304)
+        else:
+            try:
+                imagem = cache_graficos.obter_ou_renderizar(
+                    etag, lambda: renderizar_grafico_linha(meses, valores_brl, titulo, largura, altura)
+                )
+            except GraficoOcupado:
+                return jsonify({"erro": "Servidor de gráficos ocupado, tente novamente"}), 503, {"Retry-After": "2"}
+            except TimeoutError:
+                return jsonify({"erro": "Tempo esgotado ao gerar gráfico"}), 504
+            except Exception as e:
+                traceback.print_exc()
+                return jsonify({"erro": f"Erro ao gerar gráfico: {str(e)}"}), 500
+            resposta = Response(imagem, mimetype="image/png")
+
+        resposta.set_etag(etag)
+        resposta.headers["Cache-Control"] = cache_control
+        return resposta
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"erro": "Erro interno em /ethereum_brl_mensal", "detalhes": str(e)}), 500
 
+
+@app.route("/historicoCotacao", methods=["GET"])
+def historicoCotacao():
+    """
+        Retorna candles OHLC da cotação ETH/BRL a partir do histórico gravado.
+
+        Args:
+            inicio (str, opcional): Data/hora ISO8601 (UTC) inicial, inclusiva.
+            fim (str, opcional): Data/hora ISO8601 (UTC) final, exclusiva.
+            intervalo (str, opcional): "hora", "dia" (padrão) ou "mes".
+
+        Returns:
+            flask.Response: JSON contendo:
+                - intervalo (str).
+                - total (int): Quantidade de candles.
+                - candles (list[dict]): inicio, abertura, maxima, minima, fechamento, amostras.
+            Erros:
+                400: Parâmetro inválido.
+                500: Erro interno.
+        """
+    try:
+        intervalo = request.args.get("intervalo", "dia")
+        if intervalo not in INTERVALOS:
+            return jsonify({"erro": f"Intervalo inválido. Use: {', '.join(INTERVALOS)}"}), 400
+
+        try:
+            inicio = converter_data_utc(request.args.get("inicio"))
+            fim = converter_data_utc(request.args.get("fim"))
+        except ValueError:
+            return jsonify({"erro": "Parâmetros 'inicio' e 'fim' devem estar no formato ISO8601"}), 400
+
+        candles = motor_ohlc.candles(inicio, fim, intervalo).para_lista()
+        return jsonify({
+            "intervalo": intervalo,
+            "total": len(candles),
+            "candles": candles
+        }), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /historicoCotacao", "detalhes": str(e)}), 500
+
 @app.route("/currentETH", methods=["GET"])
 def getCurrentETH():
     """
@@ -867,17 +1153,19 @@ def getCurrentETH():
     Returns:
         flask.Response: JSON com:
             - ethereum_brl (float): Cotação atual
-            - fonte (str): Fonte dos dados
+            - fonte (str): Fonte que forneceu a cotação (ou "fallback_value")
+            - latencias_ms (dict): Latência de cada fonte consultada
             - timestamp (str): Timestamp da consulta
         Erros:
             Nunca retorna erro - sempre retorna um valor válido
     """
     try:
         try:
-            price = get_eth_to_brl()
+            cotacao = cotacao_cache.obter_detalhado()
             return jsonify({
-                "ethereum_brl": price,
-                "fonte": "coingecko_api" if price > 1000 else "fallback_value",
+                "ethereum_brl": cotacao["valor"],
+                "fonte": cotacao["fonte"],
+                "latencias_ms": cotacao["latencias_ms"],
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "status": "sucesso"
             }), 200
@@ -896,6 +1184,73 @@ def getCurrentETH():
         return jsonify({"erro": "Erro interno em /currentETH", "detalhes": str(e)}), 500
 
 
+@app.route("/statusCotacao", methods=["GET"])
+def statusCotacao():
+    """
+    Retorna o estado do cache de cotação e dos circuit breakers de cada fonte (monitoramento).
+
+    Returns:
+        flask.Response: JSON com:
+            - cotacao (dict): Valor em cache, fonte, latências e idade em segundos.
+            - fontes (list[dict]): Estado do circuito de cada fonte
+              (FECHADO, ABERTO ou MEIO_ABERTO) e contadores de sucesso/falha.
+        Erros:
+            500: Erro interno.
+    """
+    try:
+        return jsonify({
+            "cotacao": cotacao_cache.obter_detalhado(),
+            "fontes": estado_fontes(),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /statusCotacao", "detalhes": str(e)}), 500
+
+
+@app.route("/gerarQRComerciantes", methods=["POST"])
+def gerarQRComerciantes():
+    """
+        Gera em lote os QR codes de registro (degradê) e da chave de vários comerciantes.
+
+        Os QR codes são renderizados em paralelo num pool de processos e enviados
+        num ZIP em streaming, conforme ficam prontos. Cada comerciante ganha uma
+        pasta ``<indice>_<nome>`` com registro_degrade.png e comerciante_chave.png;
+        o manifesto.json no fim do ZIP lista os arquivos ou o erro de cada um.
+
+        Args:
+            JSON (dict): Body da requisição contendo:
+                - comerciantes (list[dict]): Itens com url_registro (str), chave (str) e nome (str, opcional).
+                - box_size (int, opcional): Tamanho do módulo do QR de registro (1 a 40, padrão 10).
+
+        Returns:
+            flask.Response: Arquivo ZIP (application/zip).
+            Erros:
+                400: Parâmetro inválido.
+                500: Erro interno.
+                503: Geração em lote ocupada (tente novamente).
+        """
+    try:
+        dados = request.get_json(silent=True) or {}
+        box_size = dados.get("box_size", 10)
+        if not isinstance(box_size, int) or not 1 <= box_size <= 40:
+            return jsonify({"erro": "Parâmetro 'box_size' deve ser inteiro entre 1 e 40"}), 400
+
+        try:
+            lote = gerador_lote_qr.iniciar(dados.get("comerciantes"), box_size)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        except LoteOcupado:
+            return jsonify({"erro": "Geração de QR codes ocupada, tente novamente"}), 503, {"Retry-After": "5"}
+
+        return Response(lote, mimetype="application/zip", headers={
+            "Content-Disposition": "attachment; filename=qrcodes_comerciantes.zip"
+        })
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"erro": "Erro interno em /gerarQRComerciantes", "detalhes": str(e)}), 500
+
+
 @app.route('/calcular_projecao', methods=['POST'])
 def projectionCalculate():
     """
@@ -948,7 +1303,8 @@ def getUserData():
 
         try:
             address = w3.to_checksum_address(cliente.carteira)
-            saldo_wei = w3.eth.get_balance(address)
+            # Mesmo bloco da última consulta: saldo do cache, sem ir ao nó
+            saldo_wei = cache_saldos.saldo(address)
             saldo_eth = w3.from_wei(saldo_wei, "ether")
             cotacao_eth_brl = get_eth_to_brl()
             saldo_brl = float(saldo_eth) * cotacao_eth_brl
@@ -981,5 +1337,6 @@ def getUserData():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+    garantir_conta_ong()
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
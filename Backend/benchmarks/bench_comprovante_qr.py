@@ -0,0 +1,65 @@
+"""
+Benchmark do QR code do comprovante: conteúdo JSON x formato compacto (base45).
+
+Mede tamanho do conteúdo, versão do QR resultante e tempo de codificação do PNG
+para o mesmo comprovante nos dois formatos.
+
+Uso:
+    python -m Backend.benchmarks.bench_comprovante_qr [--repeticoes 20]
+"""
+import argparse
+import json
+import time
+
+import qrcode
+
+from Backend.comprovante_codec import codificar_comprovante, decodificar_comprovante
+from Backend.qr_cache import codificar_qr_png
+
+COMPROVANTE = {
+    "hash_transacao": "9f2c4e1a7b3d5f6e8a0c2b4d6f8e0a1c3b5d7f9e1a3c5b7d9f0e2a4c6b8d0f1e",
+    "valor_eth": 0.0375,
+    "valor_wei": 37500000000000000,
+    "valor_reais": 881.25,
+    "de": "maria.silva@pix",
+    "para": "padaria.sao.joao@pix",
+    "tipo_transferencia": "Solidária",
+    "descricao": "Pagamento do pedido 1234 - pães e cafés da semana"
+}
+
+
+def medir(conteudo, repeticoes):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(conteudo)
+    qr.make(fit=True)
+
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        codificar_qr_png(conteudo)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return qr.version, melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do QR code do comprovante")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    compacto = codificar_comprovante(COMPROVANTE)
+    assert decodificar_comprovante(compacto).hash_transacao == COMPROVANTE["hash_transacao"]
+    formatos = {
+        "json": json.dumps(COMPROVANTE, ensure_ascii=False),
+        "compacto (base45)": compacto
+    }
+
+    print(f"\n🧾 QR DO COMPROVANTE (melhor de {args.repeticoes})")
+    print("=" * 66)
+    print(f"   {'formato':<20} {'caracteres':>10} {'versão QR':>10} {'PNG (ms)':>10}")
+    for nome, conteudo in formatos.items():
+        versao, tempo = medir(conteudo, args.repeticoes)
+        print(f"   {nome:<20} {len(conteudo):>10} {versao:>10} {tempo:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
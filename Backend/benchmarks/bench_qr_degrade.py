@@ -0,0 +1,50 @@
+"""
+Benchmark do QR code com degradê: versão pixel a pixel x versão vetorizada (NumPy).
+
+Para cada box_size mede as duas formas de aplicar o degradê sobre o mesmo QR
+e confere que as imagens geradas são idênticas.
+
+Uso:
+    python -m Backend.benchmarks.bench_qr_degrade [--repeticoes 3] [--box-sizes 4 10 20 40]
+"""
+import argparse
+import time
+
+import qrcode
+
+from Backend.qr_service import QRCodeService
+
+DADOS = "https://cryp2real.example/registro?comerciante=0x742d35Cc6634C0532925a3b8D404D0C18b5a4b2F"
+
+
+def medir(funcao, qr, repeticoes):
+    melhor = float("inf")
+    imagem = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        imagem = funcao(qr)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, imagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do QR code com degradê")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--box-sizes", type=int, nargs="+", default=[4, 10, 20, 40])
+    args = parser.parse_args()
+
+    print(f"\n🎨 QR COM DEGRADÊ (melhor de {args.repeticoes}, em ms)")
+    print("=" * 78)
+    print(f"   {'box_size':>8} {'pixels':>12} {'laço':>12} {'vetorizado':>12} {'ganho':>8}  idênticas")
+    for box_size in args.box_sizes:
+        qr = qrcode.make(DADOS, box_size=box_size).convert("RGBA")
+        tempo_loop, img_loop = medir(QRCodeService._aplicar_degrade_loop, qr, args.repeticoes)
+        tempo_vetor, img_vetor = medir(QRCodeService._aplicar_degrade, qr, args.repeticoes)
+        identicas = img_loop.tobytes() == img_vetor.tobytes()
+        largura, altura = qr.size
+        print(f"   {box_size:>8} {largura * altura:>12,} {tempo_loop:>12.1f} {tempo_vetor:>12.2f} "
+              f"{tempo_loop / tempo_vetor:>7.0f}x  {'✅' if identicas else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
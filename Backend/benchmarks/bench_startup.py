@@ -0,0 +1,92 @@
+"""
+Benchmark de inicialização: tempo de importação e de boot por fase.
+
+Cada rodada usa um interpretador novo (importação a frio) e mede as fases em
+sequência, como acontece no boot de um worker do gunicorn.
+
+Uso:
+    python -m Backend.benchmarks.bench_startup [--rodadas 5] [--sem-rede] [--timeout 120]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Código executado no interpretador filho; imprime um JSON com o tempo de cada fase
+CODIGO_FILHO = r'''
+import json, sys, time
+
+fases = []
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    try:
+        funcao()
+        erro = None
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    fases.append({"fase": nome, "ms": (time.perf_counter() - inicio) * 1000, "erro": erro})
+
+medir("import flask/sqlalchemy", lambda: __import__("flask_sqlalchemy"))
+medir("import web3", lambda: __import__("web3"))
+medir("import Backend.my_blockchain", lambda: __import__("Backend.my_blockchain"))
+medir("import Backend.utils", lambda: __import__("Backend.utils"))
+medir("import Backend.app", lambda: __import__("Backend.app"))
+
+pesadas = {m: m in sys.modules for m in ("matplotlib", "qrcode", "PIL", "numpy")}
+
+if not SEM_REDE:
+    def carteiras():
+        import Backend.my_blockchain as chain
+        chain.admWallet, chain.ongWallet
+    def bootstrap():
+        from Backend.bootstrap import garantir_conta_ong
+        garantir_conta_ong()
+    medir("contexto da blockchain (carteiras)", carteiras)
+    medir("bootstrap conta ONG", bootstrap)
+
+print("@@" + json.dumps({"fases": fases, "pesadas": pesadas}))
+'''
+
+
+def rodar(sem_rede, timeout):
+    codigo = f"SEM_REDE = {sem_rede!r}\n" + CODIGO_FILHO
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True,
+                           timeout=timeout)
+    for linha in saida.stdout.splitlines():
+        if linha.startswith("@@"):
+            return json.loads(linha[2:])
+    raise RuntimeError(f"Rodada falhou:\n{saida.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do backend")
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--sem-rede", action="store_true", help="Não mede as fases que acessam o Ganache")
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo máximo por rodada (segundos)")
+    args = parser.parse_args()
+
+    resultados = [rodar(args.sem_rede, args.timeout) for _ in range(args.rodadas)]
+
+    print(f"\n⏱️ INICIALIZAÇÃO ({args.rodadas} rodadas, mediana em ms)")
+    print("=" * 70)
+    total = 0.0
+    for i, fase in enumerate(resultados[0]["fases"]):
+        tempos = [r["fases"][i]["ms"] for r in resultados]
+        mediana = statistics.median(tempos)
+        total += mediana
+        erro = f"  ⚠️ {fase['erro']}" if fase["erro"] else ""
+        print(f"   {fase['fase']:<38} {mediana:9.1f} ms (min {min(tempos):.1f}){erro}")
+    print("-" * 70)
+    print(f"   {'TOTAL':<38} {total:9.1f} ms")
+
+    print("\n📦 Bibliotecas pesadas após importar Backend.app:")
+    for modulo, carregado in resultados[0]["pesadas"].items():
+        print(f"   {modulo:<12} {'carregada' if carregado else 'adiada (primeiro uso)'}")
+
+
+if __name__ == "__main__":
+    main()
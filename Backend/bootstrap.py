@@ -0,0 +1,62 @@
+import threading
+import traceback
+
+_lock = threading.Lock()
+_conta_ong_configurada = False
+
+
+def garantir_conta_ong():
+    """
+    Configura a conta da ONG no contrato etherFlow.
+
+    Lê ``contaOng`` do contrato (um eth_call) e só envia setContaOng se o
+    valor for diferente; depois disso o processo não consulta mais. O estado
+    é sempre conferido no contrato, nunca num marcador em disco: um Ganache
+    reiniciado implanta o contrato no mesmo endereço, mas sem a ONG.
+
+    Returns:
+        bool: True se a conta da ONG está configurada, False em caso de erro.
+    """
+    global _conta_ong_configurada
+    if _conta_ong_configurada:
+        return True
+
+    with _lock:
+        if _conta_ong_configurada:
+            return True
+
+        from Backend.my_blockchain import etherFlow, PRIVATE_KEY, admWallet, ongWallet
+        from Backend.utils import sign_n_send
+        from Backend.parametros_rede import parametros_rede
+        from Backend.perfil_gas import perfil_gas
+
+        try:
+            conta_ong = etherFlow.functions.contaOng().call()
+            if conta_ong != ongWallet:
+                funcao = etherFlow.functions.setContaOng(ongWallet)
+                parametros_tx = parametros_rede.parametros_tx(
+                    admWallet, gas=perfil_gas.estimar(funcao, admWallet, padrao=100000)
+                )
+                sign_n_send(lambda nonce: funcao.build_transaction({**parametros_tx, "nonce": nonce}), PRIVATE_KEY)
+                conta_ong = etherFlow.functions.contaOng().call()
+                if conta_ong != ongWallet:
+                    print("⚠️ Conta ONG ainda não confirmada no contrato:", conta_ong)
+                    return False
+            print("Endereço da ONG configurado:", conta_ong)
+            _conta_ong_configurada = True
+            return True
+        except Exception as e:
+            print("⚠️ Falha ao configurar conta ONG:", str(e))
+            traceback.print_exc()
+            return False
+
+
+def esquecer_conta_ong():
+    """Faz a próxima chamada de ``garantir_conta_ong`` conferir o contrato de novo (ex.: doação falhou)."""
+    global _conta_ong_configurada
+    _conta_ong_configurada = False
+
+
+if __name__ == "__main__":
+    # Executado uma vez por deploy (ver gunicorn.conf.py)
+    garantir_conta_ong()
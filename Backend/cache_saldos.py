@@ -0,0 +1,86 @@
+import os
+import threading
+from collections import OrderedDict
+
+from web3 import Web3
+
+from Backend.leitura_blockchain import leitor_blockchain
+from Backend.parametros_rede import parametros_rede
+
+# Carteiras mantidas em memória (as usadas há mais tempo saem primeiro)
+CACHE_SALDOS_MAX = int(os.getenv("CACHE_SALDOS_MAX", "10000"))
+
+
+class CacheSaldos:
+    """
+    Cache do saldo de cada carteira, válido enquanto não surgir bloco novo.
+
+    O saldo só muda quando um bloco é minerado: cada entrada guarda o bloco
+    em que foi lida e vale enquanto o bloco atual do processo, acompanhado
+    por ``ParametrosRede`` (uma leitura a cada poucos segundos para todo o
+    worker), não passar dele. Numa falta, bloco e saldo são lidos juntos num
+    único lote JSON-RPC. Transações enviadas pela própria API invalidam as
+    carteiras envolvidas na hora, sem esperar o próximo bloco ser observado.
+    """
+
+    def __init__(self, leitor, parametros, max_entradas=CACHE_SALDOS_MAX):
+        self.leitor = leitor
+        self.parametros = parametros
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._saldos = OrderedDict()  # carteira -> (bloco, saldo em wei)
+        # Incrementada a cada invalidação: leitura iniciada antes dela não é guardada
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def saldo(self, endereco):
+        """
+        Saldo da carteira em wei, do cache se nenhum bloco novo foi observado.
+
+        Raises:
+            Exception: Erro do nó ao ler o saldo.
+        """
+        endereco = Web3.to_checksum_address(endereco)
+        bloco_atual = self.parametros.bloco()
+        with self._lock:
+            item = self._saldos.get(endereco)
+            if item is not None and item[0] >= bloco_atual:
+                self._saldos.move_to_end(endereco)
+                self.acertos += 1
+                return item[1]
+            self.falhas += 1
+            geracao = self._geracao
+
+        lote = self.leitor.lote()
+        bloco = lote.bloco()
+        saldo = lote.saldo(endereco)
+        lote.executar()
+        bloco, saldo = bloco.resultado(), saldo.resultado()
+        self.parametros.observar_bloco(bloco)
+
+        with self._lock:
+            if geracao == self._geracao:
+                self._saldos[endereco] = (bloco, saldo)
+                self._saldos.move_to_end(endereco)
+                while len(self._saldos) > self.max_entradas:
+                    self._saldos.popitem(last=False)
+        return saldo
+
+    def invalidar(self, *enderecos):
+        """Descarta o saldo das carteiras tocadas por uma transação enviada pela API."""
+        with self._lock:
+            self._geracao += 1
+            for endereco in enderecos:
+                if endereco:
+                    self._saldos.pop(Web3.to_checksum_address(endereco), None)
+
+    def limpar(self):
+        """Esquece tudo (ex.: estado da blockchain revertido para um snapshot)."""
+        with self._lock:
+            self._geracao += 1
+            self._saldos.clear()
+
+
+# Instância compartilhada pelo processo
+cache_saldos = CacheSaldos(leitor_blockchain, parametros_rede)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+FECHADO = "FECHADO"
+ABERTO = "ABERTO"
+MEIO_ABERTO = "MEIO_ABERTO"
+
+# Falhas consecutivas que abrem o circuito
+BREAKER_LIMITE_FALHAS = int(os.getenv("BREAKER_LIMITE_FALHAS", "3"))
+# Tempo aberto após a primeira abertura; dobra a cada nova abertura seguida (segundos)
+BREAKER_BACKOFF_BASE = float(os.getenv("BREAKER_BACKOFF_BASE", "5"))
+BREAKER_BACKOFF_MAX = float(os.getenv("BREAKER_BACKOFF_MAX", "300"))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com estados FECHADO, ABERTO e MEIO_ABERTO e backoff exponencial.
+
+    - FECHADO: chamadas liberadas; ``limite_falhas`` falhas seguidas abrem o circuito.
+    - ABERTO: chamadas recusadas na hora até o backoff expirar.
+    - MEIO_ABERTO: uma única chamada de teste é liberada. Sucesso fecha o
+      circuito; falha reabre com o dobro do tempo anterior.
+
+    A instância é thread-safe e deve ser compartilhada por todos os chamadores
+    do processo.
+    """
+
+    def __init__(self, nome, limite_falhas=BREAKER_LIMITE_FALHAS, backoff_base=BREAKER_BACKOFF_BASE,
+                 backoff_max=BREAKER_BACKOFF_MAX):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._estado = FECHADO
+        self._falhas_seguidas = 0
+        self._aberturas_seguidas = 0
+        self._reabre_em = 0.0
+        self._teste_em_andamento = False
+        self._total_sucessos = 0
+        self._total_falhas = 0
+        self._total_recusadas = 0
+        self._ultimo_erro = None
+
+    def permite(self):
+        """
+        Indica se uma chamada pode ser feita agora.
+
+        Returns:
+            bool: True se liberada; False se o circuito está aberto (ou já há
+            uma chamada de teste em andamento no estado MEIO_ABERTO).
+        """
+        with self._lock:
+            if self._estado == ABERTO and time.monotonic() >= self._reabre_em:
+                self._estado = MEIO_ABERTO
+                self._teste_em_andamento = False
+                print(f"🟡 Circuito {self.nome} meio-aberto: liberando chamada de teste")
+
+            if self._estado == FECHADO:
+                return True
+
+            if self._estado == MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+
+            self._total_recusadas += 1
+            return False
+
+    def registrar_sucesso(self):
+        """Registra uma chamada bem-sucedida (fecha o circuito se estava em teste)."""
+        with self._lock:
+            self._total_sucessos += 1
+            self._falhas_seguidas = 0
+            if self._estado != FECHADO:
+                print(f"🟢 Circuito {self.nome} fechado")
+            self._estado = FECHADO
+            self._aberturas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self, erro=None, espera_minima=None):
+        """
+        Registra uma chamada com falha.
+
+        Args:
+            erro (str, opcional): Descrição do erro, exposta no monitoramento.
+            espera_minima (float, opcional): Tempo mínimo aberto em segundos
+                (ex.: header Retry-After de uma resposta 429).
+        """
+        with self._lock:
+            self._total_falhas += 1
+            self._falhas_seguidas += 1
+            self._ultimo_erro = erro
+
+            if self._estado == MEIO_ABERTO or self._falhas_seguidas >= self.limite_falhas \
+                    or espera_minima is not None:
+                self._abrir(espera_minima)
+
+    def _abrir(self, espera_minima):
+        self._aberturas_seguidas += 1
+        espera = min(self.backoff_base * 2 ** (self._aberturas_seguidas - 1), self.backoff_max)
+        if espera_minima is not None:
+            espera = max(espera, espera_minima)
+
+        self._estado = ABERTO
+        self._teste_em_andamento = False
+        self._reabre_em = time.monotonic() + espera
+        print(f"🔴 Circuito {self.nome} aberto por {espera:.1f}s")
+
+    def estado(self):
+        """
+        Retorna um retrato do circuito para monitoramento.
+
+        Returns:
+            dict: estado, falhas seguidas, tempo restante aberto e contadores.
+        """
+        with self._lock:
+            restante = max(0.0, self._reabre_em - time.monotonic()) if self._estado == ABERTO else 0.0
+            return {
+                "nome": self.nome,
+                "estado": self._estado,
+                "falhas_seguidas": self._falhas_seguidas,
+                "aberturas_seguidas": self._aberturas_seguidas,
+                "reabre_em_s": round(restante, 1),
+                "total_sucessos": self._total_sucessos,
+                "total_falhas": self._total_falhas,
+                "total_recusadas": self._total_recusadas,
+                "ultimo_erro": self._ultimo_erro
+            }
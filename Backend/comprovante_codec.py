@@ -0,0 +1,211 @@
+import hashlib
+import hmac
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from decimal import Decimal
+
+# Formato compacto do comprovante gravado no QR code:
+#   "C2R:" + base45( versao(1) | tipo(1) | hash da transação(32) | valor em wei (varint)
+#                    | valor em centavos (varint) | HMAC-SHA256 truncado(8) )
+# Base45 usa só o alfabeto alfanumérico do QR, então o código sai no modo
+# alfanumérico (5,5 bits por caractere) em vez do modo byte do JSON.
+PREFIXO = "C2R:"
+VERSAO = 1
+TAMANHO_MAC = 8
+
+TIPOS_TRANSFERENCIA = {"Padrão": 1, "Solidária": 2}
+_TIPOS_POR_CODIGO = {codigo: nome for nome, codigo in TIPOS_TRANSFERENCIA.items()}
+
+_ALFABETO_BASE45 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_VALOR_BASE45 = {c: i for i, c in enumerate(_ALFABETO_BASE45)}
+
+
+class ComprovanteInvalido(ValueError):
+    """Texto do QR não é um comprovante válido (formato, versão ou assinatura)."""
+
+
+class SegredoNaoConfigurado(RuntimeError):
+    """COMPROVANTE_SEGREDO ausente: comprovantes não podem ser assinados nem verificados."""
+
+
+@lru_cache(maxsize=None)
+def _segredo():
+    # Segredo próprio dos comprovantes, independente das chaves da blockchain. A chave pública
+    # de desenvolvimento só vale com COMPROVANTE_SEGREDO_DESENVOLVIMENTO=1 (qualquer um forjaria)
+    segredo = os.getenv("COMPROVANTE_SEGREDO")
+    if not segredo:
+        if os.getenv("COMPROVANTE_SEGREDO_DESENVOLVIMENTO") != "1":
+            raise SegredoNaoConfigurado("Defina COMPROVANTE_SEGREDO para assinar e verificar comprovantes")
+        print("⚠️ COMPROVANTE_SEGREDO não definido: usando chave de desenvolvimento")
+        segredo = "c2r-desenvolvimento"
+    return hashlib.sha256(f"c2r-comprovante:{segredo}".encode("utf-8")).digest()
+
+
+def b45encode(dados):
+    """Codifica bytes em base45 (RFC 9285)."""
+    saida = []
+    for i in range(0, len(dados) - 1, 2):
+        n = dados[i] * 256 + dados[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        saida += [_ALFABETO_BASE45[c], _ALFABETO_BASE45[d], _ALFABETO_BASE45[e]]
+    if len(dados) % 2:
+        d, c = divmod(dados[-1], 45)
+        saida += [_ALFABETO_BASE45[c], _ALFABETO_BASE45[d]]
+    return "".join(saida)
+
+
+def b45decode(texto):
+    """
+    Decodifica base45 (RFC 9285).
+
+    Raises:
+        ComprovanteInvalido: Se o texto não for base45 válido.
+    """
+    try:
+        valores = [_VALOR_BASE45[c] for c in texto]
+    except KeyError:
+        raise ComprovanteInvalido("Caractere fora do alfabeto base45")
+    if len(valores) % 3 == 1:
+        raise ComprovanteInvalido("Tamanho inválido para base45")
+
+    saida = bytearray()
+    for i in range(0, len(valores), 3):
+        grupo = valores[i:i + 3]
+        n = sum(v * 45 ** j for j, v in enumerate(grupo))
+        if len(grupo) == 3:
+            if n > 0xFFFF:
+                raise ComprovanteInvalido("Grupo base45 fora do intervalo")
+            saida += n.to_bytes(2, "big")
+        else:
+            if n > 0xFF:
+                raise ComprovanteInvalido("Grupo base45 fora do intervalo")
+            saida.append(n)
+    return bytes(saida)
+
+
+def _varint(n):
+    saida = bytearray()
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        saida.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(saida)
+
+
+def _ler_varint(dados, pos):
+    n = deslocamento = 0
+    while True:
+        if pos >= len(dados) or deslocamento >= 128:
+            raise ComprovanteInvalido("Valor truncado")
+        byte = dados[pos]
+        n |= (byte & 0x7F) << deslocamento
+        pos += 1
+        if not byte & 0x80:
+            return n, pos
+        deslocamento += 7
+
+
+@dataclass
+class Comprovante:
+    hash_transacao: str
+    valor_wei: int
+    valor_centavos: int
+    tipo_transferencia: str = None
+    versao: int = VERSAO
+
+    @classmethod
+    def de_dados(cls, dados):
+        """
+        Monta o comprovante a partir dos dados da transferência (ver /transferirEntreUsers).
+
+        Raises:
+            KeyError: Se faltar hash_transacao ou valor.
+        """
+        valor_wei = dados.get("valor_wei")
+        if valor_wei is None:
+            valor_wei = int(Decimal(str(dados["valor_eth"])) * 10 ** 18)
+        return cls(
+            hash_transacao=dados["hash_transacao"].lower().removeprefix("0x"),
+            valor_wei=int(valor_wei),
+            valor_centavos=int(round(Decimal(str(dados.get("valor_reais", 0))) * 100)),
+            tipo_transferencia=dados.get("tipo_transferencia")
+        )
+
+    def para_dict(self):
+        return {
+            "versao": self.versao,
+            "hash_transacao": self.hash_transacao,
+            "tipo_transferencia": self.tipo_transferencia,
+            "valor_wei": self.valor_wei,
+            "valor_eth": float(Decimal(self.valor_wei) / 10 ** 18),
+            "valor_reais": self.valor_centavos / 100
+        }
+
+
+def codificar_comprovante(comprovante):
+    """
+    Codifica o comprovante no formato compacto assinado.
+
+    Args:
+        comprovante (Comprovante | dict): Comprovante ou dados da transferência.
+
+    Returns:
+        str: Texto "C2R:<base45>" para o QR code.
+
+    Raises:
+        SegredoNaoConfigurado: Se COMPROVANTE_SEGREDO não estiver definido.
+    """
+    if isinstance(comprovante, dict):
+        comprovante = Comprovante.de_dados(comprovante)
+
+    corpo = (
+        bytes([VERSAO, TIPOS_TRANSFERENCIA.get(comprovante.tipo_transferencia, 0)])
+        + bytes.fromhex(comprovante.hash_transacao)
+        + _varint(comprovante.valor_wei)
+        + _varint(comprovante.valor_centavos)
+    )
+    mac = hmac.new(_segredo(), corpo, hashlib.sha256).digest()[:TAMANHO_MAC]
+    return PREFIXO + b45encode(corpo + mac)
+
+
+def decodificar_comprovante(texto):
+    """
+    Decodifica e verifica a assinatura de um comprovante compacto.
+
+    Args:
+        texto (str): Conteúdo lido do QR code.
+
+    Returns:
+        Comprovante: Campos do comprovante.
+
+    Raises:
+        ComprovanteInvalido: Formato, versão ou assinatura inválidos.
+        SegredoNaoConfigurado: Se COMPROVANTE_SEGREDO não estiver definido.
+    """
+    if not isinstance(texto, str) or not texto.startswith(PREFIXO):
+        raise ComprovanteInvalido("Comprovante não está no formato C2R")
+    dados = b45decode(texto[len(PREFIXO):])
+
+    if len(dados) < 2 + 32 + 2 + TAMANHO_MAC:
+        raise ComprovanteInvalido("Comprovante truncado")
+    corpo, mac = dados[:-TAMANHO_MAC], dados[-TAMANHO_MAC:]
+    if corpo[0] != VERSAO:
+        raise ComprovanteInvalido(f"Versão de comprovante não suportada: {corpo[0]}")
+    esperado = hmac.new(_segredo(), corpo, hashlib.sha256).digest()[:TAMANHO_MAC]
+    if not hmac.compare_digest(mac, esperado):
+        raise ComprovanteInvalido("Assinatura do comprovante não confere")
+
+    valor_wei, pos = _ler_varint(corpo, 34)
+    valor_centavos, pos = _ler_varint(corpo, pos)
+    if pos != len(corpo):
+        raise ComprovanteInvalido("Dados extras no comprovante")
+
+    return Comprovante(
+        hash_transacao=corpo[2:34].hex(),
+        valor_wei=valor_wei,
+        valor_centavos=valor_centavos,
+        tipo_transferencia=_TIPOS_POR_CODIGO.get(corpo[1]),
+        versao=corpo[0]
+    )
@@ -0,0 +1,197 @@
+import base64
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from Backend.comprovante_codec import codificar_comprovante, SegredoNaoConfigurado
+from Backend.qr_cache import cache_qr_comprovante, QR_CACHE_DIR
+
+# Como o QR do comprovante chega ao cliente após uma transferência:
+#   "inline"     - PNG em base64 dentro do JSON, com qr_comprovante e qr_path (padrão)
+#   "lazy"       - a resposta traz só a URL; o QR é gerado no primeiro GET
+#   "background" - igual ao lazy, mas o QR já começa a ser gerado numa thread
+QR_COMPROVANTE_MODO = os.getenv("QR_COMPROVANTE_MODO", "inline").lower()
+# Pasta dos dados dos comprovantes, quantos ficam em disco (os mais antigos saem) e quantos em memória
+COMPROVANTE_DADOS_DIR = os.getenv("COMPROVANTE_DADOS_DIR", os.path.join(QR_CACHE_DIR, "dados"))
+COMPROVANTE_MAX_ARQUIVOS = int(os.getenv("COMPROVANTE_MAX_ARQUIVOS", "5000"))
+COMPROVANTE_MAX_MEMORIA = int(os.getenv("COMPROVANTE_MAX_MEMORIA", "1000"))
+# Conteúdo do QR: "compacto" (binário assinado em base45, ver comprovante_codec) ou "json" (antigo)
+QR_COMPROVANTE_FORMATO = os.getenv("QR_COMPROVANTE_FORMATO", "compacto").lower()
+
+_HASH_TRANSACAO = re.compile(r"^(0x)?[0-9a-fA-F]{64}$")
+
+
+def normalizar_hash(tx_hash):
+    """
+    Normaliza o hash da transação para minúsculas sem "0x".
+
+    Raises:
+        ValueError: Se não for um hash de transação válido.
+    """
+    if not isinstance(tx_hash, str) or not _HASH_TRANSACAO.match(tx_hash):
+        raise ValueError("Hash de transação inválido")
+    return tx_hash.lower().removeprefix("0x")
+
+
+def url_comprovante(tx_hash):
+    return f"/comprovante/{normalizar_hash(tx_hash)}.png"
+
+
+def conteudo_comprovante(dados):
+    """
+    Texto codificado no QR code do comprovante.
+
+    No formato compacto o QR leva só hash, tipo e valores assinados; os demais
+    dados ficam no backend e são consultados pelo hash da transação. Sem
+    COMPROVANTE_SEGREDO o comprovante não é assinado: o QR leva o JSON antigo.
+    """
+    if QR_COMPROVANTE_FORMATO == "compacto":
+        try:
+            return codificar_comprovante(dados)
+        except (KeyError, ValueError, TypeError):
+            pass  # dados sem hash/valor (comprovantes antigos): mantém o JSON
+        except SegredoNaoConfigurado as e:
+            print(f"⚠️ {e}; QR do comprovante em JSON sem assinatura")
+    return json.dumps(dados, ensure_ascii=False)
+
+
+class RegistroComprovantes:
+    """
+    Guarda os dados de cada comprovante para gerar o QR depois da resposta.
+
+    Os dados ficam num arquivo JSON por transação (compartilhado entre workers
+    e reinícios) e os mais recentes também num LRU em memória. A pasta tem no
+    máximo ``max_arquivos`` comprovantes: ao passar disso, os gravados há mais
+    tempo são removidos e o QR deles deixa de ser servido (404).
+    """
+
+    def __init__(self, pasta=COMPROVANTE_DADOS_DIR, max_arquivos=COMPROVANTE_MAX_ARQUIVOS,
+                 max_memoria=COMPROVANTE_MAX_MEMORIA):
+        self.pasta = pasta
+        self.max_arquivos = max_arquivos
+        self.max_memoria = max_memoria
+        self._lock = threading.Lock()
+        self._memoria = OrderedDict()
+        self._arquivos = None  # OrderedDict hash -> None, do mais antigo para o mais novo
+
+    def _caminho(self, tx_hash):
+        return os.path.join(self.pasta, f"{tx_hash}.json")
+
+    def _carregar_arquivos(self):
+        # Índice reconstruído do disco (comprovantes de outros workers/reinícios), por data de gravação
+        arquivos = []
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and entrada.name.endswith(".json"):
+                    arquivos.append((entrada.stat().st_mtime, entrada.name.removesuffix(".json")))
+        arquivos.sort()
+        self._arquivos = OrderedDict((tx_hash, None) for _, tx_hash in arquivos)
+
+    def _remover_excedentes(self):
+        while len(self._arquivos) > self.max_arquivos:
+            tx_hash, _ = self._arquivos.popitem(last=False)
+            self._memoria.pop(tx_hash, None)
+            try:
+                os.remove(self._caminho(tx_hash))
+            except FileNotFoundError:
+                pass
+
+    def _lembrar(self, tx_hash, dados):
+        with self._lock:
+            self._memoria[tx_hash] = dados
+            self._memoria.move_to_end(tx_hash)
+            while len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    def guardar(self, tx_hash, dados):
+        tx_hash = normalizar_hash(tx_hash)
+        os.makedirs(self.pasta, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, self._caminho(tx_hash))
+        self._lembrar(tx_hash, dados)
+        with self._lock:
+            if self._arquivos is None:
+                self._carregar_arquivos()
+            self._arquivos[tx_hash] = None
+            self._arquivos.move_to_end(tx_hash)
+            self._remover_excedentes()
+
+    def obter(self, tx_hash):
+        """
+        Returns:
+            dict | None: Dados do comprovante ou None se a transação não tiver comprovante.
+        """
+        tx_hash = normalizar_hash(tx_hash)
+        with self._lock:
+            dados = self._memoria.get(tx_hash)
+            if dados is not None:
+                self._memoria.move_to_end(tx_hash)
+                return dados
+        try:
+            with open(self._caminho(tx_hash), encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._lembrar(tx_hash, dados)
+        return dados
+
+
+registro_comprovantes = RegistroComprovantes()
+
+# Uma thread basta: gerar QR fora da requisição não deve disputar CPU com os endpoints
+_executor_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr-comprovante")
+
+
+def _gerar_em_background(dados, tx_hash):
+    try:
+        cache_qr_comprovante.obter_ou_gerar(conteudo_comprovante(dados))
+    except Exception as e:
+        print(f"⚠️ Falha ao gerar QR do comprovante {tx_hash} em background: {e}")
+
+
+def publicar_comprovante(dados, tx_hash, modo=None):
+    """
+    Registra o comprovante de uma transação e monta os campos da resposta.
+
+    Args:
+        dados (dict): Dados do comprovante.
+        tx_hash (str): Hash da transação.
+        modo (str, opcional): "inline", "lazy" ou "background" (padrão: QR_COMPROVANTE_MODO).
+
+    Returns:
+        dict: comprovante_url e, no modo inline, qr_comprovante (data URL base64) e qr_path.
+    """
+    modo = modo or QR_COMPROVANTE_MODO
+    registro_comprovantes.guardar(tx_hash, dados)
+    campos = {"comprovante_url": url_comprovante(tx_hash)}
+
+    if modo == "inline":
+        png, caminho = cache_qr_comprovante.obter_ou_gerar(conteudo_comprovante(dados))
+        campos["qr_comprovante"] = f"data:image/png;base64,{base64.b64encode(png).decode('utf-8')}"
+        campos["qr_path"] = caminho
+    elif modo == "background":
+        _executor_background.submit(_gerar_em_background, dados, tx_hash)
+
+    return campos
+
+
+def etag_comprovante(dados):
+    """ETag do QR do comprovante: hash do conteúdo, calculado sem gerar a imagem."""
+    return cache_qr_comprovante.chave(conteudo_comprovante(dados))
+
+
+def png_comprovante(dados):
+    """
+    Retorna o PNG do QR de um comprovante, gerando-o só no primeiro acesso.
+
+    Returns:
+        bytes: Imagem PNG.
+    """
+    png, _ = cache_qr_comprovante.obter_ou_gerar(conteudo_comprovante(dados))
+    return png
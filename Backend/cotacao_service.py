@@ -0,0 +1,355 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Backend.circuit_breaker import CircuitBreaker, BREAKER_BACKOFF_BASE
+
+# Valor padrão de segurança quando nenhuma fonte respondeu ainda
+COTACAO_FALLBACK = 23500.0
+
+# Janela em que a cotação é servida sem consultar as APIs (segundos)
+COTACAO_TTL = float(os.getenv("COTACAO_TTL", "30"))
+# Janela em que uma cotação vencida ainda é servida enquanto atualiza em background
+COTACAO_MAX_STALE = float(os.getenv("COTACAO_MAX_STALE", "600"))
+# Tempo em que uma falha geral é lembrada antes de tentar as APIs de novo
+COTACAO_TTL_FALHA = float(os.getenv("COTACAO_TTL_FALHA", "5"))
+
+# Tempo de espera pela primeira fonte antes de disparar a segunda (segundos)
+COTACAO_HEDGE_DELAY = float(os.getenv("COTACAO_HEDGE_DELAY", "0.5"))
+# Tempo máximo de uma busca completa, somando todas as fontes (segundos)
+COTACAO_TIMEOUT = float(os.getenv("COTACAO_TIMEOUT", "10"))
+# Conexões keep-alive mantidas por fonte
+COTACAO_POOL_SIZE = int(os.getenv("COTACAO_POOL_SIZE", "4"))
+
+
+def _extrair_coingecko(data):
+    return data.get("ethereum", {}).get("brl")
+
+
+def _extrair_cryptocompare(data):
+    return data.get("BRL")
+
+
+class FonteCotacao:
+    """Fonte externa de cotação com sessão HTTP persistente (keep-alive)"""
+
+    def __init__(self, nome, url, params, extrair, timeout=COTACAO_TIMEOUT):
+        self.nome = nome
+        self.url = url
+        self.params = params
+        self.extrair = extrair
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(nome)
+
+        # Sessão própria por fonte: reaproveita conexão TCP/TLS entre consultas
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=COTACAO_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def consultar(self):
+        """
+        Consulta a cotação nesta fonte, registrando o resultado no circuit breaker.
+
+        Returns:
+            float | None: Cotação ETH em BRL ou None se a resposta for inválida.
+        """
+        try:
+            response = self.session.get(self.url, params=self.params, timeout=self.timeout)
+        except Exception as e:
+            print(f"⚠️ Erro {self.nome}: {str(e)}")
+            self.breaker.registrar_falha(str(e))
+            return None
+
+        print(f"➡️ URL chamada {self.nome}:", response.url)
+
+        if response.status_code != 200:
+            print(f"❌ {self.nome} retornou status {response.status_code}")
+            self.breaker.registrar_falha(f"HTTP {response.status_code}",
+                                         espera_minima=self._retry_after(response))
+            return None
+
+        try:
+            price = self.extrair(response.json())
+        except Exception as e:
+            # Corpo malformado (JSON inválido, lista ou objeto de erro no lugar do dict esperado):
+            # conta como falha abaixo, senão a chamada de teste do MEIO_ABERTO nunca é liberada
+            price = None
+            print(f"⚠️ Resposta inválida da {self.nome}: {e!r}")
+
+        if isinstance(price, (int, float)) and price > 0:
+            print(f"✅ Cotação ETH/BRL obtida da {self.nome}: R$ {price:,.2f}")
+            self.breaker.registrar_sucesso()
+            return float(price)
+
+        self.breaker.registrar_falha("Cotação ausente na resposta")
+        return None
+
+    @staticmethod
+    def _retry_after(response):
+        """Tempo pedido pela API antes de nova tentativa (só em 429/503)."""
+        if response.status_code not in (429, 503):
+            return None
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return BREAKER_BACKOFF_BASE
+
+
+@dataclass
+class ResultadoCotacao:
+    """Resultado de uma busca de cotação"""
+    valor: float
+    fonte: str
+    latencias_ms: dict = field(default_factory=dict)  # fonte -> ms (None se não concluiu)
+
+
+class BuscadorCotacao:
+    """
+    Consulta as fontes de cotação com requisições "hedged".
+
+    A primeira fonte é consultada imediatamente; se ela não responder dentro de
+    ``hedge_delay`` (ou falhar antes disso), a próxima fonte é disparada em
+    paralelo. O primeiro preço válido vence.
+    """
+
+    def __init__(self, fontes, hedge_delay=COTACAO_HEDGE_DELAY, timeout=COTACAO_TIMEOUT):
+        self.fontes = fontes
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(2, len(fontes) * 2),
+                                            thread_name_prefix="cotacao")
+
+    def _consultar_fonte(self, fonte, latencias):
+        inicio = time.monotonic()
+        try:
+            return fonte.consultar()
+        finally:
+            latencias[fonte.nome] = round((time.monotonic() - inicio) * 1000, 1)
+
+    def buscar(self):
+        """
+        Busca a cotação na fonte mais rápida.
+
+        Fontes com o circuito aberto são puladas sem nenhuma chamada de rede;
+        se todas estiverem abertas, retorna None na hora.
+
+        Returns:
+            ResultadoCotacao | None: Preço, fonte vencedora e latência de cada
+            fonte consultada, ou None se nenhuma fonte respondeu.
+        """
+        latencias = {}
+        futuros = {}
+        pendentes = set()
+        fila = iter(self.fontes)
+        limite = time.monotonic() + self.timeout
+
+        def disparar_proxima():
+            # Dispara a próxima fonte com circuito liberado; False se acabaram
+            for fonte in fila:
+                if not fonte.breaker.permite():
+                    print(f"⏭️ {fonte.nome} ignorada: circuito aberto")
+                    continue
+                futuro = self._executor.submit(self._consultar_fonte, fonte, latencias)
+                futuros[futuro] = fonte
+                pendentes.add(futuro)
+                return True
+            return False
+
+        restam_fontes = disparar_proxima()
+
+        while pendentes:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+
+            espera = min(self.hedge_delay, restante) if restam_fontes else restante
+            concluidos, pendentes = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+
+            for futuro in concluidos:
+                valor = futuro.result()
+                if valor:
+                    return self._resultado(valor, futuros[futuro], latencias)
+
+            # Atraso de hedge esgotado ou fonte falhou: aciona a próxima fonte
+            if restam_fontes:
+                restam_fontes = disparar_proxima()
+
+        return None
+
+    def _resultado(self, valor, fonte, latencias):
+        # Fontes ainda em andamento (ou não disparadas) aparecem com None
+        latencias_ms = {f.nome: latencias.get(f.nome) for f in self.fontes}
+        return ResultadoCotacao(valor=valor, fonte=fonte.nome, latencias_ms=latencias_ms)
+
+
+FONTES_COTACAO = [
+    FonteCotacao("CoinGecko", "https://api.coingecko.com/api/v3/simple/price",
+                 {"ids": "ethereum", "vs_currencies": "brl"}, _extrair_coingecko),
+    FonteCotacao("CryptoCompare", "https://min-api.cryptocompare.com/data/price",
+                 {"fsym": "ETH", "tsyms": "BRL"}, _extrair_cryptocompare),
+]
+
+buscador_cotacao = BuscadorCotacao(FONTES_COTACAO)
+
+
+def buscar_cotacao_eth_brl():
+    """
+    Consulta a cotação ETH/BRL nas fontes externas (CoinGecko e CryptoCompare).
+
+    Returns:
+        ResultadoCotacao | None: Cotação obtida ou None se nenhuma fonte respondeu.
+    """
+    return buscador_cotacao.buscar()
+
+
+def estado_fontes():
+    """
+    Retorna o estado do circuit breaker de cada fonte de cotação.
+
+    Returns:
+        list[dict]: Um retrato por fonte (ver ``CircuitBreaker.estado``).
+    """
+    return [fonte.breaker.estado() for fonte in FONTES_COTACAO]
+
+
+class CotacaoCache:
+    """
+    Cache da cotação ETH/BRL com TTL, atualização única (single-flight)
+    e stale-while-revalidate.
+
+    - Dentro do TTL a cotação é devolvida direto da memória.
+    - Vencida, mas dentro de ``max_stale``, a última cotação boa é devolvida
+      na hora e uma única thread em background atualiza o valor.
+    - Sem cotação utilizável, apenas uma requisição consulta as APIs; as
+      demais aguardam o resultado dessa mesma consulta.
+    """
+
+    def __init__(self, buscar=buscar_cotacao_eth_brl, ttl=COTACAO_TTL, max_stale=COTACAO_MAX_STALE,
+                 ttl_falha=COTACAO_TTL_FALHA, fallback=COTACAO_FALLBACK):
+        self._buscar = buscar
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.ttl_falha = ttl_falha
+        self.fallback = fallback
+
+        self._lock = threading.Lock()
+        self._resultado = None  # último ResultadoCotacao válido
+        self._atualizado_em = 0.0
+        self._falhou_em = None
+        self._em_andamento = None  # threading.Event da atualização em curso
+        self._ouvintes = []
+
+    def registrar_ouvinte(self, ouvinte):
+        """
+        Registra uma função chamada com cada ResultadoCotacao novo obtido das APIs.
+
+        Args:
+            ouvinte (callable): Recebe o ResultadoCotacao; não deve bloquear.
+        """
+        self._ouvintes.append(ouvinte)
+
+    def obter(self):
+        """
+        Retorna a cotação atual, consultando as APIs somente quando necessário.
+
+        Returns:
+            float: Cotação ETH em BRL (última válida ou fallback).
+        """
+        return self.obter_detalhado()["valor"]
+
+    def obter_detalhado(self):
+        """
+        Retorna a cotação atual junto com a fonte que a forneceu.
+
+        Returns:
+            dict: valor (float), fonte (str), latencias_ms (dict) e idade_s (float | None).
+        """
+        with self._lock:
+            agora = time.monotonic()
+            idade = agora - self._atualizado_em
+
+            if self._resultado is not None and idade < self.ttl:
+                return self._detalhes(agora)
+
+            if self._resultado is not None and idade < self.max_stale:
+                # Serve o valor antigo e atualiza em background
+                if self._em_andamento is None and not self._falha_recente(agora):
+                    evento = self._iniciar_atualizacao()
+                    threading.Thread(target=self._atualizar, args=(evento,), daemon=True).start()
+                return self._detalhes(agora)
+
+            if self._falha_recente(agora):
+                return self._detalhes(agora)
+
+            if self._em_andamento is not None:
+                evento, lider = self._em_andamento, False
+            else:
+                evento, lider = self._iniciar_atualizacao(), True
+
+        if lider:
+            self._atualizar(evento)
+        else:
+            evento.wait()
+
+        with self._lock:
+            return self._detalhes(time.monotonic())
+
+    def invalidar(self):
+        """Descarta a cotação em memória (a próxima chamada consulta as APIs)."""
+        with self._lock:
+            self._resultado = None
+            self._atualizado_em = 0.0
+            self._falhou_em = None
+
+    def _iniciar_atualizacao(self):
+        evento = threading.Event()
+        self._em_andamento = evento
+        return evento
+
+    def _falha_recente(self, agora):
+        return self._falhou_em is not None and agora - self._falhou_em < self.ttl_falha
+
+    def _detalhes(self, agora):
+        if self._resultado is None:
+            print(f"⚠️ Usando valor fallback: R$ {self.fallback:,.2f}")
+            return {"valor": self.fallback, "fonte": "fallback_value", "latencias_ms": {}, "idade_s": None}
+        return {
+            "valor": self._resultado.valor,
+            "fonte": self._resultado.fonte,
+            "latencias_ms": dict(self._resultado.latencias_ms),
+            "idade_s": round(agora - self._atualizado_em, 3)
+        }
+
+    def _atualizar(self, evento):
+        resultado = None
+        try:
+            resultado = self._buscar()
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar cotação: {e}")
+        finally:
+            with self._lock:
+                if resultado is not None:
+                    self._resultado = resultado
+                    self._atualizado_em = time.monotonic()
+                    self._falhou_em = None
+                else:
+                    self._falhou_em = time.monotonic()
+                self._em_andamento = None
+            evento.set()
+
+        if resultado is not None:
+            for ouvinte in self._ouvintes:
+                try:
+                    ouvinte(resultado)
+                except Exception as e:
+                    print(f"⚠️ Erro em ouvinte de cotação: {e}")
+
+
+# Instância única compartilhada pelo processo
+cotacao_cache = CotacaoCache()
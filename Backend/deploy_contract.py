@@ -1,9 +1,8 @@
 import os
 
-from web3 import Web3
 from solcx import compile_source, install_solc
 from dotenv import load_dotenv
-from Backend.my_blockchain import PRIVATE_KEY, GANACHE_URL, admWallet
+from Backend.my_blockchain import w3, PRIVATE_KEY, admWallet
 from Backend.utils import extract_interface, sign_n_send
 
 # Carregar variáveis de ambiente
@@ -12,8 +11,7 @@ load_dotenv()
 # Instalar a versão adequada do compilador Solidity
 install_solc("0.8.19")
 
-# Conectar ao Ganache
-w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+# Mesmo provider do backend (Backend.provedor_web3): o GerenciadorNonce usado por sign_n_send já está ligado a ele
 private_key = PRIVATE_KEY
 
 # Ler o código Solidity que contém ambos os contratos
@@ -41,11 +39,13 @@ etherFlow_abi, etherFlow_bytecode = extract_interface(compiled_contracts, "ether
 
 # 1. Deploy SistemaCliente
 sistema_cliente_contract = w3.eth.contract(abi=sistema_cliente_abi, bytecode=sistema_cliente_bytecode)
-nonce = w3.eth.get_transaction_count(admWallet)
+gas_price = w3.eth.gas_price
+chain_id = w3.eth.chain_id
 
-tx = sistema_cliente_contract.constructor().build_transaction({
-    "gasPrice": w3.eth.gas_price,
-    "chainId": w3.eth.chain_id,
+# Nonces atribuídos pelo GerenciadorNonce no envio (sem get_transaction_count por transação)
+tx = lambda nonce: sistema_cliente_contract.constructor().build_transaction({
+    "gasPrice": gas_price,
+    "chainId": chain_id,
     "from": admWallet,
     "nonce": nonce,
 })
@@ -56,11 +56,10 @@ print(f"[✔] SistemaCliente deployado em: {sistema_cliente_address}")
 
 # 2. Deploy EtherFlow
 new_ether_contract = w3.eth.contract(abi=etherFlow_abi, bytecode=etherFlow_bytecode)
-nonce += 1
 
-tx2 = new_ether_contract.constructor(sistema_cliente_address).build_transaction({
-    "gasPrice": w3.eth.gas_price,
-    "chainId": w3.eth.chain_id,
+tx2 = lambda nonce: new_ether_contract.constructor(sistema_cliente_address).build_transaction({
+    "gasPrice": gas_price,
+    "chainId": chain_id,
     "from": admWallet,
     "nonce": nonce,
     "value": w3.to_wei(1, "wei")  # Valor simbólico
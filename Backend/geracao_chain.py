@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+from Backend.alocador_contas import estado_json
+
+# Arquivo com a geração do estado da blockchain, compartilhado pelos processos da mesma máquina
+GERACAO_CHAIN_ARQUIVO = os.getenv("GERACAO_CHAIN_ARQUIVO", "geracao_chain.json")
+# Intervalo mínimo (segundos) entre conferências do arquivo por processo
+GERACAO_CHAIN_INTERVALO = float(os.getenv("GERACAO_CHAIN_INTERVALO", "1"))
+
+
+class GeracaoChain:
+    """
+    Avisa os outros processos que o estado da blockchain foi substituído.
+
+    Quem reverte a chain para um snapshot (o reset, rodado na linha de
+    comando) chama ``avancar``, que incrementa um contador num arquivo. Cada
+    worker chama ``conferir`` antes das requisições; ao ver uma geração nova,
+    roda as funções registradas com ``ao_mudar`` para esquecer o que leu da
+    chain antiga (resoluções Pix, saldos, nonces, estimativas de gas).
+    """
+
+    def __init__(self, arquivo=GERACAO_CHAIN_ARQUIVO, intervalo=GERACAO_CHAIN_INTERVALO):
+        self.arquivo = arquivo
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._limpezas = []
+        self._geracao = None
+        self._conferir_em = 0.0
+
+    def ao_mudar(self, funcao):
+        """Registra ``funcao()`` para rodar quando a geração mudar."""
+        self._limpezas.append(funcao)
+        return funcao
+
+    def _ler(self):
+        try:
+            with open(self.arquivo) as f:
+                return int(json.load(f)["geracao"])
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Erro ao ler geração da chain: {e}")
+            return self._geracao or 0
+
+    def _limpar(self, geracao):
+        print(f"🔄 Estado da blockchain substituído (geração {geracao}); descartando caches do processo")
+        for funcao in self._limpezas:
+            try:
+                funcao()
+            except Exception as e:
+                print(f"⚠️ Erro ao descartar cache após troca da chain: {e}")
+
+    def conferir(self):
+        """
+        Relê a geração (no máximo uma vez por ``intervalo``) e limpa os caches se mudou.
+
+        Returns:
+            bool: True se a geração mudou desde a última conferência.
+        """
+        if time.monotonic() < self._conferir_em:
+            return False
+        with self._lock:
+            if time.monotonic() < self._conferir_em:
+                return False
+            geracao = self._ler()
+            self._conferir_em = time.monotonic() + self.intervalo
+            anterior, self._geracao = self._geracao, geracao
+            # Primeira leitura do processo: nada em cache é de uma geração anterior
+            if anterior is None or geracao == anterior:
+                return False
+            self._limpar(geracao)
+            return True
+
+    def avancar(self):
+        """
+        Marca uma nova geração (chain revertida) e limpa os caches deste processo.
+
+        Returns:
+            int: A nova geração.
+        """
+        with self._lock:
+            with estado_json(self.arquivo, {"geracao": 0}) as estado:
+                estado["geracao"] = geracao = int(estado["geracao"]) + 1
+            self._geracao = geracao
+            self._limpar(geracao)
+            return geracao
+
+
+# Instância compartilhada pelo processo
+geracao_chain = GeracaoChain()
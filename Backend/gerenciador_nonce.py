@@ -0,0 +1,168 @@
+import threading
+from functools import lru_cache
+
+from eth_account import Account
+
+from Backend.my_blockchain import w3
+
+# Trechos das mensagens de erro de nonce do Ganache/Geth/Hardhat
+_ERROS_NONCE = (
+    "nonce too low", "nonce too high", "invalid nonce", "incorrect nonce",
+    "replacement transaction underpriced", "the tx doesn't have the correct nonce"
+)
+
+# O nó já tem esta mesma transação assinada (ex.: reenvio após timeout do RPC): ela foi aceita
+_ERROS_JA_CONHECIDA = ("already known", "known transaction")
+
+
+def erro_de_nonce(erro):
+    mensagem = str(erro).lower()
+    return any(trecho in mensagem for trecho in _ERROS_NONCE)
+
+
+def transacao_ja_conhecida(erro):
+    mensagem = str(erro).lower()
+    return any(trecho in mensagem for trecho in _ERROS_JA_CONHECIDA)
+
+
+@lru_cache(maxsize=1024)
+def endereco_da_chave(private_key):
+    """Endereço da conta dona da chave privada (derivação memorizada)."""
+    return Account.from_key(private_key).address
+
+
+class GerenciadorNonce:
+    """
+    Distribui nonces localmente, por endereço, sem consultar o nó a cada transação.
+
+    O nonce de cada endereço é lido do nó (``pending``) só na primeira
+    transação; depois é incrementado em memória. Montar, assinar e enviar
+    acontecem sob uma trava do endereço, então requisições simultâneas da mesma
+    carteira recebem nonces distintos e em ordem, e o nonce só avança quando o
+    nó aceita a transação. Em erros de nonce (carteira usada fora deste
+    processo) o valor é relido do nó e o envio é refeito uma vez. Um nonce à
+    frente do nó não gera erro no envio (a transação só fica na fila), por isso
+    quem percebe um recibo que não chega chama ``sincronizar``.
+    Se o nó responde que já conhece a transação, ela conta como enviada: refazer
+    o envio com outro nonce moveria o valor duas vezes.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._travas = {}
+        self._proximos = {}
+
+    def _trava(self, endereco):
+        with self._lock:
+            trava = self._travas.get(endereco)
+            if trava is None:
+                trava = self._travas[endereco] = threading.Lock()
+            return trava
+
+    def _proximo(self, endereco):
+        nonce = self._proximos.get(endereco)
+        if nonce is None:
+            nonce = self._proximos[endereco] = self.w3.eth.get_transaction_count(endereco, "pending")
+        return nonce
+
+    def sincronizar(self, endereco=None):
+        """
+        Confere o nonce em memória com o nó e o esquece se estiver à frente.
+
+        Um nonce local maior que o ``pending`` do nó indica buraco (nó
+        reiniciado, ``evm_revert``, transação descartada): as próximas
+        transações ficariam presas na fila do nó. Nesse caso o próximo envio
+        relê o valor do nó.
+
+        Args:
+            endereco (str | None): Carteira a conferir; None confere todas as conhecidas.
+
+        Returns:
+            list: Carteiras cujo nonce foi esquecido.
+        """
+        enderecos = [endereco] if endereco else list(self._proximos)
+        esquecidos = []
+        for endereco in enderecos:
+            with self._trava(endereco):
+                nonce = self._proximos.get(endereco)
+                if nonce is None:
+                    continue
+                try:
+                    pendentes = self.w3.eth.get_transaction_count(endereco, "pending")
+                except Exception as e:
+                    print(f"⚠️ Erro ao conferir nonce de {endereco}: {e}")
+                    self._proximos.pop(endereco, None)
+                    esquecidos.append(endereco)
+                    continue
+                if nonce > pendentes:
+                    print(f"⚠️ Nonce local {nonce} de {endereco} à frente do nó ({pendentes}); ressincronizando")
+                    self._proximos.pop(endereco, None)
+                    esquecidos.append(endereco)
+        return esquecidos
+
+    def limpar(self):
+        """Esquece todos os nonces em memória (ex.: estado da blockchain revertido para um snapshot)."""
+        with self._lock:
+            self._proximos.clear()
+
+    def _enviar_um(self, endereco, private_key, montar):
+        # Chamado com a trava do endereço já adquirida
+        for tentativa in (1, 2):
+            nonce = self._proximo(endereco)
+            tx = montar(nonce)
+            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
+            try:
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception as e:
+                if transacao_ja_conhecida(e):
+                    print(f"ℹ️ Transação {signed_tx.hash.to_0x_hex()} já estava no nó")
+                    self._proximos[endereco] = nonce + 1
+                    return signed_tx.hash
+                if tentativa == 1 and erro_de_nonce(e):
+                    print(f"⚠️ Nonce {nonce} de {endereco} recusado ({e}); ressincronizando com o nó")
+                    self._proximos.pop(endereco, None)
+                    continue
+                if erro_de_nonce(e):
+                    self._proximos.pop(endereco, None)
+                raise
+            self._proximos[endereco] = nonce + 1
+            return tx_hash
+
+    def enviar(self, private_key, montar):
+        """
+        Monta, assina e envia uma transação com o próximo nonce da carteira.
+
+        Args:
+            private_key (str): Chave privada que assina.
+            montar (callable): ``montar(nonce) -> dict`` com a transação pronta para assinar.
+
+        Returns:
+            HexBytes: Hash da transação.
+        """
+        endereco = endereco_da_chave(private_key)
+        with self._trava(endereco):
+            return self._enviar_um(endereco, private_key, montar)
+
+    def enviar_sequencia(self, private_key, montadores):
+        """
+        Envia várias transações da mesma carteira com nonces consecutivos, sem
+        esperar recibos. Para no primeiro erro para não deixar buraco de nonce.
+
+        Returns:
+            list: Hash de cada transação enviada (pode ser menor que ``montadores``).
+        """
+        endereco = endereco_da_chave(private_key)
+        hashes = []
+        with self._trava(endereco):
+            for i, montar in enumerate(montadores):
+                try:
+                    hashes.append(self._enviar_um(endereco, private_key, montar))
+                except Exception as e:
+                    print(f"⚠️ Falha ao enviar transação {i + 1}/{len(montadores)}: {e}")
+                    break
+        return hashes
+
+
+# Instância compartilhada pelo processo
+gerenciador_nonce = GerenciadorNonce(w3)
@@ -0,0 +1,253 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Limites do cache de imagens renderizadas
+GRAFICO_CACHE_MAX_BYTES = int(os.getenv("GRAFICO_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+GRAFICO_CACHE_MAX_ITENS = int(os.getenv("GRAFICO_CACHE_MAX_ITENS", "64"))
+# max-age enviado no Cache-Control das imagens (segundos)
+GRAFICO_MAX_AGE = int(os.getenv("GRAFICO_MAX_AGE", "300"))
+
+# Pool de renderização: processos dedicados, renderizações aguardando e tempo máximo (segundos)
+GRAFICO_PROCESSOS = int(os.getenv("GRAFICO_PROCESSOS", "2"))
+GRAFICO_MAX_PENDENTES = int(os.getenv("GRAFICO_MAX_PENDENTES", "8"))
+GRAFICO_TIMEOUT = float(os.getenv("GRAFICO_TIMEOUT", "10"))
+
+
+class GraficoOcupado(RuntimeError):
+    """A fila do pool de renderização está cheia."""
+
+
+def chave_grafico(rotulos, valores, titulo, largura, altura):
+    """
+    Calcula a chave (e ETag) de um gráfico a partir dos dados e parâmetros de renderização.
+
+    Qualquer mudança na série gera uma chave nova, então imagens antigas nunca
+    são servidas para dados atualizados.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal.
+    """
+    conteudo = json.dumps({
+        "rotulos": list(rotulos),
+        "valores": [round(float(v), 8) for v in valores],
+        "titulo": titulo,
+        "tamanho": [float(largura), float(altura)]
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _desenhar_grafico_linha(rotulos, valores, titulo, largura, altura):
+    """
+    Desenha o gráfico com a API orientada a objetos (Figure + Agg), sem o estado
+    global do pyplot. Executa dentro dos processos do pool.
+
+    Returns:
+        bytes: Imagem PNG.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(largura, altura))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(rotulos, valores, marker="o", color="blue", linewidth=2)
+    ax.set_title(titulo, fontsize=14)
+    ax.set_xlabel("Mês")
+    ax.set_ylabel("Preço (R$)")
+    ax.grid(True)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+class PoolRenderizacao:
+    """
+    Pool de processos dedicado à renderização de gráficos.
+
+    Tira o trabalho de CPU do worker HTTP e limita a fila: com
+    ``max_pendentes`` renderizações em curso, novos pedidos são recusados na
+    hora (GraficoOcupado) em vez de disputar CPU com os endpoints de pagamento.
+    """
+
+    def __init__(self, processos=GRAFICO_PROCESSOS, max_pendentes=GRAFICO_MAX_PENDENTES,
+                 timeout=GRAFICO_TIMEOUT):
+        self.processos = processos
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _obter_executor(self):
+        # Criado no primeiro uso (depois do fork dos workers do gunicorn)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _descartar_executor(self, executor, encerrar_processos=False):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # shutdown não interrompe uma renderização em curso: o processo travado é encerrado
+        # e o executor falha os futuros dele, o que devolve as vagas
+        processos = list((getattr(executor, "_processes", None) or {}).values()) if encerrar_processos else []
+        for processo in processos:
+            processo.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def renderizar(self, funcao, *args):
+        """
+        Executa ``funcao(*args)`` num processo do pool e aguarda o resultado.
+
+        Raises:
+            GraficoOcupado: Se a fila de renderização estiver cheia.
+            TimeoutError: Se a renderização passar de ``timeout`` segundos.
+        """
+        if not self._vagas.acquire(blocking=False):
+            raise GraficoOcupado("Fila de renderização de gráficos cheia")
+
+        executor = self._obter_executor()
+        try:
+            futuro = executor.submit(funcao, *args)
+        except BrokenProcessPool:
+            self._vagas.release()
+            self._descartar_executor(executor)
+            raise
+
+        # A vaga só é liberada quando o futuro termina (resultado, erro ou processo encerrado)
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            print(f"⚠️ Renderização passou de {self.timeout}s; encerrando os processos do pool")
+            self._descartar_executor(executor, encerrar_processos=True)
+            raise
+        except BrokenProcessPool:
+            self._descartar_executor(executor)
+            raise
+
+
+pool_renderizacao = PoolRenderizacao()
+
+
+def renderizar_grafico_linha(rotulos, valores, titulo, largura=9, altura=5):
+    """
+    Renderiza o gráfico de linha da cotação ETH/BRL em PNG no pool de processos.
+
+    Returns:
+        bytes: Imagem PNG.
+
+    Raises:
+        GraficoOcupado: Se a fila de renderização estiver cheia.
+        TimeoutError: Se a renderização passar de GRAFICO_TIMEOUT segundos.
+    """
+    return pool_renderizacao.renderizar(_desenhar_grafico_linha, list(rotulos), list(valores),
+                                        titulo, largura, altura)
+
+
+class CacheGraficos:
+    """
+    Cache LRU de imagens já renderizadas, limitado em bytes e em quantidade.
+
+    As entradas são indexadas pelo hash da série e dos parâmetros de renderização
+    (ver ``chave_grafico``); quando a série muda, a chave muda e as imagens antigas
+    deixam de ser usadas e são descartadas pela política LRU.
+    """
+
+    def __init__(self, max_bytes=GRAFICO_CACHE_MAX_BYTES, max_itens=GRAFICO_CACHE_MAX_ITENS):
+        self.max_bytes = max_bytes
+        self.max_itens = max_itens
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        self._em_andamento = {}  # chave -> threading.Event da renderização em curso
+        self._bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        with self._lock:
+            imagem = self._itens.get(chave)
+            if imagem is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return imagem
+
+    def guardar(self, chave, imagem):
+        if len(imagem) > self.max_bytes:
+            return
+        with self._lock:
+            antiga = self._itens.pop(chave, None)
+            if antiga is not None:
+                self._bytes -= len(antiga)
+            self._itens[chave] = imagem
+            self._bytes += len(imagem)
+
+            while self._itens and (self._bytes > self.max_bytes or len(self._itens) > self.max_itens):
+                _, removida = self._itens.popitem(last=False)
+                self._bytes -= len(removida)
+
+    def obter_ou_renderizar(self, chave, renderizar):
+        """
+        Retorna a imagem em cache ou renderiza e guarda.
+
+        Pedidos simultâneos da mesma chave aguardam uma única renderização.
+
+        Args:
+            chave (str): Chave calculada por ``chave_grafico``.
+            renderizar (callable): Função sem argumentos que devolve os bytes PNG.
+
+        Returns:
+            bytes: Imagem PNG.
+        """
+        while True:
+            imagem = self.obter(chave)
+            if imagem is not None:
+                return imagem
+
+            with self._lock:
+                evento = self._em_andamento.get(chave)
+                lider = evento is None
+                if lider:
+                    evento = self._em_andamento[chave] = threading.Event()
+
+            if not lider:
+                # Outra requisição já está renderizando; se ela falhar, tenta de novo
+                evento.wait()
+                continue
+
+            try:
+                imagem = renderizar()
+                self.guardar(chave, imagem)
+                return imagem
+            finally:
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+                evento.set()
+
+    def estado(self):
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_itens": self.max_itens,
+                "acertos": self.acertos,
+                "falhas": self.falhas
+            }
+
+
+# Instância compartilhada pelo processo
+cache_graficos = CacheGraficos()
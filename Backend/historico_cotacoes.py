@@ -0,0 +1,371 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+# Par de moedas gravado na tabela cotacoes
+MOEDA_ORIGEM = "ETH"
+MOEDA_DESTINO = "BRL"
+
+# Gravação em lote: quantidade máxima por INSERT e intervalo máximo entre gravações (segundos)
+COTACOES_TAMANHO_LOTE = int(os.getenv("COTACOES_TAMANHO_LOTE", "50"))
+COTACOES_INTERVALO_GRAVACAO = float(os.getenv("COTACOES_INTERVALO_GRAVACAO", "5"))
+COTACOES_FILA_MAX = int(os.getenv("COTACOES_FILA_MAX", "10000"))
+
+# Quantos dias de histórico o motor OHLC mantém em memória
+HISTORICO_DIAS = int(os.getenv("HISTORICO_DIAS", "730"))
+# Intervalo mínimo entre releituras das horas recentes no banco (segundos)
+HISTORICO_ATUALIZACAO = float(os.getenv("HISTORICO_ATUALIZACAO", "60"))
+
+# Intervalo da API -> unidade datetime64 usada para agrupar
+INTERVALOS = {"hora": "h", "dia": "D", "mes": "M"}
+
+MESES_PT = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# Série de referência (ETH em BRL, Jan-Set 2025) usada enquanto não há histórico gravado
+SERIE_MENSAL_REFERENCIA = [
+    ("Jan", 3298.26 * 5.5), ("Fev", 2237.90 * 5.5), ("Mar", 1823.48 * 5.5),
+    ("Abr", 1793.78 * 5.5), ("Mai", 2529.09 * 5.5), ("Jun", 2486.46 * 5.5),
+    ("Jul", 3696.71 * 5.5), ("Ago", 4497.18 * 5.5), ("Set", 4590.00 * 5.5),
+]
+
+SQL_INSERIR_COTACAO = text("""
+    INSERT INTO cotacoes (moeda_origem, moeda_destino, valor_cotacao, fonte, data_cotacao)
+    VALUES (:origem, :destino, :valor, :fonte, :data)
+""")
+
+# Rollup horário calculado no próprio MySQL: abertura/fechamento pelo primeiro/último
+# valor da hora, sem trazer as linhas brutas para a aplicação
+SQL_CANDLES_HORA = text("""
+    SELECT DATE_FORMAT(data_cotacao, '%Y-%m-%d %H:00:00') AS hora,
+           SUBSTRING_INDEX(GROUP_CONCAT(valor_cotacao ORDER BY data_cotacao ASC, id ASC), ',', 1) AS abertura,
+           MAX(valor_cotacao) AS maxima,
+           MIN(valor_cotacao) AS minima,
+           SUBSTRING_INDEX(GROUP_CONCAT(valor_cotacao ORDER BY data_cotacao DESC, id DESC), ',', 1) AS fechamento,
+           COUNT(*) AS amostras
+    FROM cotacoes
+    WHERE moeda_origem = :origem AND moeda_destino = :destino AND data_cotacao >= :desde
+    GROUP BY hora
+    ORDER BY hora
+""")
+
+
+def _agora_utc():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def converter_data_utc(valor):
+    """
+    Converte uma data ISO8601 para datetime UTC sem timezone (formato do banco).
+
+    Args:
+        valor (str | None): Data ISO8601; sem offset é tratada como UTC.
+
+    Returns:
+        datetime | None: Data em UTC ou None se ``valor`` for vazio.
+
+    Raises:
+        ValueError: Se o texto não estiver em ISO8601.
+    """
+    if not valor:
+        return None
+    data = datetime.fromisoformat(valor)
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data
+
+
+class Candles:
+    """Série OHLC em arrays NumPy, ordenada pelo início de cada período"""
+
+    def __init__(self, inicio, abertura, maxima, minima, fechamento, amostras):
+        self.inicio = inicio
+        self.abertura = abertura
+        self.maxima = maxima
+        self.minima = minima
+        self.fechamento = fechamento
+        self.amostras = amostras
+
+    @classmethod
+    def vazio(cls, unidade="h"):
+        return cls(np.array([], dtype=f"datetime64[{unidade}]"), *(np.array([], dtype=np.float64) for _ in range(4)),
+                   np.array([], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.inicio)
+
+    def agrupar(self, unidade):
+        """
+        Reamostra os candles para um período maior (ex.: hora -> dia).
+
+        Args:
+            unidade (str): Unidade datetime64 do novo período ("h", "D" ou "M").
+
+        Returns:
+            Candles: Nova série agregada.
+        """
+        if len(self) == 0:
+            return Candles.vazio(unidade)
+
+        chaves = self.inicio.astype(f"datetime64[{unidade}]")
+        primeiros = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+        ultimos = np.r_[primeiros[1:], len(chaves)] - 1
+
+        return Candles(
+            chaves[primeiros],
+            self.abertura[primeiros],
+            np.maximum.reduceat(self.maxima, primeiros),
+            np.minimum.reduceat(self.minima, primeiros),
+            self.fechamento[ultimos],
+            np.add.reduceat(self.amostras, primeiros),
+        )
+
+    def fatiar(self, inicio=None, fim=None):
+        """Retorna os candles com início em [inicio, fim) (busca binária)."""
+        esquerda = 0 if inicio is None else np.searchsorted(self.inicio, np.datetime64(inicio, "s"), "left")
+        direita = len(self) if fim is None else np.searchsorted(self.inicio, np.datetime64(fim, "s"), "left")
+        return Candles(self.inicio[esquerda:direita], self.abertura[esquerda:direita],
+                       self.maxima[esquerda:direita], self.minima[esquerda:direita],
+                       self.fechamento[esquerda:direita], self.amostras[esquerda:direita])
+
+    def concatenar(self, outros):
+        return Candles(np.concatenate([self.inicio, outros.inicio.astype(self.inicio.dtype)]),
+                       np.concatenate([self.abertura, outros.abertura]),
+                       np.concatenate([self.maxima, outros.maxima]),
+                       np.concatenate([self.minima, outros.minima]),
+                       np.concatenate([self.fechamento, outros.fechamento]),
+                       np.concatenate([self.amostras, outros.amostras]))
+
+    def para_lista(self):
+        return [
+            {
+                "inicio": str(self.inicio[i].astype("datetime64[s]")),
+                "abertura": float(self.abertura[i]),
+                "maxima": float(self.maxima[i]),
+                "minima": float(self.minima[i]),
+                "fechamento": float(self.fechamento[i]),
+                "amostras": int(self.amostras[i])
+            }
+            for i in range(len(self))
+        ]
+
+
+class MotorOHLC:
+    """
+    Motor de histórico de cotações com candles OHLC por hora, dia e mês.
+
+    O rollup horário é carregado do banco já agregado (uma linha por hora) e
+    os rollups diário e mensal são pré-calculados a partir dele com NumPy.
+    Consultas longas nunca leem as linhas brutas de ``cotacoes``. Apenas as
+    horas mais recentes são relidas do banco periodicamente.
+    """
+
+    def __init__(self, historico_dias=HISTORICO_DIAS, intervalo_atualizacao=HISTORICO_ATUALIZACAO):
+        self.historico_dias = historico_dias
+        self.intervalo_atualizacao = intervalo_atualizacao
+        self._engine = None
+        self._lock = threading.Lock()
+        self._rollups = {unidade: Candles.vazio(unidade) for unidade in INTERVALOS.values()}
+        self._carregado = False
+        self._proxima_leitura = 0.0
+        self.versao = 0
+
+    def configurar(self, engine):
+        """Define a engine SQLAlchemy usada para ler a tabela cotacoes."""
+        self._engine = engine
+
+    def marcar_desatualizado(self):
+        """Força a releitura das horas recentes na próxima consulta."""
+        self._proxima_leitura = 0.0
+
+    def candles(self, inicio=None, fim=None, intervalo="dia"):
+        """
+        Retorna candles OHLC do par ETH/BRL.
+
+        Args:
+            inicio (datetime, opcional): Início do intervalo (UTC, inclusivo).
+            fim (datetime, opcional): Fim do intervalo (UTC, exclusivo).
+            intervalo (str): "hora", "dia" ou "mes".
+
+        Returns:
+            Candles: Série OHLC do período pedido.
+
+        Raises:
+            ValueError: Se o intervalo não for suportado.
+        """
+        if intervalo not in INTERVALOS:
+            raise ValueError(f"Intervalo inválido: {intervalo}. Use: {', '.join(INTERVALOS)}")
+
+        self._garantir_atualizado()
+        return self._rollups[INTERVALOS[intervalo]].fatiar(inicio, fim)
+
+    def _garantir_atualizado(self):
+        if self._engine is None or time.monotonic() < self._proxima_leitura:
+            return
+
+        with self._lock:
+            if time.monotonic() < self._proxima_leitura:
+                return
+            self._proxima_leitura = time.monotonic() + self.intervalo_atualizacao
+
+            if self._carregado:
+                # Só as horas recentes podem ter recebido cotações novas
+                desde = _agora_utc().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+            else:
+                desde = _agora_utc() - timedelta(days=self.historico_dias)
+
+            try:
+                novas = self._ler_candles_hora(desde)
+            except Exception as e:
+                print(f"⚠️ Erro ao carregar histórico de cotações: {e}")
+                return
+
+            horas = self._rollups["h"].fatiar(fim=desde).concatenar(novas)
+            self._rollups = {
+                "h": horas,
+                "D": horas.agrupar("D"),
+                "M": horas.agrupar("M"),
+            }
+            self._carregado = True
+            self.versao += 1
+
+    def _ler_candles_hora(self, desde):
+        with self._engine.connect() as conn:
+            linhas = conn.execute(SQL_CANDLES_HORA, {
+                "origem": MOEDA_ORIGEM, "destino": MOEDA_DESTINO, "desde": desde
+            }).fetchall()
+
+        if not linhas:
+            return Candles.vazio("h")
+
+        return Candles(
+            np.array([linha.hora for linha in linhas], dtype="datetime64[h]"),
+            np.array([float(linha.abertura) for linha in linhas]),
+            np.array([float(linha.maxima) for linha in linhas]),
+            np.array([float(linha.minima) for linha in linhas]),
+            np.array([float(linha.fechamento) for linha in linhas]),
+            np.array([int(linha.amostras) for linha in linhas], dtype=np.int64),
+        )
+
+
+class GravadorCotacoes:
+    """
+    Grava as cotações obtidas na tabela cotacoes em lotes, fora do caminho da requisição.
+
+    As cotações entram numa fila em memória e uma thread em background faz um
+    único INSERT multi-linha a cada ``intervalo`` segundos ou ``tamanho_lote`` itens.
+    """
+
+    def __init__(self, tamanho_lote=COTACOES_TAMANHO_LOTE, intervalo=COTACOES_INTERVALO_GRAVACAO,
+                 fila_max=COTACOES_FILA_MAX, motor=None):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.motor = motor
+        self._engine = None
+        self._fila = queue.Queue(maxsize=fila_max)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def configurar(self, engine):
+        """Define a engine SQLAlchemy usada para gravar na tabela cotacoes."""
+        self._engine = engine
+        atexit.register(self.descarregar)
+
+    def registrar(self, resultado):
+        """
+        Enfileira uma cotação para gravação (ouvinte do CotacaoCache).
+
+        Args:
+            resultado (ResultadoCotacao): Cotação obtida de uma fonte externa.
+        """
+        if self._engine is None:
+            return
+        try:
+            self._fila.put_nowait({
+                "origem": MOEDA_ORIGEM,
+                "destino": MOEDA_DESTINO,
+                "valor": resultado.valor,
+                "fonte": resultado.fonte,
+                "data": _agora_utc()
+            })
+        except queue.Full:
+            print("⚠️ Fila de cotações cheia: cotação descartada")
+            return
+        self._iniciar_thread()
+
+    def _iniciar_thread(self):
+        # Iniciada no primeiro uso para não atravessar o fork dos workers
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="gravador-cotacoes", daemon=True)
+                self._thread.start()
+
+    def _executar(self):
+        while True:
+            lote = [self._fila.get()]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._gravar(lote)
+
+    def descarregar(self):
+        """Grava imediatamente tudo o que estiver na fila."""
+        lote = []
+        while True:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        if lote:
+            self._gravar(lote)
+
+    def _gravar(self, lote):
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(SQL_INSERIR_COTACAO, lote)
+            if self.motor is not None:
+                self.motor.marcar_desatualizado()
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar {len(lote)} cotações: {e}")
+
+
+def serie_mensal(meses=9):
+    """
+    Série mensal (fechamento de cada mês) para o gráfico ETH/BRL.
+
+    Args:
+        meses (int): Quantidade de meses mais recentes.
+
+    Returns:
+        tuple[list[str], list[float], str]: Rótulos, valores e título do gráfico.
+        Sem histórico gravado, devolve a série de referência de 2025.
+    """
+    candles = motor_ohlc.candles(intervalo="mes")
+    if len(candles) == 0:
+        rotulos, valores = zip(*SERIE_MENSAL_REFERENCIA)
+        return list(rotulos), list(valores), "Ethereum (ETH) em BRL - Janeiro a Setembro 2025"
+
+    candles = candles.fatiar(inicio=candles.inicio[max(0, len(candles) - meses)])
+    rotulos = []
+    for inicio in candles.inicio:
+        ano, mes = int(str(inicio)[:4]), int(str(inicio)[5:7])
+        rotulos.append(f"{MESES_PT[mes - 1]}/{ano % 100:02d}")
+    return rotulos, candles.fechamento.tolist(), f"Ethereum (ETH) em BRL - últimos {len(rotulos)} meses"
+
+
+# Instâncias compartilhadas pelo processo
+motor_ohlc = MotorOHLC()
+gravador_cotacoes = GravadorCotacoes(motor=motor_ohlc)
@@ -0,0 +1,370 @@
+import argparse
+import os
+import threading
+
+from sqlalchemy import text
+from web3 import Web3
+
+from Backend.my_blockchain import w3, etherFlow, sistema_cliente
+from Backend.leitura_blockchain import leitor_blockchain
+from Backend.rastreador_recibos import hash_0x
+from Backend.thread_background import ThreadBackground
+
+# Blocos por eth_getLogs (reduzido pela metade automaticamente se o nó recusar o intervalo)
+INDEXADOR_BLOCOS_POR_CONSULTA = int(os.getenv("INDEXADOR_BLOCOS_POR_CONSULTA", "2000"))
+# Intervalo (segundos) entre rodadas da thread de indexação
+INDEXADOR_INTERVALO = float(os.getenv("INDEXADOR_INTERVALO", "5"))
+# Blocos de distância da ponta da chain antes de indexar (0 no Ganache, que não reorganiza)
+INDEXADOR_CONFIRMACOES = int(os.getenv("INDEXADOR_CONFIRMACOES", "0"))
+# Primeiro bloco indexado quando ainda não há checkpoint (bloco do deploy dos contratos)
+INDEXADOR_BLOCO_INICIAL = int(os.getenv("INDEXADOR_BLOCO_INICIAL", "0"))
+
+CHAVE_CHECKPOINT = "indexador_eventos_ultimo_bloco"
+# Hash do bloco do checkpoint: identifica a chain indexada (Ganache reiniciado ou snapshot revertido
+# tem outro bloco nesse número, mesmo que a chain nova já tenha passado do checkpoint)
+CHAVE_CHECKPOINT_HASH = "indexador_eventos_ultimo_bloco_hash"
+# Trava do MySQL: só um processo indexa por vez, os demais workers pulam a rodada
+NOME_TRAVA = "c2r_indexador_eventos"
+
+SQL_LER_CHECKPOINT = text("""
+    SELECT chave, valor FROM configuracoes_sistema WHERE chave IN (:chave, :chave_hash)
+""")
+
+SQL_GRAVAR_CHECKPOINT = text("""
+    INSERT INTO configuracoes_sistema (chave, valor, descricao)
+    VALUES (:chave, :valor, :descricao)
+    ON DUPLICATE KEY UPDATE valor = VALUES(valor)
+""")
+
+# Idempotente: a linha PENDENTE gravada pelo endpoint (ou por uma rodada anterior) só é completada
+SQL_INSERIR_EVENTO = text("""
+    INSERT INTO transacoes (hash_transacao, tipo_transacao, cliente_id, referencia_pix, valor_wei, valor_ether,
+                            taxa_ong_wei, taxa_ong_ether, status_transacao, block_number, data_transacao,
+                            observacoes)
+    VALUES (:hash, :tipo, (SELECT id FROM cliente WHERE carteira = :pagador), :referencia_pix, :valor_wei,
+            :valor_ether, :taxa_ong_wei, :taxa_ong_ether, 'CONFIRMADA', :bloco, FROM_UNIXTIME(:timestamp),
+            :observacoes)
+    ON DUPLICATE KEY UPDATE
+        status_transacao = 'CONFIRMADA',
+        block_number = VALUES(block_number),
+        cliente_id = COALESCE(cliente_id, VALUES(cliente_id)),
+        referencia_pix = COALESCE(referencia_pix, VALUES(referencia_pix)),
+        taxa_ong_wei = VALUES(taxa_ong_wei),
+        taxa_ong_ether = VALUES(taxa_ong_ether),
+        observacoes = COALESCE(observacoes, VALUES(observacoes))
+""")
+
+SQL_MARCAR_REGISTRADO = text("UPDATE cliente SET registrado = TRUE WHERE carteira = :carteira")
+
+SQL_TRAVAR = text("SELECT GET_LOCK(:nome, 0)")
+SQL_LIBERAR = text("SELECT RELEASE_LOCK(:nome)")
+
+# Eventos indexados por contrato; a prioridade decide qual evento vira a linha quando a mesma
+# transação emite mais de um (PagamentoRecebido tem os detalhes de pagamentoRealizado e mais)
+EVENTOS_INDEXADOS = (
+    (etherFlow, "PagamentoRecebido", 2),
+    (etherFlow, "pagamentoRealizado", 1),
+    (etherFlow, "doacaoRealizada", 2),
+    (sistema_cliente, "TransferenciaETH", 2),
+    (sistema_cliente, "novoClienteRegistrado", 0),
+)
+
+
+def _ether(valor_wei):
+    return round(Web3.from_wei(valor_wei, "ether"), 8)
+
+
+class IndexadorEventos:
+    """
+    Copia os eventos dos contratos etherFlow e SistemaCliente para a tabela transacoes.
+
+    Lê os logs em intervalos de blocos (um eth_getLogs por intervalo para os
+    dois contratos), decodifica e grava todas as linhas do intervalo numa
+    única transação do banco junto com o checkpoint, então uma falha no meio
+    recomeça do último intervalo gravado. Cada linha usa o hash da transação
+    como chave: reindexar um intervalo (backfill, reinício) não duplica nada e
+    apenas confirma as linhas que o endpoint gravou como PENDENTE.
+    """
+
+    def __init__(self, w3, leitor, eventos=EVENTOS_INDEXADOS, blocos_por_consulta=INDEXADOR_BLOCOS_POR_CONSULTA,
+                 intervalo=INDEXADOR_INTERVALO, confirmacoes=INDEXADOR_CONFIRMACOES,
+                 bloco_inicial=INDEXADOR_BLOCO_INICIAL):
+        self.w3 = w3
+        self.leitor = leitor
+        self.blocos_por_consulta = blocos_por_consulta
+        self.intervalo = intervalo
+        self.confirmacoes = confirmacoes
+        self.bloco_inicial = bloco_inicial
+        self._engine = None
+        self._lock = threading.Lock()
+        self._thread = ThreadBackground("indexador-eventos", self.indexar, lambda: self.intervalo,
+                                        "indexar eventos dos contratos")
+        self._enderecos = sorted({contrato.address for contrato, _, _ in eventos})
+        # (endereço do contrato, topic0) -> (evento, prioridade)
+        self._eventos = {}
+        for contrato, nome, prioridade in eventos:
+            evento = contrato.events[nome]
+            self._eventos[(contrato.address.lower(), evento.topic)] = (evento, prioridade)
+
+    def configurar(self, engine):
+        """Define a engine SQLAlchemy usada para gravar eventos e checkpoint."""
+        self._engine = engine
+
+    # ---------- leitura dos logs ----------
+
+    def _logs(self, de, ate):
+        """Logs dos contratos no intervalo; divide o intervalo se o nó recusar (limite de resultados)."""
+        try:
+            return self.w3.eth.get_logs({"fromBlock": de, "toBlock": ate, "address": self._enderecos})
+        except Exception as e:
+            if ate <= de:
+                raise
+            meio = (de + ate) // 2
+            print(f"⚠️ eth_getLogs de {de} a {ate} falhou ({e}); dividindo o intervalo")
+            return self._logs(de, meio) + self._logs(meio + 1, ate)
+
+    def _decodificar(self, logs):
+        eventos = []
+        for log in logs:
+            topics = log.get("topics") or []
+            if not topics:
+                continue
+            chave = (log["address"].lower(), topics[0].to_0x_hex())
+            if chave in self._eventos:
+                evento, prioridade = self._eventos[chave]
+                eventos.append((evento.process_log(log), prioridade))
+        return eventos
+
+    def _timestamps(self, blocos):
+        """Timestamp de cada bloco, lidos num único lote JSON-RPC."""
+        blocos = sorted(blocos)
+        resultados, _ = self.leitor.executar([lambda b=bloco: self.w3.eth.get_block(b) for bloco in blocos])
+        return {bloco: resultado["timestamp"] for bloco, resultado in zip(blocos, resultados)}
+
+    # ---------- eventos -> linhas ----------
+
+    @staticmethod
+    def _linha(evento):
+        args = evento.args
+        base = {
+            "hash": hash_0x(evento.transactionHash),
+            "bloco": evento.blockNumber,
+            "timestamp": None,
+            "referencia_pix": None,
+            "taxa_ong_wei": 0,
+            "taxa_ong_ether": 0
+        }
+        if evento.event == "PagamentoRecebido":
+            return {
+                **base,
+                "tipo": "TRANSFERENCIA",
+                "pagador": args.pagador,
+                "referencia_pix": args.referenciaPix,
+                "valor_wei": args.valorTotal,
+                "valor_ether": _ether(args.valorTotal),
+                "taxa_ong_wei": args.valorParaOng,
+                "taxa_ong_ether": _ether(args.valorParaOng),
+                "timestamp": args.timestamp,
+                "observacoes": f"Destino {args.clienteDestino} ({args.nomeCliente}): {args.valorCliente} wei, "
+                               f"comissão {args.valorComissao} wei"
+            }
+        if evento.event == "pagamentoRealizado":
+            return {
+                **base,
+                "tipo": "PAGAMENTO",
+                "pagador": args.carteira,
+                "referencia_pix": args.referenciaPix,
+                "valor_wei": args.valor,
+                "valor_ether": _ether(args.valor),
+                "observacoes": None
+            }
+        if evento.event == "doacaoRealizada":
+            return {
+                **base,
+                "tipo": "PAGAMENTO",
+                "pagador": args.doador,
+                "valor_wei": args.valor,
+                "valor_ether": _ether(args.valor),
+                "observacoes": f"Doação para ONG de {args.nomeDoador} ({args.emailDoador})"
+            }
+        if evento.event == "TransferenciaETH":
+            return {
+                **base,
+                "tipo": "TRANSFERENCIA",
+                "pagador": args.origem,
+                "valor_wei": args.valor,
+                "valor_ether": _ether(args.valor),
+                "observacoes": f"Transferência direta para {args.destino}"
+            }
+        return None
+
+    def _montar(self, eventos):
+        """
+        Linhas da tabela transacoes e carteiras registradas a partir dos eventos decodificados.
+
+        Returns:
+            tuple[list[dict], list[str]]: Uma linha por transação e as carteiras de novoClienteRegistrado.
+        """
+        linhas = {}  # hash -> (prioridade, linha)
+        registrados = []
+        for evento, prioridade in eventos:
+            if evento.event == "novoClienteRegistrado":
+                registrados.append(evento.args.carteira)
+                continue
+            linha = self._linha(evento)
+            atual = linhas.get(linha["hash"])
+            if atual is None or prioridade > atual[0]:
+                linhas[linha["hash"]] = (prioridade, linha)
+
+        linhas = [linha for _, linha in linhas.values()]
+        sem_timestamp = {linha["bloco"] for linha in linhas if linha["timestamp"] is None}
+        if sem_timestamp:
+            timestamps = self._timestamps(sem_timestamp)
+            for linha in linhas:
+                if linha["timestamp"] is None:
+                    linha["timestamp"] = timestamps[linha["bloco"]]
+        return linhas, registrados
+
+    # ---------- gravação ----------
+
+    def _checkpoint(self, conn):
+        """
+        Returns:
+            tuple[int, str | None]: Último bloco indexado e o hash dele (None em checkpoints antigos).
+        """
+        valores = dict(conn.execute(SQL_LER_CHECKPOINT, {
+            "chave": CHAVE_CHECKPOINT, "chave_hash": CHAVE_CHECKPOINT_HASH
+        }).fetchall())
+        if valores.get(CHAVE_CHECKPOINT) is None:
+            return self.bloco_inicial - 1, None
+        return int(valores[CHAVE_CHECKPOINT]), valores.get(CHAVE_CHECKPOINT_HASH)
+
+    def _hash_bloco(self, numero):
+        return self.w3.eth.get_block(numero)["hash"].to_0x_hex()
+
+    def _mesma_chain(self, checkpoint, hash_checkpoint, ultimo):
+        """O bloco do checkpoint ainda existe no nó com o mesmo hash."""
+        if checkpoint > ultimo:
+            return False
+        if hash_checkpoint is None or checkpoint < 0:
+            return True
+        return self._hash_bloco(checkpoint) == hash_checkpoint
+
+    def _processar(self, conn, de, ate, salvar_checkpoint):
+        linhas, registrados = self._montar(self._decodificar(self._logs(de, ate)))
+        if linhas:
+            conn.execute(SQL_INSERIR_EVENTO, linhas)
+        if registrados:
+            conn.execute(SQL_MARCAR_REGISTRADO, [{"carteira": carteira} for carteira in registrados])
+        if salvar_checkpoint:
+            conn.execute(SQL_GRAVAR_CHECKPOINT, [
+                {"chave": CHAVE_CHECKPOINT, "valor": str(ate),
+                 "descricao": "Último bloco com eventos copiados para a tabela transacoes"},
+                {"chave": CHAVE_CHECKPOINT_HASH, "valor": self._hash_bloco(ate),
+                 "descricao": "Hash do último bloco indexado (detecta chain reiniciada ou revertida)"}
+            ])
+        # Linhas e checkpoint entram juntos: uma falha antes daqui reprocessa o intervalo inteiro
+        conn.commit()
+        return len(linhas)
+
+    def _percorrer(self, conn, de, ate, salvar_checkpoint):
+        total = 0
+        for inicio in range(de, ate + 1, self.blocos_por_consulta):
+            fim = min(inicio + self.blocos_por_consulta - 1, ate)
+            total += self._processar(conn, inicio, fim, salvar_checkpoint)
+        return total
+
+    def _com_trava(self, trabalho):
+        if self._engine is None:
+            return 0
+        with self._engine.connect() as conn:
+            if not conn.execute(SQL_TRAVAR, {"nome": NOME_TRAVA}).scalar():
+                conn.rollback()
+                return 0
+            try:
+                return trabalho(conn)
+            finally:
+                conn.rollback()
+                conn.execute(SQL_LIBERAR, {"nome": NOME_TRAVA})
+                conn.commit()
+
+    def indexar(self):
+        """
+        Indexa do bloco seguinte ao checkpoint até a ponta da chain (menos ``confirmacoes``).
+
+        Returns:
+            int: Quantidade de transações gravadas nesta rodada (0 se outro processo está indexando).
+        """
+        def trabalho(conn):
+            ultimo = self.w3.eth.block_number - self.confirmacoes
+            checkpoint, hash_checkpoint = self._checkpoint(conn)
+            if not self._mesma_chain(checkpoint, hash_checkpoint, ultimo):
+                # Nó reiniciado ou revertido para um snapshot: a gravação é idempotente, recomeça do início
+                print(f"🔁 Bloco {checkpoint} do checkpoint não é mais o mesmo na chain; "
+                      f"reindexando desde o bloco inicial")
+                checkpoint = self.bloco_inicial - 1
+            if checkpoint >= ultimo:
+                return 0
+            total = self._percorrer(conn, checkpoint + 1, ultimo, salvar_checkpoint=True)
+            if total:
+                print(f"📚 Indexador: {total} transações dos blocos {checkpoint + 1} a {ultimo}")
+            return total
+
+        return self._com_trava(trabalho)
+
+    def backfill(self, de_bloco=None, ate_bloco=None):
+        """
+        Reindexa um intervalo de blocos sem mexer no checkpoint (ex.: histórico anterior ao indexador).
+
+        Args:
+            de_bloco (int, opcional): Primeiro bloco (padrão: INDEXADOR_BLOCO_INICIAL).
+            ate_bloco (int, opcional): Último bloco (padrão: ponta da chain).
+
+        Returns:
+            int: Quantidade de transações gravadas.
+
+        Raises:
+            RuntimeError: Se o banco não estiver configurado ou outro processo estiver indexando.
+        """
+        if self._engine is None:
+            raise RuntimeError("Indexador sem banco configurado")
+        de_bloco = self.bloco_inicial if de_bloco is None else de_bloco
+        ate_bloco = self.w3.eth.block_number if ate_bloco is None else ate_bloco
+        executou = []
+
+        def trabalho(conn):
+            executou.append(True)
+            return self._percorrer(conn, de_bloco, ate_bloco, salvar_checkpoint=False)
+
+        total = self._com_trava(trabalho)
+        if not executou:
+            raise RuntimeError("Outro processo está indexando; tente novamente")
+        print(f"📚 Backfill: {total} transações dos blocos {de_bloco} a {ate_bloco}")
+        return total
+
+    def iniciar(self):
+        """Inicia a thread de indexação."""
+        self._thread.iniciar()
+
+
+# Instância compartilhada pelo processo
+indexador_eventos = IndexadorEventos(w3, leitor_blockchain)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copia os eventos dos contratos para a tabela transacoes")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Reindexa o intervalo --de/--ate sem alterar o checkpoint")
+    parser.add_argument("--de", type=int, default=None, help="Primeiro bloco do backfill")
+    parser.add_argument("--ate", type=int, default=None, help="Último bloco do backfill")
+    args = parser.parse_args()
+
+    from Backend.app import app, db
+
+    with app.app_context():
+        indexador_eventos.configurar(db.engine)
+        if args.backfill:
+            indexador_eventos.backfill(args.de, args.ate)
+        else:
+            total = indexador_eventos.indexar()
+            print(f"✅ {total} transações indexadas")
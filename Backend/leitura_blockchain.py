@@ -0,0 +1,329 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from web3 import Web3
+
+from Backend.my_blockchain import w3, sistema_cliente
+
+# Requisições por lote JSON-RPC e threads do modo concorrente (quando o nó não aceita lotes)
+LEITURA_TAMANHO_LOTE = int(os.getenv("LEITURA_TAMANHO_LOTE", "200"))
+LEITURA_MAX_THREADS = int(os.getenv("LEITURA_MAX_THREADS", "8"))
+# Depois de concluir que o nó não aceita lotes, tenta lotes de novo após esse tempo (segundos)
+LEITURA_LOTE_NOVA_TENTATIVA = float(os.getenv("LEITURA_LOTE_NOVA_TENTATIVA", "300"))
+
+
+@dataclass
+class EstadoConta:
+    endereco: str
+    saldo_wei: int
+    registrado: bool = None  # None quando o registro no contrato não foi consultado
+
+    @property
+    def saldo_ether(self):
+        return float(Web3.from_wei(self.saldo_wei, "ether"))
+
+    def para_dict(self):
+        return {
+            "endereco": self.endereco,
+            "saldo_wei": self.saldo_wei,
+            "saldo_ether": self.saldo_ether,
+            "registrado": self.registrado
+        }
+
+
+@dataclass
+class SnapshotContas:
+    """Saldos (e registro no contrato) de várias contas lidos de uma vez."""
+    bloco: int
+    contas: list = field(default_factory=list)
+    modo: str = "lote"  # "lote" (JSON-RPC batch) ou "concorrente" (threads)
+    duracao_ms: float = 0.0
+
+    def por_endereco(self):
+        return {conta.endereco: conta for conta in self.contas}
+
+    def para_dict(self):
+        return {
+            "bloco": self.bloco,
+            "modo": self.modo,
+            "duracao_ms": round(self.duracao_ms, 2),
+            "contas": [conta.para_dict() for conta in self.contas]
+        }
+
+
+class Leitura:
+    """Resultado de uma chamada de um LoteLeitura (preenchido por ``executar``)."""
+
+    def __init__(self, chamada, depois=None):
+        self.chamada = chamada
+        self.depois = depois
+        self.valor = None
+        self.erro = None
+
+    @classmethod
+    def resolvida(cls, valor):
+        """Leitura já respondida sem ir ao nó (ex.: valor de um cache)."""
+        leitura = cls(None)
+        leitura.valor = valor
+        return leitura
+
+    @property
+    def ok(self):
+        return self.erro is None
+
+    def resultado(self):
+        """Valor já decodificado (tipos do ABI); relança o erro da chamada, se houve."""
+        if self.erro is not None:
+            raise self.erro
+        return self.valor
+
+
+class LoteLeitura:
+    """
+    Leituras independentes de uma requisição, executadas numa única ida ao nó.
+
+    Exemplo::
+
+        lote = leitor_blockchain.lote()
+        origem = lote.chamar(sistema_cliente.functions.getEnderecoPorPix(pix))
+        saldo = lote.saldo(endereco)
+        lote.executar()
+        origem.resultado(), saldo.resultado()
+
+    Um revert derruba o lote JSON-RPC inteiro; nesse caso as chamadas são
+    refeitas em paralelo e o erro fica só na leitura que falhou.
+    """
+
+    def __init__(self, leitor):
+        self.leitor = leitor
+        self._leituras = []
+
+    def _adicionar(self, chamada, depois=None):
+        leitura = Leitura(chamada, depois)
+        self._leituras.append(leitura)
+        return leitura
+
+    def chamar(self, funcao, depois=None):
+        """
+        Função de contrato (view) já com os argumentos.
+
+        Args:
+            depois (callable, opcional): Recebe o valor lido quando a chamada dá certo (ex.: guardar em cache).
+        """
+        return self._adicionar(lambda: funcao, depois)
+
+    def saldo(self, endereco):
+        return self._adicionar(lambda: self.leitor.w3.eth.get_balance(endereco))
+
+    def bloco(self):
+        return self._adicionar(lambda: self.leitor.w3.eth.get_block_number())
+
+    def executar(self):
+        """
+        Executa todas as leituras adicionadas.
+
+        Returns:
+            str: Modo usado ("lote" ou "concorrente").
+        """
+        modo = self._executar()
+        for leitura in self._leituras:
+            if leitura.depois is not None and leitura.ok:
+                leitura.depois(leitura.valor)
+        return modo
+
+    def _executar(self):
+        chamadas = [leitura.chamada for leitura in self._leituras]
+        if not chamadas:
+            return "lote"
+
+        if self.leitor.lote_suportado:
+            try:
+                for leitura, valor in zip(self._leituras, self.leitor._executar_em_lote(chamadas)):
+                    leitura.valor = valor
+                return "lote"
+            except Exception:
+                pass
+
+        def executar_uma(leitura):
+            try:
+                leitura.valor = self.leitor._executar_uma(leitura.chamada)
+            except Exception as e:
+                leitura.erro = e
+
+        with ThreadPoolExecutor(max_workers=min(self.leitor.max_threads, len(chamadas))) as executor:
+            list(executor.map(executar_uma, self._leituras))
+        if self.leitor.lote_suportado and all(leitura.ok for leitura in self._leituras):
+            # Todas funcionam avulsas: quem falhou foi o lote, não uma das chamadas
+            print("⚠️ Lote JSON-RPC não suportado pelo nó; usando chamadas concorrentes por um tempo")
+            self.leitor.lote_suportado = False
+        return "concorrente"
+
+
+class LeitorBlockchain:
+    """
+    Camada de leitura em lote do nó.
+
+    Junta as consultas (eth_getBalance, ClienteRegistrado, eth_blockNumber) em
+    lotes JSON-RPC, então dezenas de contas custam uma única ida e volta. Se o
+    provider ou o nó não aceitar lotes, faz as mesmas chamadas em paralelo com
+    no máximo ``max_threads`` conexões.
+
+    Um lote que falha só desliga os lotes se todas as chamadas funcionarem
+    avulsas (aí quem falhou foi o lote, não o nó ou uma chamada), e mesmo
+    assim só por ``nova_tentativa`` segundos: uma queda passageira do nó não
+    deixa o worker sem lotes pelo resto da vida.
+    """
+
+    def __init__(self, w3, contrato_clientes=None, tamanho_lote=LEITURA_TAMANHO_LOTE,
+                 max_threads=LEITURA_MAX_THREADS, nova_tentativa=LEITURA_LOTE_NOVA_TENTATIVA):
+        self.w3 = w3
+        self.contrato_clientes = contrato_clientes
+        self.tamanho_lote = tamanho_lote
+        self.max_threads = max_threads
+        self.nova_tentativa = nova_tentativa
+        self._lote_recusado_ate = 0.0
+
+    @property
+    def lote_suportado(self):
+        return time.monotonic() >= self._lote_recusado_ate
+
+    @lote_suportado.setter
+    def lote_suportado(self, suportado):
+        self._lote_recusado_ate = 0.0 if suportado else time.monotonic() + self.nova_tentativa
+
+    def _chamadas(self, enderecos, com_registro):
+        # Cada chamada é uma função sem argumentos que devolve o "pedido" (ou o resultado, fora do lote).
+        # O método precisa ser acessado dentro do lote: o web3 decide no acesso se executa ou enfileira.
+        chamadas = [lambda: self.w3.eth.get_block_number()]
+        for endereco in enderecos:
+            chamadas.append(lambda e=endereco: self.w3.eth.get_balance(e))
+            if com_registro:
+                chamadas.append(lambda e=endereco: self.contrato_clientes.functions.ClienteRegistrado(e))
+        return chamadas
+
+    @staticmethod
+    def _executar_uma(chamada):
+        resultado = chamada()
+        return resultado.call() if hasattr(resultado, "call") else resultado
+
+    def _executar_em_lote(self, chamadas):
+        resultados = []
+        for inicio in range(0, len(chamadas), self.tamanho_lote):
+            with self.w3.batch_requests() as lote:
+                for chamada in chamadas[inicio:inicio + self.tamanho_lote]:
+                    lote.add(chamada())
+                resultados.extend(lote.execute())
+        return resultados
+
+    def _executar_concorrente(self, chamadas):
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            return list(executor.map(self._executar_uma, chamadas))
+
+    def executar(self, chamadas):
+        """
+        Executa as chamadas em lote JSON-RPC ou, se não houver suporte, em paralelo.
+
+        Returns:
+            tuple[list, str]: Resultados na ordem das chamadas e o modo usado.
+        """
+        if not self.lote_suportado:
+            return self._executar_concorrente(chamadas), "concorrente"
+
+        try:
+            return self._executar_em_lote(chamadas), "lote"
+        except Exception as e:
+            print(f"⚠️ Lote JSON-RPC falhou ({e}); usando chamadas concorrentes")
+
+        def executar_uma(chamada):
+            try:
+                return self._executar_uma(chamada), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            respostas = list(executor.map(executar_uma, chamadas))
+        erros = [erro for _, erro in respostas if erro is not None]
+        if erros:
+            # Falha do nó ou de uma chamada, não do lote: continua usando lotes
+            raise erros[0]
+        print(f"⚠️ Lote JSON-RPC não suportado pelo nó; chamadas concorrentes pelos próximos "
+              f"{int(self.nova_tentativa)}s")
+        self.lote_suportado = False
+        return [valor for valor, _ in respostas], "concorrente"
+
+    def lote(self):
+        """Novo LoteLeitura para juntar as leituras de uma requisição."""
+        return LoteLeitura(self)
+
+    def snapshot(self, enderecos, com_registro=True):
+        """
+        Lê saldo (e registro no contrato) de várias contas de uma vez.
+
+        Args:
+            enderecos (list[str]): Endereços das contas.
+            com_registro (bool): Também consulta ``ClienteRegistrado`` de cada conta.
+
+        Returns:
+            SnapshotContas: Estado das contas, na ordem recebida.
+        """
+        com_registro = com_registro and self.contrato_clientes is not None
+        inicio = time.perf_counter()
+        resultados, modo = self.executar(self._chamadas(enderecos, com_registro))
+
+        passo = 2 if com_registro else 1
+        contas = [
+            EstadoConta(
+                endereco=endereco,
+                saldo_wei=int(resultados[1 + i * passo]),
+                registrado=bool(resultados[2 + i * passo]) if com_registro else None
+            )
+            for i, endereco in enumerate(enderecos)
+        ]
+        return SnapshotContas(
+            bloco=int(resultados[0]),
+            contas=contas,
+            modo=modo,
+            duracao_ms=(time.perf_counter() - inicio) * 1000
+        )
+
+    def _recibos_brutos(self, tx_hashes):
+        pedidos = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        if self.lote_suportado:
+            try:
+                respostas = self.w3.provider.make_batch_request(pedidos)
+                if isinstance(respostas, list):
+                    return [resposta.get("result") for resposta in sorted(respostas, key=lambda r: r["id"])]
+                print(f"⚠️ Lote JSON-RPC recusado ({respostas}); usando chamadas concorrentes")
+            except Exception as e:
+                print(f"⚠️ Lote JSON-RPC falhou ({e}); usando chamadas concorrentes")
+
+        def consultar(pedido):
+            return self.w3.provider.make_request(*pedido).get("result")
+
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            return list(executor.map(consultar, pedidos))
+
+    def recibos(self, tx_hashes):
+        """
+        Consulta os recibos de várias transações de uma vez.
+
+        Usa o JSON-RPC cru: no lote do web3 um único recibo ainda inexistente
+        derruba o lote inteiro (TransactionNotFound).
+
+        Args:
+            tx_hashes (list[str]): Hashes "0x..." das transações.
+
+        Returns:
+            dict: Hash -> recibo (dict com os campos crus do nó) ou None se ainda não minerada.
+        """
+        resultados = {}
+        for inicio in range(0, len(tx_hashes), self.tamanho_lote):
+            lote = tx_hashes[inicio:inicio + self.tamanho_lote]
+            resultados.update(zip(lote, self._recibos_brutos(lote)))
+        return resultados
+
+
+# Instância compartilhada pelo processo
+leitor_blockchain = LeitorBlockchain(w3, sistema_cliente)
@@ -1,8 +1,10 @@
 import os
+import threading
 
 from eth_account import Account
 from web3 import Web3
 from dotenv import load_dotenv
+from Backend.provedor_web3 import criar_web3
 from Backend.deploy_output import sistema_cliente_address, etherFlow_address, sistema_cliente_abi, etherFlow_abi
 
 load_dotenv("configurations.env")
@@ -10,17 +12,63 @@ load_dotenv("configurations.env")
 GANACHE_URL = os.getenv("GANACHE_URL")
 PRIVATE_KEY = os.getenv('PRIVATEKEY')
 
-w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+# Criar o provider e os contratos não faz nenhuma chamada de rede
+# (transporte, pool de conexões e timeouts em Backend.provedor_web3)
+w3 = criar_web3(GANACHE_URL)
 
-account = w3.eth.accounts
+etherFlow = w3.eth.contract(address=etherFlow_address, abi=etherFlow_abi)
+sistema_cliente = w3.eth.contract(address=sistema_cliente_address, abi=sistema_cliente_abi)
 
-admWallet = account[0]  # conta admin
-merchantWallet = account[1] # conta comerciante
-ongWallet = account[2]  # conta ONG
+# Carteiras fixas podem vir do ambiente para evitar a consulta ao nó
+_CARTEIRAS_AMBIENTE = {
+    "admWallet": os.getenv("ADM_WALLET"),
+    "merchantWallet": os.getenv("MERCHANT_WALLET"),
+    "ongWallet": os.getenv("ONG_WALLET"),
+}
+_INDICES_CARTEIRAS = {
+    "admWallet": 0,  # conta admin
+    "merchantWallet": 1,  # conta comerciante
+    "ongWallet": 2,  # conta ONG
+}
 
-# Criar nova conta para comerciante
-nova_conta = Account.create()
-private_key_comerciante = nova_conta.key.hex()
+_lock = threading.Lock()
 
-etherFlow = w3.eth.contract(address=etherFlow_address, abi=etherFlow_abi)
-sistema_cliente = w3.eth.contract(address=sistema_cliente_address, abi=sistema_cliente_abi)
+
+def _resolver(nome):
+    if nome == "account":
+        return w3.eth.accounts
+
+    if nome in _INDICES_CARTEIRAS:
+        if _CARTEIRAS_AMBIENTE[nome]:
+            return Web3.to_checksum_address(_CARTEIRAS_AMBIENTE[nome])
+        if nome == "admWallet" and PRIVATE_KEY:
+            # A conta admin é a dona da PRIVATE_KEY: dispensa o RPC eth_accounts
+            return Account.from_key(PRIVATE_KEY).address
+        return _obter("account")[_INDICES_CARTEIRAS[nome]]
+
+    # Criar nova conta para comerciante
+    if nome == "nova_conta":
+        return Account.create()
+    if nome == "private_key_comerciante":
+        return _obter("nova_conta").key.hex()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def _obter(nome):
+    valor = globals().get(nome)
+    if valor is None:
+        with _lock:
+            valor = globals().get(nome)
+            if valor is None:
+                valor = _resolver(nome)
+                globals()[nome] = valor
+    return valor
+
+
+def __getattr__(nome):
+    """
+    Resolve as carteiras (admWallet, merchantWallet, ongWallet, account) só no
+    primeiro acesso, para que importar o módulo não faça chamadas ao nó.
+    """
+    return _obter(nome)
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+from Backend.my_blockchain import w3
+from Backend.leitura_blockchain import leitor_blockchain
+
+# Validade (segundos) do bloco atual e do gas price em memória; o Ganache minera a cada transação
+PARAMETROS_REDE_TTL = float(os.getenv("PARAMETROS_REDE_TTL", "2"))
+
+
+class ParametrosRede:
+    """
+    Cache dos parâmetros da rede usados para montar transações.
+
+    ``chain_id`` nunca muda: é lido uma vez por processo. Bloco atual e gas
+    price são lidos juntos, num único lote JSON-RPC, e valem por ``ttl``
+    segundos ou até alguém observar um bloco mais novo. Requisições
+    simultâneas com o cache vencido esperam uma única leitura em vez de cada
+    uma consultar o nó.
+    """
+
+    def __init__(self, w3, leitor, ttl=PARAMETROS_REDE_TTL):
+        self.w3 = w3
+        self.leitor = leitor
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._chain_id = None
+        self._bloco = None
+        self._gas_price = None
+        self._valido_ate = 0.0
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            with self._lock:
+                if self._chain_id is None:
+                    self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def _garantir_atualizado(self):
+        if time.monotonic() < self._valido_ate:
+            return
+        with self._lock:
+            # Quem esperou na trava aproveita a leitura feita por quem chegou primeiro
+            if time.monotonic() < self._valido_ate:
+                return
+            (bloco, gas_price), _ = self.leitor.executar([
+                lambda: self.w3.eth.get_block_number(),
+                lambda: self.w3.eth.gas_price
+            ])
+            self._bloco, self._gas_price = int(bloco), int(gas_price)
+            self._valido_ate = time.monotonic() + self.ttl
+
+    def bloco(self):
+        """Número do bloco atual (no máximo ``ttl`` segundos atrasado)."""
+        self._garantir_atualizado()
+        return self._bloco
+
+    def gas_price(self):
+        """Gas price em wei, relido a cada bloco novo observado ou a cada ``ttl`` segundos."""
+        self._garantir_atualizado()
+        return self._gas_price
+
+    def observar_bloco(self, numero):
+        """Informa um bloco visto em outro lugar (ex.: recibo); se for mais novo, o cache vence."""
+        if self._bloco is not None and numero > self._bloco:
+            self._valido_ate = 0.0
+
+    def invalidar(self):
+        self._valido_ate = 0.0
+
+    def parametros_tx(self, remetente=None, **extras):
+        """
+        Campos comuns de uma transação com gas price e chain id do cache.
+
+        Args:
+            remetente (str, opcional): Endereço que vai em ``from``.
+            **extras: Demais campos (gas, value...).
+
+        Returns:
+            dict: ``{"from", "gasPrice", "chainId", **extras}``.
+        """
+        parametros = {"gasPrice": self.gas_price(), "chainId": self.chain_id, **extras}
+        if remetente is not None:
+            parametros["from"] = remetente
+        return parametros
+
+
+# Instância compartilhada pelo processo
+parametros_rede = ParametrosRede(w3, leitor_blockchain)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from Backend.parametros_rede import parametros_rede
+
+# Margem sobre o gas estimado e validade (segundos) de cada estimativa em cache
+GAS_MARGEM = float(os.getenv("GAS_MARGEM", "1.2"))
+GAS_PERFIL_TTL = float(os.getenv("GAS_PERFIL_TTL", "3600"))
+
+# Funções cujo custo depende do remetente e do destino, não só da forma dos argumentos: copiam
+# nome/email do remetente para a Transacao gravada e contam transações por destino (zero -> não zero
+# custa mais). Para elas a chave usa o remetente e os argumentos exatos.
+FUNCOES_POR_REMETENTE = frozenset(
+    nome.strip() for nome in os.getenv(
+        "GAS_FUNCOES_POR_REMETENTE", "transferirETHDireto,transferenciaSemTaxas,realizaPagamentoCliente"
+    ).split(",") if nome.strip()
+)
+
+
+def forma_argumento(valor):
+    """
+    Forma de um argumento para a chave do cache: o que muda o custo da chamada.
+
+    Strings e bytes são agrupados pelo número de palavras de 32 bytes que
+    ocupam no storage/calldata; números e endereços têm custo fixo.
+    """
+    if isinstance(valor, str):
+        return "str", len(valor.encode("utf-8")) // 32
+    if isinstance(valor, (bytes, bytearray)):
+        return "bytes", len(valor) // 32
+    if isinstance(valor, (list, tuple)):
+        return "lista", tuple(forma_argumento(item) for item in valor)
+    return type(valor).__name__
+
+
+class PerfilGas:
+    """
+    Cache do gas estimado por função do contrato e forma dos argumentos.
+
+    A primeira chamada de cada função (com argumentos de mesma forma) faz
+    eth_estimateGas; o resultado, com ``margem``, vale por ``ttl`` segundos.
+    Funções em ``por_remetente`` só reaproveitam a estimativa do mesmo
+    remetente com os mesmos argumentos (ex.: mesma origem e mesmo destino).
+    Se a estimativa falhar (ex.: revert, saldo insuficiente) usa o limite fixo
+    informado pela rota e não guarda nada, então o erro aparece no envio como antes.
+    """
+
+    def __init__(self, margem=GAS_MARGEM, ttl=GAS_PERFIL_TTL, por_remetente=FUNCOES_POR_REMETENTE):
+        self.margem = margem
+        self.ttl = ttl
+        self.por_remetente = por_remetente
+        self._lock = threading.Lock()
+        self._perfis = {}  # chave -> (gas, validade)
+
+    def chave(self, funcao, remetente=None, valor=0):
+        if funcao.fn_name in self.por_remetente:
+            return (funcao.address, funcao.fn_name, remetente, tuple(funcao.args or ()), bool(valor))
+        return (
+            funcao.address,
+            funcao.fn_name,
+            tuple(forma_argumento(arg) for arg in funcao.args or ()),
+            bool(valor)
+        )
+
+    def estimar(self, funcao, remetente, valor=0, padrao=None):
+        """
+        Limite de gas para a chamada, do cache ou estimado no nó.
+
+        Args:
+            funcao (ContractFunction): Função do contrato já com os argumentos.
+            remetente (str): Endereço que envia a transação.
+            valor (int): Wei enviado junto (funções payable).
+            padrao (int, opcional): Limite usado se a estimativa falhar.
+
+        Returns:
+            int: Gas com margem de segurança.
+
+        Raises:
+            Exception: Erro da estimativa (ex.: revert), se não houver ``padrao``.
+        """
+        chave = self.chave(funcao, remetente, valor)
+        with self._lock:
+            perfil = self._perfis.get(chave)
+        if perfil is not None and time.monotonic() < perfil[1]:
+            return perfil[0]
+
+        try:
+            estimado = funcao.estimate_gas({"from": remetente, "value": int(valor)})
+        except Exception as e:
+            if padrao is None:
+                raise
+            print(f"⚠️ Estimativa de gas de {funcao.fn_name} falhou ({e}); usando {padrao}")
+            return padrao
+
+        gas = int(estimado * self.margem)
+        with self._lock:
+            self._perfis[chave] = (gas, time.monotonic() + self.ttl)
+        print(f"⛽ Gas de {funcao.fn_name}: {estimado} estimado, {gas} com margem")
+        return gas
+
+    def esquecer(self, funcao, remetente, valor=0):
+        """Descarta a estimativa guardada (ex.: transação enviada com ela falhou)."""
+        with self._lock:
+            self._perfis.pop(self.chave(funcao, remetente, valor), None)
+
+    def limpar(self):
+        """Esquece todas as estimativas (ex.: estado da blockchain revertido para um snapshot)."""
+        with self._lock:
+            self._perfis.clear()
+
+    def custo_maximo(self, gas):
+        """Custo máximo em wei de ``gas`` unidades pelo gas price atual."""
+        return gas * parametros_rede.gas_price()
+
+
+# Instância compartilhada pelo processo
+perfil_gas = PerfilGas()
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from eth_account import Account
+from eth_account.hdaccount import seed_from_mnemonic, key_from_seed
+
+from Backend.alocador_contas import estado_json
+from Backend.thread_background import ThreadBackground
+
+# Contas derivadas de um mnemônico (BIP-44) para quando as chaves fixas do Ganache acabarem
+CONTAS_MNEMONIC = os.getenv("CONTAS_MNEMONIC")
+CONTAS_HD_CAMINHO = os.getenv("CONTAS_HD_CAMINHO", "m/44'/60'/0'/0/{indice}")
+# Começa longe dos índices que o próprio Ganache usa quando roda com o mesmo mnemônico
+CONTAS_HD_INICIO = int(os.getenv("CONTAS_HD_INICIO", "1000"))
+CONTAS_HD_ARQUIVO = os.getenv("CONTAS_HD_ARQUIVO", "contas_hd.json")
+# Contas financiadas mantidas prontas, ETH enviado a cada uma e intervalo de verificação (segundos)
+CONTAS_PRONTAS = int(os.getenv("CONTAS_PRONTAS", "10"))
+CONTAS_VALOR_INICIAL_ETH = float(os.getenv("CONTAS_VALOR_INICIAL_ETH", "10"))
+CONTAS_INTERVALO = float(os.getenv("CONTAS_INTERVALO", "30"))
+# Reserva de um provisionamento que não terminou (worker morto) expira após esse tempo
+CONTAS_RESERVA_EXPIRA = float(os.getenv("CONTAS_RESERVA_EXPIRA", "600"))
+
+
+class PoolContasHD:
+    """
+    Pool de contas derivadas de um mnemônico, financiadas antes de serem pedidas.
+
+    Uma thread em background mantém ``alvo`` contas prontas (financiadas e
+    nunca usadas). Alocar é tirar uma conta da lista ``prontas`` do arquivo de
+    estado, sob a mesma trava de arquivo usada pelo AlocadorContas; a chave
+    privada é derivada do mnemônico na hora e nunca vai para o disco.
+    """
+
+    def __init__(self, mnemonic, financiar, arquivo=CONTAS_HD_ARQUIVO, caminho=CONTAS_HD_CAMINHO,
+                 inicio=CONTAS_HD_INICIO, alvo=CONTAS_PRONTAS, intervalo=CONTAS_INTERVALO):
+        """
+        Args:
+            mnemonic (str | None): Mnemônico BIP-39; sem ele o pool fica desativado.
+            financiar (callable): ``financiar(enderecos) -> list[bool]``; envia o saldo
+                inicial a cada endereço (em lote) e diz quais foram confirmados.
+        """
+        self.mnemonic = mnemonic
+        self.financiar = financiar
+        self.arquivo = arquivo
+        self.caminho = caminho
+        self.inicio = inicio
+        self.alvo = alvo
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._thread = ThreadBackground("provisionador-contas", self.provisionar, lambda: self.intervalo,
+                                        "provisionar contas HD")
+        self._semente = None
+        self._alocadas = {}  # endereco -> indice das contas entregues por este processo
+
+    @property
+    def ativo(self):
+        return bool(self.mnemonic)
+
+    def conta(self, indice):
+        """Deriva a conta do índice (caminho BIP-44 com ``{indice}``)."""
+        if self._semente is None:
+            # PBKDF2 do mnemônico só uma vez por processo
+            self._semente = seed_from_mnemonic(self.mnemonic, "")
+        return Account.from_key(key_from_seed(self._semente, self.caminho.format(indice=indice)))
+
+    @contextmanager
+    def _estado(self):
+        with self._lock, estado_json(self.arquivo, {
+            "proximo_indice": self.inicio,
+            "prontas": [],  # [[indice, endereco], ...]
+            "reservas": {}  # indice -> horário da reserva
+        }) as estado:
+            yield estado
+
+    def alocar(self):
+        """
+        Retira uma conta pronta do pool.
+
+        Returns:
+            tuple[str, str] | tuple[None, None]: Endereço e chave privada, ou (None, None) se não houver.
+        """
+        if not self.ativo:
+            return None, None
+        self.iniciar()
+
+        with self._estado() as estado:
+            item = estado["prontas"].pop() if estado["prontas"] else None
+            restantes = len(estado["prontas"])
+        if restantes < self.alvo:
+            self._thread.acordar()
+        if item is None:
+            print("❌ Pool de contas HD vazio: aguardando provisionamento")
+            return None, None
+
+        indice, endereco = item
+        self._alocadas[endereco] = indice
+        print(f"✅ Conta HD {indice} alocada: {endereco}")
+        return endereco, self.conta(indice).key.to_0x_hex()
+
+    def liberar(self, endereco):
+        """
+        Devolve ao pool uma conta alocada (por este processo) que não chegou a ser usada.
+
+        Returns:
+            bool: True se a conta era do pool.
+        """
+        indice = self._alocadas.pop(endereco, None)
+        if indice is None:
+            return False
+        with self._estado() as estado:
+            estado["prontas"].append([indice, endereco])
+        return True
+
+    def descartar_prontas(self):
+        """
+        Esquece as contas prontas e as reservas (ex.: chain revertida para um
+        snapshot desfez o financiamento). Os índices não são reaproveitados.
+
+        Returns:
+            int: Quantidade de contas prontas descartadas.
+        """
+        with self._estado() as estado:
+            descartadas = len(estado["prontas"])
+            estado["prontas"] = []
+            estado["reservas"] = {}
+        self._thread.acordar()
+        return descartadas
+
+    def provisionar(self):
+        """
+        Completa o pool até ``alvo`` contas prontas, financiando as novas num único lote.
+
+        Returns:
+            int: Quantidade de contas adicionadas.
+        """
+        agora = time.time()
+        with self._estado() as estado:
+            # Reservas de provisionamentos que não terminaram são descartadas
+            estado["reservas"] = {i: t for i, t in estado["reservas"].items() if agora - t < CONTAS_RESERVA_EXPIRA}
+            falta = self.alvo - len(estado["prontas"]) - len(estado["reservas"])
+            if falta <= 0:
+                return 0
+            indices = list(range(estado["proximo_indice"], estado["proximo_indice"] + falta))
+            estado["proximo_indice"] += falta
+            for indice in indices:
+                estado["reservas"][str(indice)] = agora
+
+        enderecos = [self.conta(indice).address for indice in indices]
+        print(f"🏦 Provisionando {len(enderecos)} contas HD (índices {indices[0]}..{indices[-1]})")
+        try:
+            confirmadas = self.financiar(enderecos)
+        except Exception as e:
+            print(f"⚠️ Falha ao financiar contas HD: {e}")
+            confirmadas = [False] * len(enderecos)
+
+        with self._estado() as estado:
+            for indice, endereco, ok in zip(indices, enderecos, confirmadas):
+                estado["reservas"].pop(str(indice), None)
+                if ok:
+                    estado["prontas"].append([indice, endereco])
+            prontas = len(estado["prontas"])
+        adicionadas = sum(1 for ok in confirmadas if ok)
+        print(f"   ✅ {adicionadas} contas HD prontas (total no pool: {prontas})")
+        return adicionadas
+
+    def iniciar(self):
+        """Inicia a thread de provisionamento (se o pool estiver ativo)."""
+        if self.ativo:
+            self._thread.iniciar()
+
+    def estado(self):
+        if not self.ativo:
+            return {"ativo": False}
+        with self._estado() as estado:
+            return {
+                "ativo": True,
+                "prontas": len(estado["prontas"]),
+                "provisionando": len(estado["reservas"]),
+                "proximo_indice": estado["proximo_indice"],
+                "alvo": self.alvo
+            }
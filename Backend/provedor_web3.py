@@ -0,0 +1,79 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3, HTTPProvider, IPCProvider, LegacyWebSocketProvider
+
+# Nó usado quando GANACHE_URL não está definido (mesmo padrão do HTTPProvider do web3)
+ENDERECO_PADRAO = "http://127.0.0.1:8545"
+# Transporte do provider: "auto" escolhe pelo endereço (http(s)://, ws(s)://, caminho .ipc)
+WEB3_TRANSPORTE = os.getenv("WEB3_TRANSPORTE", "auto")
+# Conexões HTTP mantidas abertas (keep-alive) e reaproveitadas entre as threads do worker
+WEB3_POOL_CONEXOES = int(os.getenv("WEB3_POOL_CONEXOES", "32"))
+# Tempo máximo (segundos) para conectar e para cada chamada RPC
+WEB3_TIMEOUT_CONEXAO = float(os.getenv("WEB3_TIMEOUT_CONEXAO", "3"))
+WEB3_TIMEOUT = float(os.getenv("WEB3_TIMEOUT", "30"))
+
+
+def transporte_do_endereco(endereco, transporte=WEB3_TRANSPORTE):
+    """
+    Transporte a usar para o endereço do nó.
+
+    Returns:
+        str: "http", "ws" ou "ipc".
+
+    Raises:
+        ValueError: Se o transporte configurado não existir.
+    """
+    endereco = endereco or ENDERECO_PADRAO
+    if transporte != "auto":
+        if transporte not in ("http", "ws", "ipc"):
+            raise ValueError(f"WEB3_TRANSPORTE inválido: {transporte}. Use: auto, http, ws ou ipc")
+        return transporte
+    if endereco.startswith(("ws://", "wss://")):
+        return "ws"
+    if endereco.startswith(("http://", "https://")):
+        return "http"
+    return "ipc"
+
+
+def criar_sessao_http(pool_conexoes=WEB3_POOL_CONEXOES):
+    """Sessão requests com pool de conexões persistentes do tamanho pedido."""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=pool_conexoes)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+
+def criar_provider(endereco, transporte=WEB3_TRANSPORTE, pool_conexoes=WEB3_POOL_CONEXOES, timeout=WEB3_TIMEOUT):
+    """
+    Cria o provider do nó (HTTP com pool de conexões, WebSocket ou IPC persistentes).
+
+    Nenhum transporte abre conexão aqui: HTTP conecta sob demanda e WebSocket/IPC
+    na primeira chamada, então é seguro criar antes do fork dos workers.
+
+    Args:
+        endereco (str): URL http(s)/ws(s) ou caminho do socket IPC (vazio: ENDERECO_PADRAO).
+        transporte (str): "auto", "http", "ws" ou "ipc".
+        pool_conexoes (int): Conexões HTTP mantidas abertas.
+        timeout (float): Timeout de cada chamada RPC (segundos).
+    """
+    if not endereco:
+        print(f"⚠️ GANACHE_URL não definido; usando {ENDERECO_PADRAO}")
+        endereco = ENDERECO_PADRAO
+    tipo = transporte_do_endereco(endereco, transporte)
+    if tipo == "ws":
+        return LegacyWebSocketProvider(endereco, websocket_timeout=timeout)
+    if tipo == "ipc":
+        return IPCProvider(endereco, timeout=timeout)
+    return HTTPProvider(
+        endereco,
+        request_kwargs={"timeout": (WEB3_TIMEOUT_CONEXAO, timeout)},
+        session=criar_sessao_http(pool_conexoes)
+    )
+
+
+def criar_web3(endereco, **opcoes):
+    """Instância Web3 sobre ``criar_provider`` (ver opções lá)."""
+    return Web3(criar_provider(endereco, **opcoes))
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+# Pasta e limites do cache de QR codes de comprovante
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join("static", "qrs"))
+QR_CACHE_MAX_ARQUIVOS = int(os.getenv("QR_CACHE_MAX_ARQUIVOS", "500"))
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+PREFIXO_ARQUIVO = "comprovante_"
+
+
+def codificar_qr_png(conteudo, box_size=6, border=4):
+    """
+    Codifica o conteúdo num QR code PNG (uma única codificação).
+
+    Returns:
+        bytes: Imagem PNG.
+    """
+    import qrcode  # importação tardia: qrcode/PIL só carregam no primeiro QR
+
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(conteudo)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    bio = BytesIO()
+    img.save(bio, format="PNG")
+    return bio.getvalue()
+
+
+class CacheQRComprovante:
+    """
+    Cache de QR codes de comprovante endereçado por conteúdo, com limite de disco.
+
+    O arquivo de cada QR se chama ``comprovante_<sha256 do conteúdo>.png``: o
+    mesmo comprovante nunca é codificado duas vezes. Quando a pasta passa de
+    ``max_arquivos`` ou ``max_bytes``, os arquivos usados há mais tempo são
+    removidos (LRU pela data de acesso/modificação).
+    """
+
+    def __init__(self, pasta=QR_CACHE_DIR, max_arquivos=QR_CACHE_MAX_ARQUIVOS, max_bytes=QR_CACHE_MAX_BYTES):
+        self.pasta = pasta
+        self.max_arquivos = max_arquivos
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._indice = None  # OrderedDict nome -> tamanho, do menos para o mais recente
+        self._bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def _carregar_indice(self):
+        # Reconstrói o índice LRU a partir do disco (arquivos de outros workers/reinícios)
+        os.makedirs(self.pasta, exist_ok=True)
+        arquivos = []
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and entrada.name.startswith(PREFIXO_ARQUIVO):
+                    info = entrada.stat()
+                    arquivos.append((info.st_mtime, entrada.name, info.st_size))
+        arquivos.sort()
+        self._indice = OrderedDict((nome, tamanho) for _, nome, tamanho in arquivos)
+        self._bytes = sum(self._indice.values())
+
+    @staticmethod
+    def chave(conteudo, box_size=6, border=4):
+        """Hash SHA-256 do conteúdo e dos parâmetros de renderização."""
+        return hashlib.sha256(f"{box_size}:{border}:{conteudo}".encode("utf-8")).hexdigest()
+
+    def caminho(self, chave):
+        return os.path.join(self.pasta, f"{PREFIXO_ARQUIVO}{chave}.png")
+
+    def obter_ou_gerar(self, conteudo, box_size=6, border=4):
+        """
+        Retorna o PNG do QR code do conteúdo, gerando e gravando apenas se necessário.
+
+        Args:
+            conteudo (str): Texto codificado no QR code.
+
+        Returns:
+            tuple[bytes, str]: Bytes PNG e caminho do arquivo em disco.
+        """
+        chave = self.chave(conteudo, box_size, border)
+        caminho = self.caminho(chave)
+        nome = os.path.basename(caminho)
+
+        with self._lock:
+            if self._indice is None:
+                self._carregar_indice()
+            em_cache = nome in self._indice
+
+        if em_cache:
+            try:
+                with open(caminho, "rb") as f:
+                    png = f.read()
+                os.utime(caminho)  # marca como usado recentemente
+                with self._lock:
+                    if nome in self._indice:
+                        self._indice.move_to_end(nome)
+                    self.acertos += 1
+                return png, caminho
+            except FileNotFoundError:
+                pass  # removido por outro worker: gera de novo
+
+        png = codificar_qr_png(conteudo, box_size, border)
+        self._gravar(caminho, png)
+
+        with self._lock:
+            self.falhas += 1
+            self._bytes -= self._indice.pop(nome, 0)
+            self._indice[nome] = len(png)
+            self._bytes += len(png)
+            self._remover_excedentes()
+
+        return png, caminho
+
+    def _gravar(self, caminho, png):
+        # Escrita atômica: leitores nunca veem um PNG pela metade
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        with os.fdopen(descritor, "wb") as f:
+            f.write(png)
+        os.replace(temporario, caminho)
+
+    def _remover_excedentes(self):
+        while len(self._indice) > 1 and (len(self._indice) > self.max_arquivos or self._bytes > self.max_bytes):
+            nome, tamanho = self._indice.popitem(last=False)
+            self._bytes -= tamanho
+            try:
+                os.remove(os.path.join(self.pasta, nome))
+            except FileNotFoundError:
+                pass
+
+    def estado(self):
+        with self._lock:
+            return {
+                "arquivos": len(self._indice or {}),
+                "bytes": self._bytes,
+                "max_arquivos": self.max_arquivos,
+                "max_bytes": self.max_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas
+            }
+
+
+# Instância compartilhada pelo processo
+cache_qr_comprovante = CacheQRComprovante()
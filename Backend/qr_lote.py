@@ -0,0 +1,236 @@
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import traceback
+import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Pool de geração em lote: processos, QR codes em voo por lote e tempo máximo por comerciante (segundos)
+QR_LOTE_PROCESSOS = int(os.getenv("QR_LOTE_PROCESSOS", str(os.cpu_count() or 2)))
+QR_LOTE_JANELA = int(os.getenv("QR_LOTE_JANELA", str(2 * QR_LOTE_PROCESSOS)))
+QR_LOTE_TIMEOUT = float(os.getenv("QR_LOTE_TIMEOUT", "30"))
+# Limites de cada pedido e de lotes gerados ao mesmo tempo
+QR_LOTE_MAX_COMERCIANTES = int(os.getenv("QR_LOTE_MAX_COMERCIANTES", "1000"))
+QR_LOTE_MAX_SIMULTANEOS = int(os.getenv("QR_LOTE_MAX_SIMULTANEOS", "2"))
+
+
+class LoteOcupado(RuntimeError):
+    """Já há QR_LOTE_MAX_SIMULTANEOS lotes sendo gerados."""
+
+
+def _nome_pasta(indice, nome):
+    # Pasta do comerciante dentro do ZIP: índice garante nomes únicos
+    ascii_ = unicodedata.normalize("NFKD", nome or "").encode("ascii", "ignore").decode("ascii")
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", ascii_).strip("_")[:40]
+    return f"{indice:04d}_{slug}" if slug else f"{indice:04d}"
+
+
+def validar_comerciantes(comerciantes):
+    """
+    Valida a lista de comerciantes de um lote.
+
+    Args:
+        comerciantes (list[dict]): Itens com url_registro, chave e nome (opcional).
+
+    Raises:
+        ValueError: Se a lista ou algum item for inválido.
+    """
+    if not isinstance(comerciantes, list) or not comerciantes:
+        raise ValueError("Parâmetro 'comerciantes' deve ser uma lista não vazia")
+    if len(comerciantes) > QR_LOTE_MAX_COMERCIANTES:
+        raise ValueError(f"Máximo de {QR_LOTE_MAX_COMERCIANTES} comerciantes por lote")
+    for i, comerciante in enumerate(comerciantes):
+        if not isinstance(comerciante, dict):
+            raise ValueError(f"Comerciante {i} deve ser um objeto")
+        for campo in ("url_registro", "chave"):
+            if not isinstance(comerciante.get(campo), str) or not comerciante[campo]:
+                raise ValueError(f"Comerciante {i}: campo '{campo}' é obrigatório")
+        if not isinstance(comerciante.get("nome", ""), str):
+            raise ValueError(f"Comerciante {i}: campo 'nome' deve ser texto")
+
+
+def _renderizar_comerciante(url_registro, chave, box_size):
+    """
+    Gera os dois QR codes de um comerciante em PNG. Executa nos processos do pool.
+
+    Returns:
+        dict: {"registro_degrade.png": bytes, "comerciante_chave.png": bytes}
+    """
+    from Backend.qr_service import QRCodeService
+
+    arquivos = {}
+    for nome, img in (("registro_degrade.png", QRCodeService.imagem_qr_degrade(url_registro, box_size)),
+                      ("comerciante_chave.png", QRCodeService.imagem_qr_padrao(chave))):
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        arquivos[nome] = buffer.getvalue()
+    return arquivos
+
+
+class _SaidaZip(io.RawIOBase):
+    """Destino sem seek para o ZipFile: guarda os bytes até o gerador repassá-los ao cliente."""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def retirar(self):
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+class FluxoLoteQR:
+    """
+    Resposta iterável com o ZIP de um lote, montado conforme os QR codes ficam prontos.
+
+    No máximo ``janela`` comerciantes ficam em voo no pool; cada PNG é escrito
+    no ZIP e repassado ao cliente na ordem do pedido, então a memória usada não
+    cresce com o tamanho do lote. O ZIP termina com um ``manifesto.json`` que
+    indica os arquivos (ou o erro) de cada comerciante. O WSGI chama ``close()``
+    ao fim da resposta ou quando o cliente desconecta.
+    """
+
+    def __init__(self, gerador, comerciantes, box_size):
+        self._gerador = gerador
+        self._comerciantes = comerciantes
+        self._box_size = box_size
+        self._iterador = None
+        self._fechado = False
+
+    def __iter__(self):
+        if self._iterador is None:
+            self._iterador = self._gerar()
+        return self._iterador
+
+    def _gerar(self):
+        executor = self._gerador._obter_executor()
+        saida = _SaidaZip()
+        manifesto = []
+        pendentes = deque()
+        proximo = 0
+        try:
+            with zipfile.ZipFile(saida, mode="w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+                while proximo < len(self._comerciantes) or pendentes:
+                    # Mantém a janela cheia
+                    while proximo < len(self._comerciantes) and len(pendentes) < self._gerador.janela:
+                        comerciante = self._comerciantes[proximo]
+                        pendentes.append((proximo, executor.submit(
+                            _renderizar_comerciante, comerciante["url_registro"], comerciante["chave"],
+                            self._box_size
+                        )))
+                        proximo += 1
+
+                    indice, futuro = pendentes.popleft()
+                    comerciante = self._comerciantes[indice]
+                    pasta = _nome_pasta(indice, comerciante.get("nome"))
+                    item = {"indice": indice, "nome": comerciante.get("nome"), "pasta": pasta}
+                    try:
+                        arquivos = futuro.result(timeout=self._gerador.timeout)
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"⚠️ Falha ao gerar QR do comerciante {indice}: {e}")
+                        item["erro"] = str(e) or type(e).__name__
+                        manifesto.append(item)
+                        continue
+
+                    item["arquivos"] = []
+                    for nome, png in arquivos.items():
+                        arquivo_zip.writestr(f"{pasta}/{nome}", png)
+                        item["arquivos"].append(f"{pasta}/{nome}")
+                    manifesto.append(item)
+                    yield saida.retirar()
+
+                arquivo_zip.writestr("manifesto.json", json.dumps(manifesto, ensure_ascii=False, indent=2),
+                                     compress_type=zipfile.ZIP_DEFLATED)
+            yield saida.retirar()
+        except BrokenProcessPool:
+            traceback.print_exc()
+            self._gerador._descartar_executor(executor)
+            raise
+        finally:
+            # Cliente desconectou ou erro: não deixa trabalho órfão no pool
+            for _, futuro in pendentes:
+                futuro.cancel()
+
+    def close(self):
+        if self._fechado:
+            return
+        self._fechado = True
+        try:
+            if self._iterador is not None:
+                self._iterador.close()
+        finally:
+            self._gerador._vagas.release()
+
+
+class GeradorLoteQR:
+    """
+    Gera os QR codes de vários comerciantes em paralelo num pool de processos.
+
+    O pool é criado no primeiro uso (depois do fork dos workers do gunicorn) e
+    compartilhado pelos lotes; no máximo ``max_simultaneos`` lotes rodam ao
+    mesmo tempo, os demais recebem LoteOcupado.
+    """
+
+    def __init__(self, processos=QR_LOTE_PROCESSOS, janela=QR_LOTE_JANELA, timeout=QR_LOTE_TIMEOUT,
+                 max_simultaneos=QR_LOTE_MAX_SIMULTANEOS):
+        self.processos = processos
+        self.janela = max(1, janela)
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max_simultaneos)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _descartar_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def iniciar(self, comerciantes, box_size=10):
+        """
+        Valida o lote e reserva uma vaga; a geração só começa quando a resposta é iterada.
+
+        Args:
+            comerciantes (list[dict]): Itens com url_registro, chave e nome (opcional).
+            box_size (int): Tamanho do módulo do QR de registro em pixels.
+
+        Returns:
+            FluxoLoteQR: Iterável com os bytes do ZIP.
+
+        Raises:
+            ValueError: Se o lote for inválido.
+            LoteOcupado: Se já houver lotes demais em andamento.
+        """
+        validar_comerciantes(comerciantes)
+        if not self._vagas.acquire(blocking=False):
+            raise LoteOcupado("Geração de QR codes em lote ocupada")
+        return FluxoLoteQR(self, comerciantes, box_size)
+
+
+# Instância compartilhada pelo processo
+gerador_lote_qr = GeradorLoteQR()
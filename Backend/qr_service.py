@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import qrcode
 from PIL import Image
 
@@ -22,6 +23,19 @@ class QRCodeService:
 
     def gerar_qr_padrao(self, data, nome_arquivo="qrcode_padrao.png"):
         """Gera um QR code padrão (preto e branco)"""
+        img = self.imagem_qr_padrao(data)
+        caminho = self._salvar_qr(img, nome_arquivo)
+        return caminho
+
+    def gerar_qr_degrade(self, data, nome_arquivo="registro_degrade.png", box_size=10):
+        """Gera um QR code com degradê colorido"""
+        gradient = self.imagem_qr_degrade(data, box_size)
+        caminho = self._salvar_qr(gradient, nome_arquivo)
+        return caminho
+
+    @staticmethod
+    def imagem_qr_padrao(data):
+        """Monta a imagem do QR code padrão (preto e branco), sem gravar em disco"""
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_M,
@@ -30,14 +44,39 @@ class QRCodeService:
         )
         qr.add_data(data)
         qr.make(fit=True)
+        return qr.make_image(fill_color="black", back_color="white")
 
-        img = qr.make_image(fill_color="black", back_color="white")
-        caminho = self._salvar_qr(img, nome_arquivo)
-        return caminho
+    @classmethod
+    def imagem_qr_degrade(cls, data, box_size=10):
+        """Monta a imagem do QR code com degradê, sem gravar em disco"""
+        qr = qrcode.make(data, box_size=box_size).convert("RGBA")
+        return cls._aplicar_degrade(qr)
 
-    def gerar_qr_degrade(self, data, nome_arquivo="registro_degrade.png"):
-        """Gera um QR code com degradê colorido"""
-        qr = qrcode.make(data).convert("RGBA")
+    @staticmethod
+    def _aplicar_degrade(qr):
+        """
+        Aplica o degradê vermelho -> azul nas partes pretas do QR com operações NumPy.
+
+        Produz exatamente a mesma imagem de ``_aplicar_degrade_loop``, sem laços por pixel.
+        """
+        width, height = qr.size
+        pixels_qr = np.asarray(qr)
+
+        # Mesma conta da versão em laço: r = int(255 * (x / width)) por coluna
+        r = (255 * (np.arange(width) / width)).astype(np.uint8)
+        pixels_grad = np.empty((height, width, 4), dtype=np.uint8)
+        pixels_grad[..., 0] = r
+        pixels_grad[..., 1] = 0
+        pixels_grad[..., 2] = 255 - r
+        pixels_grad[..., 3] = 255
+
+        # Partes brancas ficam transparentes
+        pixels_grad[pixels_qr[..., 0] > 128] = (255, 255, 255, 0)
+        return Image.fromarray(pixels_grad, "RGBA")
+
+    @staticmethod
+    def _aplicar_degrade_loop(qr):
+        """Versão original pixel a pixel (referência para o benchmark)."""
         width, height = qr.size
         gradient = Image.new("RGBA", qr.size)
 
@@ -55,17 +94,21 @@ class QRCodeService:
             for y in range(height):
                 if pixels_qr[x, y][0] > 128:  # Partes brancas ficam transparentes
                     pixels_grad[x, y] = (255, 255, 255, 0)
+        return gradient
 
-        caminho = self._salvar_qr(gradient, nome_arquivo)
-        return caminho
+    def gerar_qr_codes_completos(self, url_registro, chave_comerciante, prefixo=""):
+        """
+        Gera os dois QR codes: registro (degradê) e comerciante (padrão)
 
-    def gerar_qr_codes_completos(self, url_registro, chave_comerciante):
-        """Gera os dois QR codes: registro (degradê) e comerciante (padrão)"""
+        ``prefixo`` diferencia os arquivos de cada comerciante; sem ele os nomes
+        fixos são sobrescritos a cada chamada. Para vários comerciantes de uma vez
+        use ``Backend.qr_lote``.
+        """
         # QR do registro com degradê
-        caminho_registro = self.gerar_qr_degrade(url_registro, "registro_degrade.png")
+        caminho_registro = self.gerar_qr_degrade(url_registro, f"{prefixo}registro_degrade.png")
 
         # QR da chave do comerciante padrão
-        caminho_comerciante = self.gerar_qr_padrao(chave_comerciante, "comerciante_chave.png")
+        caminho_comerciante = self.gerar_qr_padrao(chave_comerciante, f"{prefixo}comerciante_chave.png")
 
         print(f"QR codes salvos em Backend/static/qrcodes:")
         print(f"- Registro (degradê): {caminho_registro}")
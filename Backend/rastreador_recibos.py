@@ -0,0 +1,287 @@
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from Backend.comprovante_service import normalizar_hash
+from Backend.gerenciador_nonce import gerenciador_nonce
+from Backend.leitura_blockchain import leitor_blockchain
+from Backend.parametros_rede import parametros_rede
+from Backend.thread_background import ThreadBackground
+
+# Espera pelo recibo na requisição (padrão, como antes); "0" registra como PENDENTE e responde na hora (202).
+# Cada requisição pode escolher com "aguardarConfirmacao" no corpo.
+TX_AGUARDAR_CONFIRMACAO = os.getenv("TX_AGUARDAR_CONFIRMACAO", "1") == "1"
+# Tempo máximo de espera quando a requisição pede confirmação (segundos)
+TX_TIMEOUT_CONFIRMACAO = float(os.getenv("TX_TIMEOUT_CONFIRMACAO", "10"))
+# Intervalo entre consultas de recibos e hashes por lote JSON-RPC
+RECIBOS_INTERVALO = float(os.getenv("RECIBOS_INTERVALO", "1"))
+RECIBOS_TAMANHO_LOTE = int(os.getenv("RECIBOS_TAMANHO_LOTE", "100"))
+# Transação sem recibo após esse tempo (segundos) é marcada como FALHADA (descartada pelo nó)
+RECIBOS_EXPIRA = float(os.getenv("RECIBOS_EXPIRA", "900"))
+
+# A linha pode já existir (gravada pelo indexador de eventos): só completa as colunas vazias, sem mudar o status
+SQL_INSERIR_TRANSACAO = text("""
+    INSERT INTO transacoes (hash_transacao, tipo_transacao, cliente_id, referencia_pix, valor_wei, valor_ether,
+                            valor_reais, status_transacao, gas_price_wei, nonce_transacao, observacoes)
+    VALUES (:hash, :tipo, :cliente_id, :referencia_pix, :valor_wei, :valor_ether,
+            :valor_reais, 'PENDENTE', :gas_price_wei, :nonce, :observacoes)
+    ON DUPLICATE KEY UPDATE
+        cliente_id = COALESCE(cliente_id, VALUES(cliente_id)),
+        referencia_pix = COALESCE(referencia_pix, VALUES(referencia_pix)),
+        valor_reais = COALESCE(valor_reais, VALUES(valor_reais)),
+        gas_price_wei = COALESCE(gas_price_wei, VALUES(gas_price_wei)),
+        nonce_transacao = COALESCE(nonce_transacao, VALUES(nonce_transacao)),
+        observacoes = COALESCE(observacoes, VALUES(observacoes))
+""")
+
+# Só sai de PENDENTE: atualizações repetidas (vários workers, reinícios) não têm efeito
+SQL_ATUALIZAR_STATUS = text("""
+    UPDATE transacoes
+    SET status_transacao = :status, block_number = :bloco, gas_usado = :gas_usado,
+        observacoes = COALESCE(:observacoes, observacoes)
+    WHERE hash_transacao = :hash AND status_transacao = 'PENDENTE'
+""")
+
+# Idade calculada pelo relógio do banco, o mesmo que preencheu data_transacao
+SQL_PENDENTES = text("""
+    SELECT hash_transacao, TIMESTAMPDIFF(SECOND, data_transacao, NOW()) AS idade
+    FROM transacoes WHERE status_transacao = 'PENDENTE' ORDER BY id LIMIT :limite
+""")
+
+SQL_STATUS = text("""
+    SELECT hash_transacao, tipo_transacao, status_transacao, block_number, gas_usado, nonce_transacao,
+           valor_wei, valor_reais, data_transacao, observacoes
+    FROM transacoes WHERE hash_transacao = :hash
+""")
+
+
+def hash_0x(tx_hash):
+    """Hash no formato gravado na tabela transacoes ("0x" + 64 hex minúsculos)."""
+    if not isinstance(tx_hash, str):
+        tx_hash = tx_hash.to_0x_hex()
+    return "0x" + normalizar_hash(tx_hash)
+
+
+def status_do_recibo(recibo):
+    """CONFIRMADA ou FALHADA a partir do campo ``status`` do recibo (cru ou do web3)."""
+    status = recibo.get("status")
+    if isinstance(status, str):
+        status = int(status, 16)
+    return "CONFIRMADA" if status == 1 else "FALHADA"
+
+
+def _inteiro(valor):
+    if valor is None:
+        return None
+    return int(valor, 16) if isinstance(valor, str) else int(valor)
+
+
+class RastreadorRecibos:
+    """
+    Acompanha as transações enviadas sem esperar o recibo na requisição.
+
+    O endpoint grava a transação como PENDENTE na tabela transacoes e responde
+    com o hash; uma thread em background consulta os recibos de todas as
+    pendentes num único lote JSON-RPC a cada ``intervalo`` segundos e muda o
+    status para CONFIRMADA ou FALHADA. Ao iniciar, retoma as pendentes que já
+    estavam no banco (reinício ou outro worker).
+    """
+
+    def __init__(self, leitor, intervalo=RECIBOS_INTERVALO, tamanho_lote=RECIBOS_TAMANHO_LOTE,
+                 expira=RECIBOS_EXPIRA):
+        self.leitor = leitor
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.expira = expira
+        self._engine = None
+        self._lock = threading.Lock()
+        self._thread = ThreadBackground("rastreador-recibos", self.verificar, self._espera,
+                                        "consultar recibos", preparar=self._carregar_pendentes)
+        self._pendentes = {}  # hash -> instante (monotonic) do envio
+
+    def configurar(self, engine):
+        """Define a engine SQLAlchemy usada para gravar na tabela transacoes."""
+        self._engine = engine
+
+    def registrar(self, tx_hash, tipo, valor_wei, valor_ether, valor_reais=None, cliente_id=None,
+                  referencia_pix=None, gas_price_wei=None, nonce=None, observacoes=None):
+        """
+        Grava a transação como PENDENTE e passa a acompanhar o recibo.
+
+        Args:
+            tx_hash (str | HexBytes): Hash da transação enviada.
+            tipo (str): PAGAMENTO, DEPOSITO, SAQUE ou TRANSFERENCIA.
+
+        Returns:
+            str: Hash no formato da tabela ("0x...").
+        """
+        tx_hash = hash_0x(tx_hash)
+        if self._engine is not None:
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(SQL_INSERIR_TRANSACAO, {
+                        "hash": tx_hash,
+                        "tipo": tipo,
+                        "cliente_id": cliente_id,
+                        "referencia_pix": referencia_pix,
+                        "valor_wei": int(valor_wei),
+                        "valor_ether": valor_ether,
+                        "valor_reais": valor_reais,
+                        "gas_price_wei": gas_price_wei,
+                        "nonce": nonce,
+                        "observacoes": observacoes
+                    })
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar transação pendente {tx_hash}: {e}")
+
+        with self._lock:
+            self._pendentes.setdefault(tx_hash, time.monotonic())
+        self.iniciar()
+        self._thread.acordar()
+        return tx_hash
+
+    def confirmar(self, tx_hash, recibo):
+        """Grava o resultado de um recibo já obtido (ex.: a requisição esperou a confirmação)."""
+        tx_hash = hash_0x(tx_hash)
+        with self._lock:
+            self._pendentes.pop(tx_hash, None)
+        self._gravar([{
+            "hash": tx_hash,
+            "status": status_do_recibo(recibo),
+            "bloco": _inteiro(recibo.get("blockNumber")),
+            "gas_usado": _inteiro(recibo.get("gasUsed")),
+            "observacoes": None
+        }])
+
+    def _gravar(self, atualizacoes):
+        if self._engine is None or not atualizacoes:
+            return
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(SQL_ATUALIZAR_STATUS, atualizacoes)
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar status de {len(atualizacoes)} transações: {e}")
+
+    def _carregar_pendentes(self):
+        if self._engine is None:
+            return
+        try:
+            with self._engine.connect() as conn:
+                linhas = conn.execute(SQL_PENDENTES, {"limite": self.tamanho_lote * 10}).fetchall()
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar transações pendentes: {e}")
+            return
+        agora = time.monotonic()
+        with self._lock:
+            for linha in linhas:
+                # O prazo RECIBOS_EXPIRA conta desde o envio (data_transacao), não desde o reinício
+                self._pendentes.setdefault(linha.hash_transacao, agora - max(linha.idade or 0, 0))
+        if linhas:
+            print(f"🔁 {len(linhas)} transações pendentes retomadas do banco")
+
+    def verificar(self):
+        """
+        Consulta os recibos das transações pendentes e atualiza as que saíram de PENDENTE.
+
+        Returns:
+            int: Quantidade de transações finalizadas nesta rodada.
+        """
+        with self._lock:
+            hashes = list(self._pendentes)[:self.tamanho_lote]
+        if not hashes:
+            return 0
+
+        recibos = self.leitor.recibos(hashes)
+        agora = time.monotonic()
+        atualizacoes = []
+        expiradas = 0
+        for tx_hash in hashes:
+            recibo = recibos.get(tx_hash)
+            if recibo is not None:
+                atualizacoes.append({
+                    "hash": tx_hash,
+                    "status": status_do_recibo(recibo),
+                    "bloco": _inteiro(recibo.get("blockNumber")),
+                    "gas_usado": _inteiro(recibo.get("gasUsed")),
+                    "observacoes": None
+                })
+            elif agora - self._pendentes.get(tx_hash, agora) > self.expira:
+                expiradas += 1
+                atualizacoes.append({
+                    "hash": tx_hash,
+                    "status": "FALHADA",
+                    "bloco": None,
+                    "gas_usado": None,
+                    "observacoes": f"Recibo não encontrado após {int(self.expira)}s"
+                })
+
+        blocos = [atualizacao["bloco"] for atualizacao in atualizacoes if atualizacao["bloco"] is not None]
+        if blocos:
+            # Bloco novo minerado: o gas price em cache deixa de valer
+            parametros_rede.observar_bloco(max(blocos))
+
+        self._gravar(atualizacoes)
+        with self._lock:
+            for atualizacao in atualizacoes:
+                self._pendentes.pop(atualizacao["hash"], None)
+        if expiradas:
+            # Transação descartada pelo nó: um nonce local à frente do nó prenderia as próximas
+            gerenciador_nonce.sincronizar()
+        for atualizacao in atualizacoes:
+            print(f"{'✅' if atualizacao['status'] == 'CONFIRMADA' else '❌'} Transação {atualizacao['hash']}: "
+                  f"{atualizacao['status']}")
+        return len(atualizacoes)
+
+    def iniciar(self):
+        """Inicia a thread de acompanhamento."""
+        self._thread.iniciar()
+
+    def _espera(self):
+        with self._lock:
+            ocioso = not self._pendentes
+        # Sem pendentes, dorme até a próxima transação registrada
+        return None if ocioso else self.intervalo
+
+    def status(self, tx_hash):
+        """
+        Status de uma transação: da tabela transacoes ou, se não estiver lá, do nó.
+
+        Returns:
+            dict | None: Dados do status ou None se a transação não for conhecida.
+
+        Raises:
+            ValueError: Se o hash for inválido.
+        """
+        tx_hash = hash_0x(tx_hash)
+        if self._engine is not None:
+            with self._engine.connect() as conn:
+                linha = conn.execute(SQL_STATUS, {"hash": tx_hash}).fetchone()
+            if linha is not None:
+                return {
+                    "hash_transacao": linha.hash_transacao,
+                    "tipo_transacao": linha.tipo_transacao,
+                    "status_transacao": linha.status_transacao,
+                    "block_number": linha.block_number,
+                    "gas_usado": linha.gas_usado,
+                    "nonce_transacao": linha.nonce_transacao,
+                    "valor_wei": int(linha.valor_wei) if linha.valor_wei is not None else None,
+                    "valor_reais": float(linha.valor_reais) if linha.valor_reais is not None else None,
+                    "data_transacao": linha.data_transacao.isoformat() if linha.data_transacao else None,
+                    "observacoes": linha.observacoes
+                }
+
+        recibo = self.leitor.recibos([tx_hash])[tx_hash]
+        if recibo is None:
+            return None
+        return {
+            "hash_transacao": tx_hash,
+            "status_transacao": status_do_recibo(recibo),
+            "block_number": _inteiro(recibo.get("blockNumber")),
+            "gas_usado": _inteiro(recibo.get("gasUsed"))
+        }
+
+
+# Instância compartilhada pelo processo
+rastreador_recibos = RastreadorRecibos(leitor_blockchain)
@@ -1,6 +1,18 @@
-from Backend.utils import reset_accounts_control
+import argparse
+
+from Backend.utils import reset_accounts_control, criar_snapshot_ganache
 
 if __name__ == "__main__":
-    print("🔄 Resetando controle de contas...")
-    reset_accounts_control()
-    print("✅ Controle resetado!")
+    parser = argparse.ArgumentParser(description="Reseta o controle de contas do Ganache")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Tira um snapshot da chain atual (limpa) para resets rápidos")
+    parser.add_argument("--rapido", action="store_true",
+                        help="Reseta com evm_revert para o snapshot salvo, se existir")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        criar_snapshot_ganache()
+    else:
+        print("🔄 Resetando controle de contas...")
+        reset_accounts_control(usar_snapshot=args.rapido or None)
+        print("✅ Controle resetado!")
@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+
+from sqlalchemy import text
+from web3 import Web3
+
+from Backend.my_blockchain import sistema_cliente
+from Backend.leitura_blockchain import leitor_blockchain, Leitura
+from Backend.thread_background import ThreadBackground
+
+ENDERECO_ZERO = "0x0000000000000000000000000000000000000000"
+
+# Validade (segundos) de cada resolução em memória: limita o atraso de remoções feitas fora deste processo
+RESOLUCAO_TTL = float(os.getenv("RESOLUCAO_TTL", "600"))
+# Intervalo entre leituras incrementais dos eventos novoClienteRegistrado e blocos por get_logs
+RESOLUCAO_INTERVALO_EVENTOS = float(os.getenv("RESOLUCAO_INTERVALO_EVENTOS", "30"))
+RESOLUCAO_BLOCOS_POR_CONSULTA = int(os.getenv("RESOLUCAO_BLOCOS_POR_CONSULTA", "5000"))
+
+SQL_CLIENTES = text("SELECT referenciaPix, email FROM cliente")
+
+
+class ResolucaoClientes:
+    """
+    Cache em memória de referência Pix -> carteira e email -> carteira.
+
+    O cache é aquecido em background com os clientes do banco e os eventos
+    ``novoClienteRegistrado`` do contrato; como o banco pode ter clientes já
+    removidos da blockchain (reset), todo candidato é confirmado no contrato
+    com getEnderecoPorPix em lotes JSON-RPC antes de entrar. Depois disso só
+    os eventos novos são lidos. Uma consulta que não está no cache vai ao
+    contrato e, se o cliente existir, fica guardada. Resultados vazios não são
+    guardados: um registro feito em outro worker aparece na próxima consulta.
+    """
+
+    def __init__(self, contrato, leitor, ttl=RESOLUCAO_TTL, intervalo=RESOLUCAO_INTERVALO_EVENTOS,
+                 blocos_por_consulta=RESOLUCAO_BLOCOS_POR_CONSULTA):
+        self.contrato = contrato
+        self.leitor = leitor
+        self.ttl = ttl
+        self.intervalo = intervalo
+        self.blocos_por_consulta = blocos_por_consulta
+        self._engine = None
+        self._lock = threading.Lock()
+        self._pix = {}  # referenciaPix -> (carteira, validade)
+        self._email = {}  # email -> (carteira, validade)
+        self._por_carteira = {}  # carteira -> (referenciaPix, email)
+        self._ultimo_bloco = -1
+        self._thread = ThreadBackground("resolucao-clientes", self.aquecer, lambda: self.intervalo,
+                                        "aquecer o cache de resolução de clientes")
+
+    def configurar(self, engine):
+        """Define a engine SQLAlchemy usada para ler os clientes no aquecimento."""
+        self._engine = engine
+
+    # ---------- escrita ----------
+
+    def registrar(self, referencia_pix, email, carteira):
+        """Guarda (ou renova) a resolução de um cliente registrado no contrato."""
+        carteira = Web3.to_checksum_address(carteira)
+        validade = time.monotonic() + self.ttl
+        with self._lock:
+            self._pix[referencia_pix] = (carteira, validade)
+            if email:
+                self._email[email] = (carteira, validade)
+            self._por_carteira[carteira] = (referencia_pix, email)
+
+    def invalidar_carteira(self, carteira):
+        """Esquece o cliente dono da carteira (ex.: removido do contrato)."""
+        carteira = Web3.to_checksum_address(carteira)
+        with self._lock:
+            referencia_pix, email = self._por_carteira.pop(carteira, (None, None))
+            self._pix.pop(referencia_pix, None)
+            self._email.pop(email, None)
+
+    def limpar(self):
+        """Esquece tudo (ex.: estado da blockchain revertido para um snapshot)."""
+        with self._lock:
+            self._pix.clear()
+            self._email.clear()
+            self._por_carteira.clear()
+            self._ultimo_bloco = -1
+
+    # ---------- leitura ----------
+
+    def _em_cache(self, mapa, chave):
+        with self._lock:
+            item = mapa.get(chave)
+        if item is not None and time.monotonic() < item[1]:
+            return item[0]
+        return None
+
+    def ler_pix(self, lote, *referencias):
+        """
+        Leituras da carteira de cada referência Pix dentro do lote do chamador.
+
+        As que estão no cache já vêm resolvidas; as demais viram chamadas
+        getEnderecoPorPix no lote (junto com as outras leituras da requisição)
+        e são guardadas quando ele é executado.
+
+        Returns:
+            list[Leitura]: Uma leitura por referência (ENDERECO_ZERO se não houver cliente).
+        """
+        self.iniciar()
+        leituras = []
+        for referencia in referencias:
+            endereco = self._em_cache(self._pix, referencia)
+            if endereco is not None:
+                leituras.append(Leitura.resolvida(endereco))
+            else:
+                leituras.append(lote.chamar(
+                    self.contrato.functions.getEnderecoPorPix(referencia),
+                    depois=lambda endereco, r=referencia: self._guardar_pix(r, endereco)
+                ))
+        return leituras
+
+    def resolver_pix(self, *referencias):
+        """
+        Carteira de cada referência Pix; as que não estão no cache são lidas do contrato num único lote.
+
+        Returns:
+            list[str]: Endereço de cada referência, ENDERECO_ZERO se não houver cliente.
+        """
+        lote = self.leitor.lote()
+        leituras = self.ler_pix(lote, *referencias)
+        lote.executar()
+        return [leitura.resultado() for leitura in leituras]
+
+    def endereco_por_pix(self, referencia_pix):
+        return self.resolver_pix(referencia_pix)[0]
+
+    def endereco_por_email(self, email):
+        """Carteira do cliente com o email (ENDERECO_ZERO se não houver)."""
+        self.iniciar()
+        endereco = self._em_cache(self._email, email)
+        if endereco is None:
+            endereco = self.contrato.functions.getEnderecoPorEmail(email).call()
+            if endereco != ENDERECO_ZERO:
+                with self._lock:
+                    self._email[email] = (endereco, time.monotonic() + self.ttl)
+        return endereco
+
+    def _guardar_pix(self, referencia_pix, carteira):
+        if carteira == ENDERECO_ZERO:
+            return
+        with self._lock:
+            _, email = self._por_carteira.get(carteira, (None, None))
+        self.registrar(referencia_pix, email, carteira)
+
+    # ---------- aquecimento ----------
+
+    def _clientes_do_banco(self):
+        if self._engine is None:
+            return []
+        try:
+            with self._engine.connect() as conn:
+                return [(linha.referenciaPix, linha.email) for linha in conn.execute(SQL_CLIENTES)]
+        except Exception as e:
+            print(f"⚠️ Erro ao ler clientes do banco para o cache de resolução: {e}")
+            return []
+
+    def _clientes_dos_eventos(self, ultimo):
+        inicio = self._ultimo_bloco + 1
+        clientes = []
+        for de in range(inicio, ultimo + 1, self.blocos_por_consulta):
+            ate = min(de + self.blocos_por_consulta - 1, ultimo)
+            for log in self.contrato.events.novoClienteRegistrado.get_logs(from_block=de, to_block=ate):
+                clientes.append((log.args.referenciaPix, log.args.email))
+        self._ultimo_bloco = max(self._ultimo_bloco, ultimo)
+        return clientes
+
+    def aquecer(self):
+        """
+        Lê clientes do banco e dos eventos novos e guarda os confirmados no contrato.
+
+        Returns:
+            int: Quantidade de clientes guardados.
+        """
+        ultimo = self.leitor.w3.eth.block_number
+        if ultimo < self._ultimo_bloco:
+            # Nó reiniciado ou revertido para um snapshot: recomeça do zero
+            self.limpar()
+
+        candidatos = {}
+        if self._ultimo_bloco < 0:
+            candidatos.update(self._clientes_do_banco())
+        candidatos.update(self._clientes_dos_eventos(ultimo))
+        if not candidatos:
+            return 0
+
+        referencias = list(candidatos)
+        lote = self.leitor.lote()
+        leituras = [lote.chamar(self.contrato.functions.getEnderecoPorPix(referencia)) for referencia in referencias]
+        lote.executar()
+
+        guardados = 0
+        for referencia, leitura in zip(referencias, leituras):
+            if leitura.ok and leitura.valor != ENDERECO_ZERO:
+                self.registrar(referencia, candidatos[referencia], leitura.valor)
+                guardados += 1
+        print(f"📇 Cache de resolução: {guardados} de {len(referencias)} clientes confirmados no contrato")
+        return guardados
+
+    def iniciar(self):
+        """Inicia a thread de aquecimento."""
+        self._thread.iniciar()
+
+
+# Instância compartilhada pelo processo
+resolucao_clientes = ResolucaoClientes(sistema_cliente, leitor_blockchain)
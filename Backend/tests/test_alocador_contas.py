@@ -0,0 +1,83 @@
+import json
+import threading
+
+import pytest
+
+from Backend.alocador_contas import AlocadorContas
+
+CHAVES = {indice: "0x" + f"{indice + 1:064x}" for indice in range(1, 7)}
+
+
+class Validador:
+    def __init__(self, invalidas=()):
+        self.invalidas = set(invalidas)
+        self.chamadas = 0
+
+    def __call__(self, enderecos):
+        self.chamadas += 1
+        return [endereco not in self.invalidas for endereco in enderecos]
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    return str(tmp_path / "accounts_control.json")
+
+
+def test_aloca_em_ordem_e_valida_uma_vez(arquivo):
+    validar = Validador()
+    alocador = AlocadorContas(CHAVES, arquivo, validar)
+
+    primeira, chave = alocador.alocar()
+    segunda, _ = alocador.alocar()
+
+    assert primeira == alocador.enderecos[1] and chave == CHAVES[1]
+    assert segunda == alocador.enderecos[2]
+    assert validar.chamadas == 1
+
+
+def test_contas_invalidas_viram_usadas(arquivo):
+    alocador = AlocadorContas(CHAVES, arquivo, lambda enderecos: None)
+    alocador.validar = Validador(invalidas={alocador.enderecos[1], alocador.enderecos[2]})
+
+    endereco, _ = alocador.alocar()
+
+    assert endereco == alocador.enderecos[3]
+    with open(arquivo) as f:
+        estado = json.load(f)
+    assert {alocador.enderecos[1], alocador.enderecos[2], endereco} <= set(estado["used_accounts"])
+
+
+def test_esgota_e_liberar_devolve_a_conta(arquivo):
+    alocador = AlocadorContas(CHAVES, arquivo, Validador())
+    alocadas = [alocador.alocar()[0] for _ in CHAVES]
+
+    assert alocador.alocar() == (None, None)
+    alocador.liberar(alocadas[2])
+    assert alocador.alocar()[0] == alocadas[2]
+
+
+def test_estado_compartilhado_pelo_arquivo(arquivo):
+    validar = Validador()
+    primeiro = AlocadorContas(CHAVES, arquivo, validar)
+    segundo = AlocadorContas(CHAVES, arquivo, validar)
+
+    assert primeiro.alocar()[0] != segundo.alocar()[0]
+    assert validar.chamadas == 1
+
+
+def test_threads_nunca_recebem_a_mesma_conta(arquivo):
+    alocador = AlocadorContas(CHAVES, arquivo, Validador())
+    resultados = []
+
+    def alocar():
+        resultados.append(alocador.alocar()[0])
+
+    threads = [threading.Thread(target=alocar) for _ in range(len(CHAVES) + 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entregues = [endereco for endereco in resultados if endereco is not None]
+    assert len(entregues) == len(CHAVES)
+    assert len(set(entregues)) == len(CHAVES)
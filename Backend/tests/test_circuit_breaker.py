@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from Backend import circuit_breaker
+from Backend.circuit_breaker import CircuitBreaker, FECHADO, ABERTO, MEIO_ABERTO
+from Backend.cotacao_service import FonteCotacao, _extrair_coingecko
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _breaker(monkeypatch, **opcoes):
+    relogio = Relogio()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", relogio)
+    return CircuitBreaker("teste", **opcoes), relogio
+
+
+def test_abre_apos_limite_de_falhas(monkeypatch):
+    breaker, _ = _breaker(monkeypatch, limite_falhas=2, backoff_base=5)
+    breaker.registrar_falha("x")
+    assert breaker.estado()["estado"] == FECHADO
+    breaker.registrar_falha("x")
+    assert breaker.estado()["estado"] == ABERTO
+    assert not breaker.permite()
+
+
+def test_meio_aberto_libera_uma_chamada_de_teste(monkeypatch):
+    breaker, relogio = _breaker(monkeypatch, limite_falhas=1, backoff_base=5)
+    breaker.registrar_falha()
+    relogio.agora += 5
+
+    assert breaker.permite()
+    assert breaker.estado()["estado"] == MEIO_ABERTO
+    assert not breaker.permite()
+
+    breaker.registrar_sucesso()
+    assert breaker.estado()["estado"] == FECHADO
+    assert breaker.permite()
+
+
+def test_falha_no_teste_reabre_com_backoff_dobrado(monkeypatch):
+    breaker, relogio = _breaker(monkeypatch, limite_falhas=1, backoff_base=5, backoff_max=60)
+    breaker.registrar_falha()
+    relogio.agora += 5
+    assert breaker.permite()
+    breaker.registrar_falha()
+
+    assert breaker.estado()["estado"] == ABERTO
+    assert breaker.estado()["reabre_em_s"] == 10.0
+
+
+def test_retry_after_define_espera_minima(monkeypatch):
+    breaker, _ = _breaker(monkeypatch, limite_falhas=3, backoff_base=5)
+    breaker.registrar_falha("HTTP 429", espera_minima=30)
+    assert breaker.estado()["estado"] == ABERTO
+    assert breaker.estado()["reabre_em_s"] == 30.0
+
+
+def test_corpo_malformado_conta_como_falha_e_libera_o_teste(monkeypatch):
+    fonte = FonteCotacao("teste", "http://cotacao.invalid", {}, _extrair_coingecko)
+    resposta = SimpleNamespace(status_code=200, url=fonte.url, json=lambda: ["erro"])
+    monkeypatch.setattr(fonte.session, "get", lambda *args, **kwargs: resposta)
+    fonte.breaker._estado = MEIO_ABERTO
+
+    assert fonte.breaker.permite()
+    assert fonte.consultar() is None
+    assert fonte.breaker.estado()["estado"] == ABERTO
+    assert fonte.breaker.estado()["total_falhas"] == 1
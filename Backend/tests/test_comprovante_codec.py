@@ -0,0 +1,83 @@
+import pytest
+
+from Backend import comprovante_codec
+from Backend.comprovante_codec import (
+    PREFIXO, Comprovante, ComprovanteInvalido, SegredoNaoConfigurado, b45decode, b45encode,
+    codificar_comprovante, decodificar_comprovante
+)
+
+DADOS = {
+    "hash_transacao": "0x" + "ab" * 32,
+    "valor_eth": 0.125,
+    "valor_reais": 2345.67,
+    "tipo_transferencia": "Solidária"
+}
+
+
+@pytest.fixture(autouse=True)
+def segredo(monkeypatch):
+    monkeypatch.setenv("COMPROVANTE_SEGREDO", "segredo-de-teste")
+    monkeypatch.delenv("COMPROVANTE_SEGREDO_DESENVOLVIMENTO", raising=False)
+    comprovante_codec._segredo.cache_clear()
+    yield
+    comprovante_codec._segredo.cache_clear()
+
+
+def test_base45_ida_e_volta():
+    for dados in (b"", b"\x00", b"AB", b"ietf!", bytes(range(256))):
+        assert b45decode(b45encode(dados)) == dados
+    assert b45encode(b"AB") == "BB8"
+
+
+def test_ida_e_volta():
+    texto = codificar_comprovante(DADOS)
+    comprovante = decodificar_comprovante(texto)
+
+    assert texto.startswith(PREFIXO)
+    assert comprovante == Comprovante(
+        hash_transacao="ab" * 32,
+        valor_wei=125 * 10 ** 15,
+        valor_centavos=234567,
+        tipo_transferencia="Solidária"
+    )
+
+
+def test_rejeita_comprovante_adulterado():
+    texto = codificar_comprovante(DADOS)
+    corpo = bytearray(b45decode(texto[len(PREFIXO):]))
+    corpo[40] ^= 0x01
+    with pytest.raises(ComprovanteInvalido):
+        decodificar_comprovante(PREFIXO + b45encode(bytes(corpo)))
+
+
+def test_rejeita_assinatura_de_outro_segredo(monkeypatch):
+    texto = codificar_comprovante(DADOS)
+    monkeypatch.setenv("COMPROVANTE_SEGREDO", "outro")
+    comprovante_codec._segredo.cache_clear()
+    with pytest.raises(ComprovanteInvalido):
+        decodificar_comprovante(texto)
+
+
+@pytest.mark.parametrize("texto", [None, "", "JSON:{}", PREFIXO + "A", PREFIXO + "ab", PREFIXO + "00"])
+def test_rejeita_formato_invalido(texto):
+    with pytest.raises(ComprovanteInvalido):
+        decodificar_comprovante(texto)
+
+
+def test_sem_segredo_recusa_assinar_e_verificar(monkeypatch):
+    texto = codificar_comprovante(DADOS)
+    monkeypatch.delenv("COMPROVANTE_SEGREDO")
+    monkeypatch.setenv("PRIVATEKEY", "0x" + "42" * 32)
+    comprovante_codec._segredo.cache_clear()
+
+    with pytest.raises(SegredoNaoConfigurado):
+        codificar_comprovante(DADOS)
+    with pytest.raises(SegredoNaoConfigurado):
+        decodificar_comprovante(texto)
+
+
+def test_chave_de_desenvolvimento_so_com_flag(monkeypatch):
+    monkeypatch.delenv("COMPROVANTE_SEGREDO")
+    monkeypatch.setenv("COMPROVANTE_SEGREDO_DESENVOLVIMENTO", "1")
+    comprovante_codec._segredo.cache_clear()
+    assert decodificar_comprovante(codificar_comprovante(DADOS)).valor_centavos == 234567
@@ -0,0 +1,29 @@
+from Backend.geracao_chain import GeracaoChain
+
+
+def _geracao(tmp_path, limpezas):
+    geracao = GeracaoChain(arquivo=str(tmp_path / "geracao.json"), intervalo=0)
+    geracao.ao_mudar(lambda: limpezas.append(1))
+    return geracao
+
+
+def test_worker_limpa_caches_quando_outro_processo_avanca_a_geracao(tmp_path):
+    limpezas_worker, limpezas_reset = [], []
+    worker = _geracao(tmp_path, limpezas_worker)
+    reset = _geracao(tmp_path, limpezas_reset)
+    assert not worker.conferir()
+
+    assert reset.avancar() == 1
+    assert limpezas_reset == [1]
+
+    assert worker.conferir()
+    assert not worker.conferir()
+    assert limpezas_worker == [1]
+
+
+def test_primeira_conferencia_nao_limpa(tmp_path):
+    limpezas = []
+    _geracao(tmp_path, []).avancar()
+
+    assert not _geracao(tmp_path, limpezas).conferir()
+    assert limpezas == []
@@ -0,0 +1,104 @@
+import pytest
+from hexbytes import HexBytes
+
+from Backend.gerenciador_nonce import GerenciadorNonce
+
+CHAVE = "0x" + "11" * 32
+
+
+class Assinada:
+    def __init__(self, tx):
+        self.raw_transaction = HexBytes(bytes([tx["nonce"]]))
+        self.hash = HexBytes(bytes([tx["nonce"]]) * 32)
+
+
+class EthFalso:
+    """Nó mínimo: ``respostas`` define, envio a envio, o erro devolvido (ou None para aceitar)."""
+
+    def __init__(self, pendentes=0, respostas=()):
+        self.pendentes = pendentes
+        self.respostas = list(respostas)
+        self.enviados = []
+        self.account = self
+
+    def get_transaction_count(self, endereco, bloco):
+        return self.pendentes
+
+    def sign_transaction(self, tx, private_key):
+        return Assinada(tx)
+
+    def send_raw_transaction(self, raw):
+        self.enviados.append(raw[0])
+        erro = self.respostas.pop(0) if self.respostas else None
+        if erro is not None:
+            raise ValueError(erro)
+        return HexBytes(bytes([raw[0]]) * 32)
+
+
+class W3Falso:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def _montar(nonce):
+    return {"nonce": nonce}
+
+
+def test_nonces_consecutivos_sem_reler_o_no():
+    eth = EthFalso(pendentes=5)
+    gerenciador = GerenciadorNonce(W3Falso(eth))
+    gerenciador.enviar(CHAVE, _montar)
+    eth.pendentes = 0
+    gerenciador.enviar(CHAVE, _montar)
+    assert eth.enviados == [5, 6]
+
+
+@pytest.mark.parametrize("mensagem", ["already known", "known transaction"])
+def test_transacao_ja_conhecida_conta_como_enviada(mensagem):
+    eth = EthFalso(pendentes=3, respostas=[mensagem])
+    gerenciador = GerenciadorNonce(W3Falso(eth))
+
+    tx_hash = gerenciador.enviar(CHAVE, _montar)
+
+    assert tx_hash == HexBytes(bytes([3]) * 32)
+    assert eth.enviados == [3]
+    gerenciador.enviar(CHAVE, _montar)
+    assert eth.enviados == [3, 4]
+
+
+def test_nonce_recusado_relido_do_no_e_reenviado_uma_vez():
+    eth = EthFalso(pendentes=2, respostas=["nonce too low"])
+    gerenciador = GerenciadorNonce(W3Falso(eth))
+    gerenciador.enviar(CHAVE, _montar)
+    eth.pendentes = 4
+    eth.respostas = ["nonce too low"]
+
+    tx_hash = gerenciador.enviar(CHAVE, _montar)
+
+    assert tx_hash == HexBytes(bytes([4]) * 32)
+    assert eth.enviados == [2, 2, 3, 4]
+
+
+def test_sincronizar_esquece_nonce_a_frente_do_no():
+    eth = EthFalso(pendentes=7)
+    gerenciador = GerenciadorNonce(W3Falso(eth))
+    gerenciador.enviar(CHAVE, _montar)
+    gerenciador.enviar(CHAVE, _montar)
+    # Nó reiniciado: as transações 7 e 8 sumiram
+    eth.pendentes = 7
+
+    assert len(gerenciador.sincronizar()) == 1
+    gerenciador.enviar(CHAVE, _montar)
+    assert eth.enviados == [7, 8, 7]
+
+
+def test_sincronizar_mantem_nonce_em_dia_com_o_no():
+    eth = EthFalso(pendentes=1)
+    gerenciador = GerenciadorNonce(W3Falso(eth))
+    gerenciador.enviar(CHAVE, _montar)
+    eth.pendentes = 2
+
+    assert gerenciador.sincronizar() == []
+    eth.pendentes = 0
+    gerenciador.enviar(CHAVE, _montar)
+    assert eth.enviados == [1, 2]
@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from Backend.grafico_service import PoolRenderizacao, GraficoOcupado
+
+
+def _travar(segundos):
+    time.sleep(segundos)
+    return b"png"
+
+
+def _rapido():
+    return b"png"
+
+
+def test_timeout_encerra_o_processo_travado_e_devolve_a_vaga():
+    pool = PoolRenderizacao(processos=1, max_pendentes=1, timeout=0.5)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.renderizar(_travar, 60)
+
+        # A vaga volta quando o processo travado é encerrado, sem esperar os 60 s
+        limite = time.monotonic() + 10
+        while True:
+            try:
+                assert pool.renderizar(_rapido) == b"png"
+                break
+            except GraficoOcupado:
+                assert time.monotonic() < limite
+                time.sleep(0.1)
+    finally:
+        if pool._executor is not None:
+            pool._descartar_executor(pool._executor, encerrar_processos=True)
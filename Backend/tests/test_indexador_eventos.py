@@ -0,0 +1,91 @@
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from Backend.indexador_eventos import IndexadorEventos
+
+ORIGEM = "0x" + "11" * 20
+DESTINO = "0x" + "22" * 20
+TX_PAGAMENTO = "0x" + "01" * 32
+TX_DOACAO = "0x" + "02" * 32
+
+
+class LeitorFalso:
+    def executar(self, chamadas):
+        return [chamada() for chamada in chamadas], "lote"
+
+
+class Web3Falso:
+    def __init__(self, hashes=None):
+        self.eth = self
+        self.hashes = hashes or {}
+
+    def get_block(self, numero):
+        return {"timestamp": 1700000000 + numero, "hash": self.hashes.get(numero)}
+
+
+def _evento(nome, tx_hash, bloco, **args):
+    return AttributeDict({
+        "event": nome,
+        "transactionHash": HexBytes(tx_hash),
+        "blockNumber": bloco,
+        "args": AttributeDict(args)
+    })
+
+
+def _indexador(w3=None):
+    return IndexadorEventos(w3 or Web3Falso(), LeitorFalso())
+
+
+def test_pagamento_recebido_prevalece_sobre_pagamento_realizado():
+    eventos = [
+        (_evento("pagamentoRealizado", TX_PAGAMENTO, 5, carteira=ORIGEM, valor=10 ** 18,
+                 referenciaPix="pix-1"), 1),
+        (_evento("PagamentoRecebido", TX_PAGAMENTO, 5, clienteDestino=DESTINO, pagador=ORIGEM,
+                 valorTotal=10 ** 18, valorCliente=9 * 10 ** 17, valorComissao=5 * 10 ** 16,
+                 valorParaOng=5 * 10 ** 16, timestamp=1699999999, referenciaPix="pix-1",
+                 nomeCliente="Bia", emailCliente="bia@x"), 2),
+    ]
+    linhas, registrados = _indexador()._montar(eventos)
+
+    assert registrados == []
+    assert len(linhas) == 1
+    linha = linhas[0]
+    assert linha["hash"] == TX_PAGAMENTO
+    assert linha["tipo"] == "TRANSFERENCIA"
+    assert linha["taxa_ong_wei"] == 5 * 10 ** 16
+    assert linha["timestamp"] == 1699999999
+    assert DESTINO in linha["observacoes"]
+
+
+def test_prioridade_independe_da_ordem_dos_logs():
+    recebido = _evento("PagamentoRecebido", TX_PAGAMENTO, 5, clienteDestino=DESTINO, pagador=ORIGEM,
+                       valorTotal=1, valorCliente=1, valorComissao=0, valorParaOng=0, timestamp=1,
+                       referenciaPix="pix-1", nomeCliente="Bia", emailCliente="bia@x")
+    realizado = _evento("pagamentoRealizado", TX_PAGAMENTO, 5, carteira=ORIGEM, valor=1, referenciaPix="pix-1")
+
+    linhas, _ = _indexador()._montar([(recebido, 2), (realizado, 1)])
+    assert [linha["tipo"] for linha in linhas] == ["TRANSFERENCIA"]
+
+
+def test_doacao_usa_timestamp_do_bloco_e_registro_marca_cliente():
+    eventos = [
+        (_evento("doacaoRealizada", TX_DOACAO, 7, doador=ORIGEM, valor=123, nomeDoador="Ana",
+                 emailDoador="ana@x"), 2),
+        (_evento("novoClienteRegistrado", "0x" + "03" * 32, 8, carteira=ORIGEM, referenciaPix="pix-a",
+                 email="ana@x"), 0),
+    ]
+    linhas, registrados = _indexador()._montar(eventos)
+
+    assert registrados == [ORIGEM]
+    assert linhas[0]["tipo"] == "PAGAMENTO"
+    assert linhas[0]["timestamp"] == 1700000007
+    assert linhas[0]["pagador"] == ORIGEM
+
+
+def test_chain_diferente_no_bloco_do_checkpoint():
+    indexador = _indexador(Web3Falso({10: HexBytes("0x" + "aa" * 32)}))
+
+    assert indexador._mesma_chain(10, "0x" + "aa" * 32, ultimo=20)
+    assert not indexador._mesma_chain(10, "0x" + "bb" * 32, ultimo=20)
+    assert not indexador._mesma_chain(30, "0x" + "aa" * 32, ultimo=20)
+    assert indexador._mesma_chain(10, None, ultimo=20)
@@ -0,0 +1,37 @@
+import pytest
+
+from Backend.leitura_blockchain import LeitorBlockchain
+
+
+class Web3SemLote:
+    def batch_requests(self):
+        raise ConnectionError("lote recusado")
+
+
+def _leitor(**opcoes):
+    return LeitorBlockchain(Web3SemLote(), max_threads=2, **opcoes)
+
+
+def _falha():
+    raise TimeoutError("nó fora do ar")
+
+
+def test_falha_de_uma_chamada_nao_desliga_os_lotes():
+    leitor = _leitor()
+    with pytest.raises(TimeoutError):
+        leitor.executar([lambda: 1, _falha])
+    assert leitor.lote_suportado
+
+
+def test_lote_recusado_com_chamadas_avulsas_ok_usa_modo_concorrente():
+    leitor = _leitor()
+    resultados, modo = leitor.executar([lambda: 1, lambda: 2])
+
+    assert (resultados, modo) == ([1, 2], "concorrente")
+    assert not leitor.lote_suportado
+
+
+def test_lotes_voltam_depois_do_tempo_de_nova_tentativa():
+    leitor = _leitor(nova_tentativa=0)
+    leitor.executar([lambda: 1])
+    assert leitor.lote_suportado
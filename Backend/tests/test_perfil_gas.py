@@ -0,0 +1,71 @@
+import pytest
+
+from Backend.perfil_gas import PerfilGas, forma_argumento
+
+
+class FuncaoFalsa:
+    def __init__(self, fn_name, *args, gas=50000, erro=None):
+        self.address = "0x" + "ab" * 20
+        self.fn_name = fn_name
+        self.args = args
+        self.gas = gas
+        self.erro = erro
+        self.estimativas = 0
+
+    def estimate_gas(self, transacao):
+        self.estimativas += 1
+        if self.erro is not None:
+            raise self.erro
+        return self.gas
+
+
+def test_forma_argumento_agrupa_strings_por_palavra():
+    assert forma_argumento("a") == forma_argumento("b" * 31)
+    assert forma_argumento("a") != forma_argumento("b" * 32)
+    assert forma_argumento(10) == forma_argumento(20)
+
+
+def test_mesma_forma_reaproveita_estimativa():
+    perfil = PerfilGas(margem=1.5)
+    primeira = FuncaoFalsa("registrarCliente", "Ana", "pix-1")
+    segunda = FuncaoFalsa("registrarCliente", "Bia", "pix-2")
+
+    assert perfil.estimar(primeira, "0x1") == 75000
+    assert perfil.estimar(segunda, "0x2") == 75000
+    assert segunda.estimativas == 0
+
+
+def test_funcao_por_remetente_separa_remetente_e_destino():
+    perfil = PerfilGas(margem=1.0, por_remetente={"transferirETHDireto"})
+    destino_a, destino_b = "0x" + "01" * 20, "0x" + "02" * 20
+
+    perfil.estimar(FuncaoFalsa("transferirETHDireto", "pix", destino_a), "0x1", valor=1)
+    outro_remetente = FuncaoFalsa("transferirETHDireto", "pix", destino_a, gas=70000)
+    outro_destino = FuncaoFalsa("transferirETHDireto", "pix", destino_b, gas=80000)
+    repetida = FuncaoFalsa("transferirETHDireto", "pix", destino_a, gas=1)
+
+    assert perfil.estimar(outro_remetente, "0x2", valor=1) == 70000
+    assert perfil.estimar(outro_destino, "0x1", valor=1) == 80000
+    assert perfil.estimar(repetida, "0x1", valor=1) == 50000
+    assert repetida.estimativas == 0
+
+
+def test_estimativa_com_revert_usa_limite_fixo_sem_guardar():
+    perfil = PerfilGas()
+    funcao = FuncaoFalsa("doacaoDireta", erro=ValueError("execution reverted"))
+
+    assert perfil.estimar(funcao, "0x1", valor=1, padrao=300000) == 300000
+    assert perfil.estimar(funcao, "0x1", valor=1, padrao=300000) == 300000
+    assert funcao.estimativas == 2
+    with pytest.raises(ValueError):
+        perfil.estimar(funcao, "0x1", valor=1)
+
+
+def test_esquecer_forca_nova_estimativa():
+    perfil = PerfilGas(margem=1.0)
+    funcao = FuncaoFalsa("transferenciaSemTaxas", "pix", "0x" + "01" * 20)
+
+    perfil.estimar(funcao, "0x1", valor=1)
+    perfil.esquecer(funcao, "0x1", valor=1)
+    perfil.estimar(funcao, "0x1", valor=1)
+    assert funcao.estimativas == 2
@@ -0,0 +1,22 @@
+import pytest
+from web3 import HTTPProvider
+
+from Backend.provedor_web3 import ENDERECO_PADRAO, criar_provider, transporte_do_endereco
+
+
+def test_transporte_pelo_endereco():
+    assert transporte_do_endereco("http://localhost:8545") == "http"
+    assert transporte_do_endereco("wss://no.exemplo") == "ws"
+    assert transporte_do_endereco("/tmp/geth.ipc") == "ipc"
+    assert transporte_do_endereco(None) == "http"
+
+
+def test_transporte_invalido():
+    with pytest.raises(ValueError):
+        transporte_do_endereco("http://localhost:8545", transporte="grpc")
+
+
+def test_sem_endereco_usa_no_padrao():
+    provider = criar_provider(None, transporte="auto")
+    assert isinstance(provider, HTTPProvider)
+    assert provider.endpoint_uri == ENDERECO_PADRAO
@@ -0,0 +1,40 @@
+import threading
+
+from Backend.thread_background import ThreadBackground
+
+
+def test_iniciar_repetido_cria_uma_thread_e_acordar_antecipa_a_rodada():
+    rodadas = []
+    preparos = []
+    segunda_rodada = threading.Event()
+
+    def tarefa():
+        rodadas.append(1)
+        if len(rodadas) == 2:
+            segunda_rodada.set()
+
+    thread = ThreadBackground("teste", tarefa, None, "testar", preparar=lambda: preparos.append(1))
+    thread.iniciar()
+    primeira = thread._thread
+    thread.iniciar()
+    assert thread._thread is primeira
+
+    thread.acordar()
+    assert segunda_rodada.wait(2)
+    assert preparos == [1]
+
+
+def test_erro_na_tarefa_nao_derruba_a_thread():
+    rodadas = []
+    segunda_rodada = threading.Event()
+
+    def tarefa():
+        rodadas.append(1)
+        if len(rodadas) == 1:
+            raise RuntimeError("nó fora do ar")
+        segunda_rodada.set()
+
+    thread = ThreadBackground("teste-erro", tarefa, lambda: 0.01, "testar")
+    thread.iniciar()
+    assert segunda_rodada.wait(2)
+    assert thread.ativa
@@ -0,0 +1,62 @@
+import threading
+
+
+class ThreadBackground:
+    """
+    Thread daemon que repete uma tarefa periodicamente.
+
+    Threads não atravessam o fork dos workers do gunicorn: ``iniciar`` é
+    chamado em cada processo (post_fork ou no primeiro uso) e chamadas
+    repetidas não criam uma segunda thread. ``acordar`` antecipa a próxima
+    rodada sem esperar o intervalo.
+    """
+
+    def __init__(self, nome, tarefa, intervalo, descricao, preparar=None):
+        """
+        Args:
+            nome (str): Nome da thread.
+            tarefa (callable): Executada a cada rodada; exceções são registradas e a thread segue.
+            intervalo (float | callable): Espera entre rodadas em segundos, ou função que a
+                devolve (None espera até ``acordar``).
+            descricao (str): Trecho da mensagem de erro ("Erro ao <descricao>").
+            preparar (callable, opcional): Executada uma vez, antes da primeira rodada.
+        """
+        self.nome = nome
+        self.tarefa = tarefa
+        self.intervalo = intervalo
+        self.descricao = descricao
+        self.preparar = preparar
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    @property
+    def ativa(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self):
+        """Inicia a thread (uma por processo, depois do fork)."""
+        if self.ativa:
+            return
+        with self._lock:
+            if not self.ativa:
+                self._thread = threading.Thread(target=self._executar, name=self.nome, daemon=True)
+                self._thread.start()
+
+    def acordar(self):
+        """Faz a próxima rodada começar já."""
+        self._acordar.set()
+
+    def _espera(self):
+        return self.intervalo() if callable(self.intervalo) else self.intervalo
+
+    def _executar(self):
+        if self.preparar is not None:
+            self.preparar()
+        while True:
+            try:
+                self.tarefa()
+            except Exception as e:
+                print(f"⚠️ Erro ao {self.descricao}: {e}")
+            self._acordar.wait(self._espera())
+            self._acordar.clear()
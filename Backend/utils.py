@@ -1,12 +1,25 @@
 # Funções auxiliares
 import base64
+from concurrent.futures import ThreadPoolExecutor
+
+from web3.exceptions import TimeExhausted
 
 from Backend.my_blockchain import w3, sistema_cliente, PRIVATE_KEY
-import requests
-import qrcode
+from Backend.gerenciador_nonce import gerenciador_nonce, endereco_da_chave
+from Backend.alocador_contas import AlocadorContas, trava_arquivo, gravar_json_atomico
+from Backend.leitura_blockchain import leitor_blockchain
+from Backend.parametros_rede import parametros_rede
+from Backend.resolucao_clientes import resolucao_clientes
+from Backend.cache_saldos import cache_saldos
+from Backend.perfil_gas import perfil_gas
+from Backend.geracao_chain import geracao_chain
+from Backend.bootstrap import esquecer_conta_ong
+from Backend.pool_contas_hd import PoolContasHD, CONTAS_MNEMONIC, CONTAS_VALOR_INICIAL_ETH
+from Backend.cotacao_service import cotacao_cache
+from Backend.qr_cache import cache_qr_comprovante
+from Backend.comprovante_service import conteudo_comprovante
 import os
 import json
-from io import BytesIO
 
 # CONFIGURAÇÃO BASE
 GANACHE_INITIAL_BALANCE = 200
@@ -64,7 +77,7 @@ GANACHE_PRIVATE_KEYS = {
     50: "0xe70f2b0e9109508388130fce88920d4201b281cb01a4fe4710e39e6c5be4af4c"
 }
 
-ACCOUNTS_CONTROL_FILE = "accounts_control.json"
+ACCOUNTS_CONTROL_FILE = os.getenv("ACCOUNTS_CONTROL_FILE", "accounts_control.json")
 
 def load_accounts_control():
     """Carrega o controle de contas usadas"""
@@ -78,56 +91,157 @@ def load_accounts_control():
     return 3, []
 
 
-def save_accounts_control(next_index, used_accounts):
-    """Salva o controle de contas usadas"""
-    try:
-        data = {
-            'next_index': next_index,
-            'used_accounts': used_accounts
-        }
-        with open(ACCOUNTS_CONTROL_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"⚠️ Erro ao salvar controle de contas: {e}")
+GANACHE_SNAPSHOT_FILE = os.getenv("GANACHE_SNAPSHOT_FILE", "ganache_snapshot.json")
+# Tempo máximo de espera por cada recibo no reset em pipeline (segundos)
+RESET_TIMEOUT_RECIBO = float(os.getenv("RESET_TIMEOUT_RECIBO", "60"))
+RESET_MAX_THREADS = int(os.getenv("RESET_MAX_THREADS", "16"))
+
+
+def criar_snapshot_ganache():
+    """
+    Tira um snapshot do nó de desenvolvimento (evm_snapshot) para resets rápidos.
 
+    Rode com a chain no estado "limpo" (após o deploy). Só funciona em Ganache/Hardhat/Anvil.
+
+    Returns:
+        str | None: Id do snapshot, ou None se o nó não suportar.
+    """
+    resposta = w3.provider.make_request("evm_snapshot", [])
+    snapshot_id = resposta.get("result")
+    if not snapshot_id:
+        print(f"⚠️ Nó não suporta evm_snapshot: {resposta.get('error')}")
+        return None
+    gravar_json_atomico(GANACHE_SNAPSHOT_FILE, {"snapshot_id": snapshot_id})
+    print(f"📸 Snapshot {snapshot_id} salvo em {GANACHE_SNAPSHOT_FILE}")
+    return snapshot_id
+
+
+def reverter_snapshot_ganache():
+    """
+    Volta a chain ao snapshot salvo (evm_revert) e tira um novo, já que o
+    Ganache descarta o snapshot usado.
 
-def reset_accounts_control():
-    """Reseta o controle de contas de forma atômica"""
+    Returns:
+        bool: True se a chain foi revertida.
+    """
     try:
-        temp_file = ACCOUNTS_CONTROL_FILE + ".tmp"
+        with open(GANACHE_SNAPSHOT_FILE) as f:
+            snapshot_id = json.load(f)["snapshot_id"]
+    except (OSError, ValueError, KeyError):
+        print("ℹ️ Nenhum snapshot salvo; use criar_snapshot_ganache() com a chain limpa")
+        return False
+
+    resposta = w3.provider.make_request("evm_revert", [snapshot_id])
+    if resposta.get("result") is not True:
+        print(f"⚠️ evm_revert falhou para o snapshot {snapshot_id}: {resposta.get('error', resposta.get('result'))}")
+        return False
+
+    print(f"⏪ Chain revertida para o snapshot {snapshot_id}")
+    criar_snapshot_ganache()
+    return True
+
+
+def enviar_em_pipeline(funcoes, private_key, gas):
+    """
+    Envia várias transações em sequência sem esperar cada recibo.
+
+    Os nonces consecutivos vêm do GerenciadorNonce, todas as transações são
+    assinadas e enviadas de uma vez e os recibos são aguardados em paralelo. Se
+    um envio falhar, os seguintes não são enviados (deixariam um buraco de nonce).
+
+    Args:
+        funcoes (list): Funções de contrato já com argumentos (ex.: contrato.functions.f(x))
+            ou dicionários de transação simples (ex.: {"to": ..., "value": ...}).
+        private_key (str): Chave privada que assina as transações.
+        gas (int): Limite de gas de cada transação.
+
+    Returns:
+        list: Recibo de cada transação (None para as que falharam ou não foram enviadas).
+    """
+    parametros = parametros_rede.parametros_tx(gas=gas)
+    remetente = endereco_da_chave(private_key)
 
-        # Cria estado inicial "zerado"
+    def montador(funcao):
+        if isinstance(funcao, dict):
+            return lambda nonce: {**parametros, **funcao, "nonce": nonce}
+        return lambda nonce: funcao.build_transaction({**parametros, "from": remetente, "nonce": nonce})
+
+    hashes = gerenciador_nonce.enviar_sequencia(private_key, [montador(funcao) for funcao in funcoes])
+    print(f"📤 {len(hashes)} de {len(funcoes)} transações enviadas")
+
+    def aguardar(tx_hash):
+        try:
+            return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=RESET_TIMEOUT_RECIBO)
+        except Exception as e:
+            print(f"⚠️ Sem recibo para {tx_hash.hex()}: {e}")
+            return None
+
+    recibos = []
+    if hashes:
+        with ThreadPoolExecutor(max_workers=min(RESET_MAX_THREADS, len(hashes))) as executor:
+            recibos = list(executor.map(aguardar, hashes))
+    return recibos + [None] * (len(funcoes) - len(recibos))
+
+
+def reset_accounts_control(usar_snapshot=None):
+    """
+    Reseta o controle de contas e remove da blockchain os clientes das contas do Ganache.
+
+    Com ``usar_snapshot`` (ou RESET_USAR_SNAPSHOT=1) tenta antes o caminho rápido
+    do nó de desenvolvimento: evm_revert para o snapshot salvo por
+    criar_snapshot_ganache(). Nesse caso as contas HD prontas são descartadas
+    e a geração da chain avança, para que os workers da API descartem seus
+    caches (ver GeracaoChain). Sem snapshot, remove os clientes registrados em
+    pipeline (ver enviar_em_pipeline).
+
+    Returns:
+        bool: True se o reset foi concluído.
+    """
+    if usar_snapshot is None:
+        usar_snapshot = os.getenv("RESET_USAR_SNAPSHOT") == "1"
+
+    try:
+        # Cria estado inicial "zerado" (sem lista de livres: é remontada na próxima alocação)
         data = {
             'next_index': 3,
             'used_accounts': []
         }
 
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
-
-        # Substitui o arquivo antigo de forma atômica
-        os.replace(temp_file, ACCOUNTS_CONTROL_FILE)
-
-        # Owner do contrato (tem permissão para remover)
-        owner_account = w3.eth.accounts[0]
-
-        # Lista de contas que você quer remover
-        ganache_accounts = w3.eth.accounts[3:51]
-
-        for cliente in ganache_accounts:
-            # verifica se o cliente está registrado
-            if sistema_cliente.functions.ClienteRegistrado(cliente).call():
-                tx = sistema_cliente.functions.removerCliente(cliente).build_transaction({
-                    'from': owner_account,
-                    'gas': 200000,
-                    'nonce': w3.eth.get_transaction_count(owner_account)
-                })
-                signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-                tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Substitui o arquivo antigo de forma atômica, sob a mesma trava do alocador
+        with trava_arquivo(ACCOUNTS_CONTROL_FILE + ".lock"):
+            gravar_json_atomico(ACCOUNTS_CONTROL_FILE, data)
+
+        if usar_snapshot and reverter_snapshot_ganache():
+            # O financiamento das contas HD feito depois do snapshot foi desfeito junto
+            if pool_contas_hd.ativo:
+                print(f"🗑️ {pool_contas_hd.descartar_prontas()} contas HD prontas descartadas")
+            # Os workers veem a geração nova e descartam o que leram da chain antiga
+            geracao_chain.avancar()
+            print("✅ Controle de contas resetado com sucesso (snapshot)!")
+            return True
+
+        # Contas do Ganache distribuídas a clientes: registro consultado num único lote
+        _, snapshot = snapshot_contas_ganache()
+        registrados = [conta.endereco for conta in snapshot.contas if conta.registrado]
+        print(f"ℹ️ {len(registrados)} de {len(snapshot.contas)} contas registradas no contrato")
+
+        recibos = enviar_em_pipeline(
+            [sistema_cliente.functions.removerCliente(cliente) for cliente in registrados],
+            PRIVATE_KEY, gas=200000  # owner do contrato (tem permissão para remover)
+        )
+
+        falhas = 0
+        for cliente, recibo in zip(registrados, recibos):
+            if recibo is not None and recibo["status"] == 1:
+                resolucao_clientes.invalidar_carteira(cliente)
                 print(f"✅ Cliente {cliente} removido com sucesso")
             else:
-                print(f"ℹ️ Cliente {cliente} não está registrado")
+                falhas += 1
+                print(f"❌ Cliente {cliente} não foi removido")
+
+        if falhas:
+            print(f"⚠️ {falhas} clientes não foram removidos; rode o reset novamente")
+            return False
 
         print("✅ Controle de contas resetado com sucesso!")
         return True
@@ -136,100 +250,123 @@ def reset_accounts_control():
         print(f"⚠️ Erro ao resetar controle de contas: {e}")
         return False
 
+def saldo_significativamente_usado(current_balance):
+    """Aplica a tolerância sobre o saldo (em ETH) de uma conta: (usada?, saldo, diferença)."""
+    difference = abs(current_balance - GANACHE_INITIAL_BALANCE)
+
+    # Se a diferença for maior que a tolerância, considera como usada
+    return difference > BALANCE_TOLERANCE, current_balance, difference
+
+
 def check_account_significantly_used(account_address):
     """
     Verifica se a conta foi significativamente usada
     """
     try:
-        current_balance = w3.from_wei(w3.eth.get_balance(account_address), 'ether')
-        difference = abs(float(current_balance) - GANACHE_INITIAL_BALANCE)
-
-        # Se a diferença for maior que a tolerância, considera como usada
-        is_significantly_used = difference > BALANCE_TOLERANCE
-
-        return is_significantly_used, float(current_balance), difference
+        current_balance = float(w3.from_wei(w3.eth.get_balance(account_address), 'ether'))
+        return saldo_significativamente_usado(current_balance)
 
     except Exception as e:
         print(f"⚠️ Erro ao verificar conta {account_address}: {e}")
         return True, 0, 0
 
 
-def getGanacheAccount():
+def contas_disponiveis(enderecos):
+    """
+    Diz, para cada conta, se pode ir para um novo cliente: não registrada no
+    contrato e com saldo intacto. Consulta todas num único lote JSON-RPC.
+
+    Returns:
+        list[bool]: Uma resposta por endereço, na mesma ordem.
+    """
+    snapshot = leitor_blockchain.snapshot(enderecos)
+    return [not conta.registrado and not saldo_significativamente_usado(conta.saldo_ether)[0]
+            for conta in snapshot.contas]
+
+
+alocador_contas = AlocadorContas(GANACHE_PRIVATE_KEYS, ACCOUNTS_CONTROL_FILE, contas_disponiveis)
 
-    next_index, used_accounts = load_accounts_control()
-    print(f"🔍 Procurando conta disponível (DEBUG)...")
-    print(f"   Próximo índice no controle: {next_index}")
-    print(f"   Contas já usadas: {used_accounts}")
 
-    available_accounts = sorted(GANACHE_PRIVATE_KEYS.keys())
-    temp_used_accounts = used_accounts.copy()
+def financiar_contas(enderecos):
+    """
+    Envia CONTAS_VALOR_INICIAL_ETH da conta admin para cada endereço, em pipeline.
 
-    for account_index in available_accounts:
-        if account_index >= len(w3.eth.accounts):
-            print(f"   ❌ Conta {account_index} não existe no Ganache")
-            continue
+    Returns:
+        list[bool]: True para cada transferência confirmada.
+    """
+    valor_wei = w3.to_wei(CONTAS_VALOR_INICIAL_ETH, 'ether')
+    recibos = enviar_em_pipeline(
+        [{"to": endereco, "value": valor_wei} for endereco in enderecos],
+        PRIVATE_KEY, gas=21000
+    )
+    return [recibo is not None and recibo["status"] == 1 for recibo in recibos]
 
-        account_address = w3.eth.accounts[account_index]
-        private_key = GANACHE_PRIVATE_KEYS[account_index]
 
-        print(f"\n📌 Testando conta {account_index} -> {account_address}")
+# Contas derivadas de CONTAS_MNEMONIC, usadas quando as chaves fixas acabam
+pool_contas_hd = PoolContasHD(CONTAS_MNEMONIC, financiar_contas)
 
-        if account_address in temp_used_accounts:
-            print(f"   ❌ Conta já marcada como usada no controle")
-            continue
+# Chain revertida para um snapshot (por este ou outro processo): nada lido dela antes vale mais
+for _limpar in (resolucao_clientes.limpar, cache_saldos.limpar, gerenciador_nonce.limpar, perfil_gas.limpar,
+                parametros_rede.invalidar, esquecer_conta_ong):
+    geracao_chain.ao_mudar(_limpar)
 
-        # 🔍 Verificação no contrato
-        try:
-            ja_cadastrado = sistema_cliente.functions.ClienteRegistrado(account_address).call()
-            print(f"   - Cliente registrado no contrato? {ja_cadastrado}")
-            if ja_cadastrado:
-                temp_used_accounts.append(account_address)
-                continue
-        except Exception as e:
-            print(f"⚠️ Erro ao consultar contrato para {account_address}: {e}")
-            continue
 
-        # Verificação de saldo
-        is_used, current_balance, difference = check_account_significantly_used(account_address)
-        print(f"   - Saldo atual: {current_balance:.6f} ETH, diferença: {difference:.6f}, usado? {is_used}")
-        if is_used:
-            temp_used_accounts.append(account_address)
-            continue
+def getGanacheAccount():
+    """
+    Entrega uma conta ainda não usada: primeiro as chaves fixas do Ganache
+    (O(1), ver AlocadorContas), depois o pool de contas HD pré-financiadas.
 
-        # ✅ Conta disponível encontrada
-        print(f"   ✅ Conta DISPONÍVEL! Marcando como usada e salvando controle")
-        temp_used_accounts.append(account_address)
-        save_accounts_control(account_index + 1, temp_used_accounts)
-        return account_address, private_key
+    Returns:
+        tuple[str, str] | tuple[None, None]: Endereço e chave privada, ou (None, None) se acabaram.
+    """
+    endereco, chave = alocador_contas.alocar()
+    if endereco is None:
+        endereco, chave = pool_contas_hd.alocar()
+    return endereco, chave
 
-    print("❌ NENHUMA CONTA DISPONÍVEL!")
-    return None, None
 
+def releaseGanacheAccount(account_address):
+    """Devolve uma conta alocada cujo registro falhou antes de enviar a transação."""
+    if not pool_contas_hd.liberar(account_address):
+        alocador_contas.liberar(account_address)
+
+
+def snapshot_contas_ganache(com_registro=True):
+    """
+    Estado de todas as contas com chave privada, lido num único lote JSON-RPC.
+
+    Returns:
+        tuple[list[int], SnapshotContas]: Índices das contas e o snapshot na mesma ordem.
+    """
+    indices = sorted(GANACHE_PRIVATE_KEYS.keys())
+    enderecos = [alocador_contas.enderecos[i] for i in indices]
+    return indices, leitor_blockchain.snapshot(enderecos, com_registro=com_registro)
 
 
 def list_account_status_detailed():
     """Lista detalhada das contas com foco nas que têm chaves privadas"""
     next_index, used_accounts = load_accounts_control()
+    indices, snapshot = snapshot_contas_ganache()
 
     print(f"\n📊 STATUS DETALHADO (Base: {GANACHE_INITIAL_BALANCE} ETH, Tolerância: {BALANCE_TOLERANCE} ETH)")
+    print(f"   Bloco {snapshot.bloco} | {len(snapshot.contas)} contas lidas em {snapshot.duracao_ms:.0f} ms "
+          f"({snapshot.modo})")
     print("=" * 100)
 
     # Primeiro, mostra as contas com chaves privadas (mais importantes)
     print("🔑 CONTAS COM CHAVES PRIVADAS DISPONÍVEIS:")
     available_count = 0
 
-    for account_index in sorted(GANACHE_PRIVATE_KEYS.keys()):
-        if account_index >= len(w3.eth.accounts):
-            print(f"   Conta {account_index}: NÃO EXISTE NO GANACHE")
-            continue
-
-        account_address = w3.eth.accounts[account_index]
-        is_used, current_balance, difference = check_account_significantly_used(account_address)
+    for account_index, conta in zip(indices, snapshot.contas):
+        account_address = conta.endereco
+        is_used, current_balance, difference = saldo_significativamente_usado(conta.saldo_ether)
         is_in_control = account_address in used_accounts
 
         status_parts = []
         if is_in_control:
             status_parts.append("marcada")
+        if conta.registrado:
+            status_parts.append("registrada")
         if is_used:
             status_parts.append("saldo alterado")
 
@@ -246,12 +383,7 @@ def list_account_status_detailed():
     print(f"   Disponíveis: {available_count}")
     print(f"   Total com chaves: {len(GANACHE_PRIVATE_KEYS)}")
 
-    # Mostra algumas contas sem chaves (apenas informativo)
-    print(f"\n🔒 PRIMEIRAS CONTAS SEM CHAVES PRIVADAS (apenas informativo):")
-    for i in range(7, min(12, len(w3.eth.accounts))):  # Mostra apenas 5
-        account_address = w3.eth.accounts[i]
-        _, current_balance, difference = check_account_significantly_used(account_address)
-        print(f"   Conta {i:2d}: {account_address} | {current_balance:10.6f} ETH (±{difference:.6f}) | SEM CHAVE")
+    return snapshot
 
 
 def force_reset_with_confirmation():
@@ -262,11 +394,10 @@ def force_reset_with_confirmation():
     print(f"Saldo esperado após reset: {GANACHE_INITIAL_BALANCE} ETH por conta")
 
     print("\n📋 Status atual das contas com chaves privadas:")
-    for account_index in sorted(GANACHE_PRIVATE_KEYS.keys()):
-        if account_index < len(w3.eth.accounts):
-            account_address = w3.eth.accounts[account_index]
-            _, current_balance, difference = check_account_significantly_used(account_address)
-            print(f"   Conta {account_index}: {current_balance:.6f} ETH (diferença: {difference:.6f})")
+    indices, snapshot = snapshot_contas_ganache(com_registro=False)
+    for account_index, conta in zip(indices, snapshot.contas):
+        _, current_balance, difference = saldo_significativamente_usado(conta.saldo_ether)
+        print(f"   Conta {account_index}: {current_balance:.6f} ETH (diferença: {difference:.6f})")
 
     confirmation = input(f"\nDigite 'RESET' para confirmar: ")
     if confirmation != "RESET":
@@ -301,6 +432,8 @@ def quick_test():
 
 # Funções mantidas (QR codes, etc.)
 def gerar_qrcode(link: str, nome_arquivo: str = "qrcode.png") -> str:
+    import qrcode  # importação tardia: qrcode/PIL só carregam no primeiro QR
+
     qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
     qr.add_data(link)
     qr.make(fit=True)
@@ -321,16 +454,58 @@ def salvar_qr(img, nome_arquivo):
     return caminho
 
 
-def sign_n_send(tx, private_key):
-    signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+class ReciboNaoConfirmado(TimeoutError):
+    """A transação foi enviada, mas o recibo não chegou dentro do tempo de espera."""
+
+    def __init__(self, tx_hash, timeout):
+        super().__init__(f"Transação {tx_hash.to_0x_hex()} sem recibo após {timeout}s")
+        self.tx_hash = tx_hash
+
+
+def enviar_transacao(tx, private_key):
+    """
+    Assina e envia uma transação sem esperar o recibo.
+
+    ``tx`` pode ser a transação pronta ou uma função ``tx(nonce) -> dict``; no
+    segundo caso o nonce vem do GerenciadorNonce (sem RPC e seguro para envios
+    simultâneos da mesma carteira).
+
+    Returns:
+        tuple[HexBytes, int]: Hash da transação e nonce usado.
+    """
+    if callable(tx):
+        usado = {}
+
+        def montar(nonce):
+            usado["nonce"] = nonce
+            return tx(nonce)
+
+        tx_hash = gerenciador_nonce.enviar(private_key, montar)
+        nonce = usado["nonce"]
+    else:
+        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        nonce = tx.get("nonce")
     print(f"Transação enviada. Hash: {tx_hash.hex()}")
+    return tx_hash, nonce
+
+
+def sign_n_send(tx, private_key, timeout=10):
+    """
+    Assina, envia e aguarda o recibo de uma transação (ver enviar_transacao).
+
+    Raises:
+        ReciboNaoConfirmado: Se o recibo não chegar em ``timeout`` segundos; a
+            transação continua no nó e ``tx_hash`` fica na exceção.
+    """
+    tx_hash, _ = enviar_transacao(tx, private_key)
     try:
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=10)
-        return receipt
-    except Exception as e:
-        print("Erro ao aguardar confirmação da transação:", e)
-        return None
+        return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+    except TimeExhausted:
+        print(f"⚠️ Recibo de {tx_hash.hex()} não chegou em {timeout}s")
+        # Nonce local à frente do nó (reinício, snapshot revertido) deixa a transação presa na fila
+        gerenciador_nonce.sincronizar(endereco_da_chave(private_key))
+        raise ReciboNaoConfirmado(tx_hash, timeout)
 
 
 def extract_interface(compiled_contracts, contract_name):
@@ -343,60 +518,23 @@ def get_eth_to_brl():
     """
     Busca a cotação ETH/BRL com fallback robusto em duas fontes.
 
+    A consulta passa pelo cache compartilhado do processo: dentro do TTL não há
+    chamada externa e, vencido o TTL, a última cotação boa é servida enquanto
+    uma única atualização roda em background.
+
     Returns:
         float: Cotação ETH em BRL ou valor padrão em caso de erro.
     """
-    # Valor padrão de segurança
-    fallback_value = 23500.0
-
-    # --- 1) CoinGecko ---
-    try:
-        url = "https://api.coingecko.com/api/v3/simple/price"
-        params = {"ids": "ethereum", "vs_currencies": "brl"}
-        response = requests.get(url, params=params, timeout=10)
-
-        print("➡️ URL chamada CoinGecko:", response.url)
-
-        if response.status_code == 200:
-            data = response.json()
-            price = data.get("ethereum", {}).get("brl")
-            if isinstance(price, (int, float)) and price > 0:
-                print(f"✅ Cotação ETH/BRL obtida da CoinGecko: R$ {price:,.2f}")
-                return float(price)
-        else:
-            print(f"❌ CoinGecko retornou status {response.status_code}")
-    except Exception as e:
-        print(f"⚠️ Erro CoinGecko: {str(e)}")
-
-    # --- 2) CryptoCompare ---
-    try:
-        url = "https://min-api.cryptocompare.com/data/price"
-        params = {"fsym": "ETH", "tsyms": "BRL"}
-        response = requests.get(url, params=params, timeout=10)
-
-        print("➡️ URL chamada CryptoCompare:", response.url)
-
-        if response.status_code == 200:
-            data = response.json()
-            price = data.get("BRL")
-            if isinstance(price, (int, float)) and price > 0:
-                print(f"✅ Cotação ETH/BRL obtida da CryptoCompare: R$ {price:,.2f}")
-                return float(price)
-        else:
-            print(f"❌ CryptoCompare retornou status {response.status_code}")
-    except Exception as e:
-        print(f"⚠️ Erro CryptoCompare: {str(e)}")
-
-    # --- 3) Fallback fixo ---
-    print(f"⚠️ Usando valor fallback: R$ {fallback_value:,.2f}")
-    return fallback_value
+    return cotacao_cache.obter()
 
 
 def listAllAccounts():
-    print(w3.eth.accounts)
-    for conta in w3.eth.accounts:
-        saldo = w3.from_wei(w3.eth.get_balance(conta), 'ether')
-        print(conta, saldo)
+    contas = w3.eth.accounts
+    print(contas)
+    snapshot = leitor_blockchain.snapshot(contas, com_registro=False)
+    for conta in snapshot.contas:
+        print(conta.endereco, conta.saldo_ether)
+    return snapshot
 
 def calcular_projecao(investimento_inicial_eth):
 
@@ -413,27 +551,24 @@ def calcular_projecao(investimento_inicial_eth):
     }
 
 def gerar_qr_comprovante(receipt_json, tx_id):
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=6,
-        border=4,
-    )
-    qr.add_data(json.dumps(receipt_json, ensure_ascii=False))
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
+    """
+    Gera o QR code do comprovante de uma transação.
 
-    # Salvar como arquivo
-    pasta = "static/qrs"
-    os.makedirs(pasta, exist_ok=True)
-    caminho = os.path.join(pasta, f"comprovante_{tx_id}.png")
-    img.save(caminho)
+    O PNG é codificado uma única vez e reaproveitado para o arquivo e para o
+    base64; comprovantes repetidos vêm do cache em disco (ver qr_cache).
 
-    # Também retornar em base64 (para front consumir diretamente)
-    bio = BytesIO()
-    img.save(bio, format="PNG")
-    b64 = base64.b64encode(bio.getvalue()).decode("utf-8")
+    Args:
+        receipt_json (dict): Dados do comprovante.
+        tx_id (str): Hash da transação.
 
+    Returns:
+        tuple[str, str]: Data URL base64 do PNG e caminho do arquivo.
+    """
+    png, caminho = cache_qr_comprovante.obter_ou_gerar(conteudo_comprovante(receipt_json))
+    print(f"QR do comprovante {tx_id} em: {caminho}")
+
+    # Também retornar em base64 (para front consumir diretamente)
+    b64 = base64.b64encode(png).decode("utf-8")
     return f"data:image/png;base64,{b64}", caminho
 
 
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+# Importa a aplicação uma vez no master e reaproveita nos workers (fork).
+# Seguro porque a importação não abre conexões nem inicia threads.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    """Bootstrap do contrato (conta da ONG) uma única vez por deploy, antes dos workers."""
+    # Processo separado: o master não herda conexões abertas com o nó para os workers
+    subprocess.run([sys.executable, "-m", "Backend.bootstrap"], check=False)
+
+
+def post_fork(server, worker):
+    """Inicia as threads de cada worker (threads não atravessam o fork)."""
+    from Backend.utils import pool_contas_hd
+    from Backend.rastreador_recibos import rastreador_recibos
+    from Backend.resolucao_clientes import resolucao_clientes
+    from Backend.indexador_eventos import indexador_eventos
+    pool_contas_hd.iniciar()
+    # Aquece o cache Pix/email -> carteira com o banco e os eventos do contrato
+    resolucao_clientes.iniciar()
+    # Retoma o acompanhamento das transações que ficaram PENDENTE no banco
+    rastreador_recibos.iniciar()
+    # Copia os eventos dos contratos para a tabela transacoes (um worker por vez, via GET_LOCK)
+    indexador_eventos.iniciar()